@@ -0,0 +1,240 @@
+# -------------------------------------------------
+# CropCare - near-duplicate answer cache for general questions
+# -------------------------------------------------
+# Farmers ask the same handful of questions in slightly different words.
+# Questions are normalized (case, punctuation, spacing, English function
+# words) and embedded as hashed character 3-gram vectors; a lookup returns
+# the stored answer of the most similar earlier question in the same
+# language if the cosine similarity clears `threshold` and both questions
+# use the same words up to spelling (`tokens_agree`), so a different crop,
+# growth stage, question word ("how" vs "when") or an added "not" is a miss. Entries live in memory (LRU +
+# TTL) and in a small SQLite table, so they are shared across sessions,
+# survive restarts and can be pre-warmed offline:
+#
+#     python answer_cache.py --prewarm
+import os, time, zlib, sqlite3, threading, unicodedata, argparse
+from collections import OrderedDict
+from difflib import SequenceMatcher
+
+import numpy as np
+
+from result_cache import DEFAULT_CACHE_DIR
+
+NGRAM = 3
+DIM = 4096
+SIMILARITY = float(os.getenv("CROPCARE_ANSWER_SIMILARITY", "0.85"))
+ANSWER_TTL = 30 * 24 * 3600  # general farming advice does not go stale quickly
+
+# Dropping function words lets "when should I plant corn" match "when should we plant
+# the corn" while "... plant rice" stays below the threshold. Question words and modals
+# are kept: "how/why/can I plant corn" ask different things than "when should I".
+STOPWORDS = frozenset(
+    "a an the is are was were be to of for in on at by with and or my i do does did "
+    "we you it its this that these those me our your there".split()
+)
+# ... and must match exactly, not just by spelling ("would" vs "could").
+INTENT_WORDS = frozenset(
+    "how what when where why which who whom whose should can could would will shall must may might".split()
+)
+NORMALIZE_VERSION = "2"  # part of the namespace; bump when normalize_question changes
+# Long questions share most of their n-grams, so cosine alone lets "tomato" match "potato" or
+# "spray" match "not spray". A near hit also needs every remaining word to have a counterpart
+# in the other question at least this similar (spelling variants and plurals pass).
+TOKEN_SIMILARITY = 0.8
+
+
+def normalize_question(text: str) -> str:
+    """Lowercase, NFKC, punctuation/symbols to spaces (letters, digits and Indic vowel signs are kept), no stopwords."""
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = "".join(ch if unicodedata.category(ch)[0] in "LNM" else " " for ch in text)
+    return " ".join(w for w in text.split() if w not in STOPWORDS)
+
+
+def embed(normalized: str) -> np.ndarray:
+    """L2-normalized hashed character n-gram vector."""
+    vec = np.zeros(DIM, dtype=np.float32)
+    padded = f" {normalized} "
+    for i in range(len(padded) - NGRAM + 1):
+        vec[zlib.crc32(padded[i:i + NGRAM].encode("utf-8")) % DIM] += 1.0
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+def tokens_agree(a: str, b: str, min_ratio: float = TOKEN_SIMILARITY) -> bool:
+    """True if both normalized questions use the same question words and modals, and every other
+    word of either has a close spelling in the other."""
+    wa, wb = set(a.split()), set(b.split())
+    if wa & INTENT_WORDS != wb & INTENT_WORDS:
+        return False
+
+    def covered(words, other):
+        return all(any(SequenceMatcher(None, w, o).ratio() >= min_ratio for o in other) for w in words)
+
+    return covered(wa - wb, wb) and covered(wb - wa, wa)
+
+
+class AnswerCache:
+    """Per-language nearest-question lookup with LRU + TTL eviction, backed by SQLite."""
+
+    def __init__(self, path: str | None = None, namespace: str = "", max_entries: int = 2048,
+                 ttl: float = ANSWER_TTL, threshold: float = SIMILARITY):
+        self.path = path if path is not None else os.path.join(DEFAULT_CACHE_DIR, "answers.sqlite")
+        # model + prompt version; answers from older prompts (or older normalization) are never served
+        self.namespace = f"{namespace}:n{NORMALIZE_VERSION}"
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        # (language, normalized question) -> (created, answer, vector), in LRU order
+        self._mem: OrderedDict[tuple[str, str], tuple[float, str, np.ndarray]] = OrderedDict()
+        self._matrix: dict[str, tuple[list[str], np.ndarray]] = {}  # per-language stacked vectors, rebuilt on change
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "exact_hits": 0, "near_hits": 0, "misses": 0}
+        self._db = None
+        if self.path:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS answers ("
+                    " namespace TEXT NOT NULL, language TEXT NOT NULL, question TEXT NOT NULL, answer TEXT NOT NULL,"
+                    " created REAL NOT NULL, accessed REAL NOT NULL, PRIMARY KEY (namespace, language, question))"
+                )
+                self._db.commit()
+                self._load()
+            except sqlite3.Error:
+                self._db = None
+
+    def _load(self) -> None:
+        rows = self._db.execute(
+            "SELECT language, question, answer, created FROM answers WHERE namespace = ? AND created >= ?"
+            " ORDER BY accessed DESC LIMIT ?",
+            (self.namespace, time.time() - self.ttl, self.max_entries),
+        ).fetchall()
+        for language, question, answer, created in reversed(rows):
+            self._remember(language, question, created, answer)
+
+    # -- lookups --------------------------------------------------------
+    def lookup(self, question: str, language: str) -> str | None:
+        norm = normalize_question(question)
+        if not norm:
+            return None
+        now = time.time()
+        with self._lock:
+            hit = self._mem.get((language, norm))
+            if hit is None:
+                hit = self._load_exact(language, norm)  # written by another process since we started
+            if hit is not None and now - hit[0] <= self.ttl:
+                self._mem.move_to_end((language, norm))
+                self.stats["hits"] += 1
+                self.stats["exact_hits"] += 1
+                return hit[1]
+
+            match = self._nearest(language, norm)
+            if match is not None:
+                created, answer, _ = self._mem[(language, match)]
+                if now - created <= self.ttl:
+                    self._mem.move_to_end((language, match))
+                    self.stats["hits"] += 1
+                    self.stats["near_hits"] += 1
+                    return answer
+                self._forget(language, match)
+            self.stats["misses"] += 1
+            return None
+
+    def _load_exact(self, language: str, norm: str):
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT answer, created FROM answers WHERE namespace = ? AND language = ? AND question = ?",
+                (self.namespace, language, norm),
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        self._remember(language, norm, row[1], row[0])
+        return self._mem[(language, norm)]
+
+    def _nearest(self, language: str, norm: str) -> str | None:
+        cached = self._matrix.get(language)
+        if cached is None:
+            keys = [q for lang, q in self._mem if lang == language]
+            if not keys:
+                return None
+            cached = self._matrix[language] = (keys, np.stack([self._mem[(language, q)][2] for q in keys]))
+        keys, matrix = cached
+        sims = matrix @ embed(norm)
+        for i in np.argsort(-sims):
+            if sims[i] < self.threshold:
+                break
+            if tokens_agree(norm, keys[i]):
+                return keys[i]
+        return None
+
+    def put(self, question: str, language: str, answer: str) -> None:
+        norm = normalize_question(question)
+        if not norm or not answer:
+            return
+        now = time.time()
+        with self._lock:
+            self._remember(language, norm, now, answer)
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO answers (namespace, language, question, answer, created, accessed)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (self.namespace, language, norm, answer, now, now),
+                )
+                self._db.execute("DELETE FROM answers WHERE created < ?", (now - self.ttl,))
+                self._db.commit()
+            except sqlite3.Error:
+                pass
+
+    # -- eviction -------------------------------------------------------
+    def _remember(self, language: str, norm: str, created: float, answer: str) -> None:
+        self._mem[(language, norm)] = (created, answer, embed(norm))
+        self._mem.move_to_end((language, norm))
+        self._matrix.pop(language, None)
+        while len(self._mem) > self.max_entries:
+            (old_lang, _), _ = self._mem.popitem(last=False)
+            self._matrix.pop(old_lang, None)
+
+    def _forget(self, language: str, norm: str) -> None:
+        self._mem.pop((language, norm), None)
+        self._matrix.pop(language, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            self._matrix.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM answers WHERE namespace = ?", (self.namespace,))
+                self._db.commit()
+
+    def hit_rate(self) -> float:
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Manage the CropCare general-question answer cache.")
+    parser.add_argument("--prewarm", action="store_true", help="answer every example question in every language")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args(argv)
+    if not args.prewarm:
+        parser.print_help()
+        return 1
+    # Imported lazily so `--help` does not pull in the model SDK.
+    import cropcare_core as core
+
+    start = time.perf_counter()
+    done = core.prewarm_answer_cache(max_workers=args.workers)
+    print(f"Pre-warmed {done} answers in {time.perf_counter() - start:.1f}s -> {core.get_answer_cache().path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
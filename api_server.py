@@ -0,0 +1,253 @@
+# -------------------------------------------------
+# CropCare HTTP API
+# -------------------------------------------------
+# Headless service over cropcare_core for mobile clients and integrations:
+#
+#     uvicorn api_server:app --host 0.0.0.0 --port 8000
+#
+# Blocking pipeline work runs on a bounded thread pool. At most
+# API_WORKERS requests execute at once, up to API_QUEUE_DEPTH more wait
+# their turn, and anything beyond that is rejected with 503 + Retry-After
+# instead of piling up until every request times out.
+import os, json, asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Literal
+
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+from starlette.concurrency import iterate_in_threadpool
+
+import cropcare_core as core
+import metrics
+from conversation import Conversation
+from jobs import get_job_queue
+from batch import NamedBytesIO, IMAGE_EXTENSIONS, SUPPORTED_EXTENSIONS
+from result_cache import content_hash
+
+API_WORKERS = int(os.getenv("CROPCARE_API_WORKERS", "8"))
+API_QUEUE_DEPTH = int(os.getenv("CROPCARE_API_QUEUE_DEPTH", "64"))
+MAX_UPLOAD_BYTES = int(os.getenv("CROPCARE_MAX_UPLOAD_MB", "50")) * 1024 * 1024
+
+
+class WorkQueue:
+    """Admission control: `workers` concurrent slots plus a bounded waiting line."""
+
+    def __init__(self, workers: int, depth: int):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cropcare-api")
+        self._slots = asyncio.Semaphore(workers)
+        self._capacity = workers + depth
+        self.in_flight = 0  # running + waiting
+
+    def admit(self) -> None:
+        if self.in_flight >= self._capacity:
+            raise HTTPException(status_code=503, detail="Server busy, retry shortly", headers={"Retry-After": "2"})
+        self.in_flight += 1
+
+    def release(self) -> None:
+        self.in_flight -= 1
+
+    async def run(self, fn, *args, **kwargs):
+        """Run blocking `fn` on the pool once a slot is free."""
+        self.admit()
+        try:
+            async with self._slots:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self.executor, lambda: fn(*args, **kwargs))
+        finally:
+            self.release()
+
+    def streaming_response(self, make_iter, **kwargs) -> StreamingResponse:
+        """Admit now (a 503 can still be sent) and stream `make_iter()` while holding a slot."""
+        self.admit()
+        return _SlotResponse(self._stream(make_iter), release=self.release, **kwargs)
+
+    async def _stream(self, make_iter):
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            chunks = await loop.run_in_executor(self.executor, make_iter)
+            async for chunk in iterate_in_threadpool(chunks):
+                yield chunk
+
+
+class _SlotResponse(StreamingResponse):
+    """Frees the admitted slot however the response ends. A generator `finally` would not run
+    if the client disconnected before Starlette started iterating the body."""
+
+    def __init__(self, content, release, **kwargs):
+        super().__init__(content, **kwargs)
+        self._release = release
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._release()
+
+
+app = FastAPI(title="CropCare API")
+queue: WorkQueue | None = None
+
+
+def get_queue() -> WorkQueue:
+    # Created lazily so the semaphore binds to the server's running event loop.
+    global queue
+    if queue is None:
+        queue = WorkQueue(API_WORKERS, API_QUEUE_DEPTH)
+    return queue
+
+
+def check_language(language: str) -> str:
+    if language not in core.LANGUAGES:
+        raise HTTPException(status_code=422, detail=f"language must be one of {list(core.LANGUAGES)}")
+    return language
+
+
+async def read_upload(file: UploadFile, allowed: tuple[str, ...]) -> tuple[bytes, str]:
+    ext = (file.filename or "").lower().rsplit(".", 1)[-1]
+    if ext not in allowed:
+        raise HTTPException(status_code=415, detail=f"Unsupported file type .{ext}")
+    data = await file.read(MAX_UPLOAD_BYTES + 1)
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="File too large")
+    return data, ext
+
+
+# -------------------------------------------------
+# Endpoints
+# -------------------------------------------------
+def get_result_stats() -> dict:
+    cache = core.get_result_cache()
+    return dict(cache.stats, hit_rate=round(cache.hit_rate(), 3))
+
+
+@app.get("/healthz")
+async def healthz():
+    q = get_queue()
+    return {"status": "ok", "in_flight": q.in_flight, "cache": get_result_stats()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Per-stage latency histograms and counters in Prometheus text format."""
+    return PlainTextResponse(metrics.prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/analyze/image")
+async def analyze_image(file: UploadFile = File(...), language: str = Form("English")):
+    check_language(language)
+    data, ext = await read_upload(file, IMAGE_EXTENSIONS)
+    screen = await get_queue().run(core.triage_image, data)
+    if not screen.usable:
+        # Answered locally in milliseconds: the client should ask for a new photo.
+        raise HTTPException(status_code=422, detail={"reason": screen.reason, "retake": True,
+                                                     "sharpness": screen.sharpness, "brightness": screen.brightness})
+
+    def work():
+        combined = core.analyze_image_combined(data, language) if core.COMBINED_IMAGE_ANALYSIS else None
+        if combined:
+            return combined
+        return core.analyze_image_with_ai(data, language), core.extract_text(NamedBytesIO(data, f"upload.{ext}"))
+
+    diagnosis, text = await get_queue().run(work)
+    doc_id = core.remember_document(text) if text else None
+    return {"sha256": content_hash(data), "diagnosis": diagnosis, "extracted_text": text, "document_id": doc_id,
+            "prescreen": {"labels": screen.labels, "cues": screen.cues}}
+
+
+@app.post("/analyze/document")
+async def analyze_document(file: UploadFile = File(...), language: str = Form("English")):
+    check_language(language)
+    data, ext = await read_upload(file, tuple(e for e in SUPPORTED_EXTENSIONS if e not in IMAGE_EXTENSIONS))
+
+    def work():
+        text = core.extract_text(NamedBytesIO(data, f"upload.{ext}"))
+        summary = core.summarize_document(text, language) if text else ""
+        return text, summary
+
+    text, summary = await get_queue().run(work)
+    if not text:
+        raise HTTPException(status_code=422, detail="No readable text found in the uploaded file.")
+    return {"sha256": content_hash(data), "document_id": core.remember_document(text),
+            "text_chars": len(text), "summary": summary}
+
+
+class ChatMessage(BaseModel):
+    role: Literal["user", "assistant"]
+    content: str
+
+
+class ConversationState(BaseModel):
+    messages: list[ChatMessage] = []
+    summary: str = ""
+
+
+class ChatRequest(BaseModel):
+    question: str
+    language: str = "English"
+    document_id: str | None = None
+    summary: str = ""
+    stream: bool = False
+    # Conversation state as returned by the previous /chat response ({"messages": [...], "summary": "..."});
+    # streamed responses return only the compaction, in X-Conversation-Dropped / X-Conversation-Summary.
+    conversation: ConversationState | None = None
+
+
+@app.post("/chat")
+async def chat(req: ChatRequest):
+    check_language(req.language)
+    document_text, mode = "", "general"
+    if req.document_id:
+        document_text = core.load_document(req.document_id)
+        if document_text is None:
+            raise HTTPException(status_code=404, detail="Unknown or expired document_id; re-upload the document.")
+        mode = "chat"
+
+    conv = Conversation.from_dict(req.conversation.model_dump() if req.conversation else None)
+
+    def answer(stream: bool):
+        return core.ask_ai(document_text, req.question, mode, stream=stream, language=req.language,
+                           summary=req.summary, conversation=conv)
+
+    if req.stream:
+        q = get_queue()
+        # A client may send back more history than the budget allows. Fold it before the response
+        # starts and return the result in headers: drop the first X-Conversation-Dropped messages
+        # and use X-Conversation-Summary (a JSON string) as the summary, so the next turn does not
+        # pay for the same compaction again.
+        before = len(conv.messages)
+        if conv.needs_compaction():
+            await q.run(core.compact_conversation, conv, req.language)
+        headers = {"X-Conversation-Dropped": str(before - len(conv.messages)),
+                   "X-Conversation-Summary": json.dumps(conv.summary)}
+        # Rejects with 503 now; once streaming starts the status code is already sent.
+        return q.streaming_response(lambda: answer(True), media_type="text/plain; charset=utf-8", headers=headers)
+
+    def answer_and_record():
+        # Folds history a client sent beyond the budget before answering.
+        core.compact_conversation(conv, req.language)
+        text = answer(False)
+        core.record_exchange(conv, req.question, text, req.language)
+        return text
+
+    text = await get_queue().run(answer_and_record)
+    return {"answer": text, "mode": mode, "conversation": conv.to_dict()}
+
+
+@app.post("/jobs")
+async def submit_job(file: UploadFile = File(...), language: str = Form("English")):
+    """Queue a long document analysis; poll GET /jobs/{job_id} for progress and results."""
+    check_language(language)
+    data, _ = await read_upload(file, tuple(e for e in SUPPORTED_EXTENSIONS if e not in IMAGE_EXTENSIONS))
+    return {"job_id": get_job_queue().submit(file.filename, data, language)}
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job_id")
+    out = {k: job[k] for k in ("id", "status", "progress", "message", "error", "language", "filename")}
+    if job["status"] == "done":
+        out.update(summary=job["summary"], document_id=core.remember_document(job["doc_text"]))
+    return out
@@ -0,0 +1,154 @@
+# -------------------------------------------------
+# CropCare - batch analysis of many images / documents
+# -------------------------------------------------
+# Used by the multi-file uploader in the app and as a headless CLI:
+#
+#     python batch.py ./field_photos --language English --workers 4 --out report.csv
+#
+# Identical files (by SHA-256) are analyzed once; every input still gets a
+# row in the report, pointing at the file it duplicated.
+import os, io, csv, json, time, hashlib, logging, argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+BATCH_WORKERS = int(os.getenv("CROPCARE_BATCH_WORKERS", "4"))
+SUPPORTED_EXTENSIONS = ("pdf", "docx", "txt", "jpg", "jpeg", "png")
+IMAGE_EXTENSIONS = ("jpg", "jpeg", "png")
+REPORT_FIELDS = ["file", "sha256", "kind", "status", "seconds", "duplicate_of", "extracted_chars", "summary", "error"]
+
+
+class NamedBytesIO(io.BytesIO):
+    """BytesIO with the `.name` attribute extract_text expects from Streamlit uploads."""
+
+    def __init__(self, data: bytes, name: str):
+        super().__init__(data)
+        self.name = name
+
+
+class BatchItem:
+    def __init__(self, name: str, data: bytes):
+        self.name = name
+        self.data = data
+        self.sha256 = hashlib.sha256(data).hexdigest()
+        self.ext = name.lower().rsplit(".", 1)[-1]
+
+
+def iter_folder(path: str):
+    for root, _, files in os.walk(path):
+        for fn in sorted(files):
+            if fn.lower().rsplit(".", 1)[-1] in SUPPORTED_EXTENSIONS:
+                full = os.path.join(root, fn)
+                with open(full, "rb") as fh:
+                    yield BatchItem(os.path.relpath(full, path), fh.read())
+
+
+def analyze_item(item: BatchItem, language: str, screen=None) -> dict:
+    """`screen` is the item's TriageResult if images were pre-screened; unusable photos are not sent."""
+    # Imported lazily so `python batch.py --help` does not pull in the model SDK.
+    import cropcare_core as app
+
+    row = {"file": item.name, "sha256": item.sha256, "duplicate_of": "", "error": ""}
+    if item.ext in IMAGE_EXTENSIONS and screen is not None and not screen.usable:
+        row.update(kind="image", status="retake", error=screen.reason, summary="", extracted_chars=0, seconds=0.0)
+        return row
+    start = time.perf_counter()
+    try:
+        if item.ext in IMAGE_EXTENSIONS:
+            row["kind"] = "image"
+            combined = app.analyze_image_combined(item.data, language) if app.COMBINED_IMAGE_ANALYSIS else None
+            if combined:
+                summary, text = combined
+            else:
+                summary = app.analyze_image_with_ai(item.data, language)
+                text = app.extract_text(NamedBytesIO(item.data, item.name))
+        else:
+            row["kind"] = "document"
+            text = app.extract_text(NamedBytesIO(item.data, item.name))
+            summary = app.summarize_document(text, language) if text else ""
+        row["summary"] = summary
+        row["extracted_chars"] = len(text or "")
+        row["status"] = "ok" if summary and not summary.startswith("Error analyzing image") else "no_result"
+    except Exception as e:
+        row.update(status="error", error=str(e), summary="", extracted_chars=0)
+    row["seconds"] = round(time.perf_counter() - start, 3)
+    return row
+
+
+def run_batch(items: list[BatchItem], language: str = "English", max_workers: int = BATCH_WORKERS, on_item=None) -> list[dict]:
+    """Analyze `items` on a bounded pool; returns one report row per input, in input order.
+
+    `on_item(done, total, row)` is called from the calling thread after each unique file.
+    """
+    first_by_hash: dict[str, BatchItem] = {}
+    for it in items:
+        first_by_hash.setdefault(it.sha256, it)
+    unique = list(first_by_hash.values())
+
+    # Screen all photos locally in one batch first; blurry or dark ones are reported, not analyzed.
+    import cropcare_core as app
+    images = [it for it in unique if it.ext in IMAGE_EXTENSIONS]
+    screens = dict(zip((it.sha256 for it in images), app.triage_images([it.data for it in images]))) if images else {}
+
+    rows_by_hash: dict[str, dict] = {}
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="cropcare-batch") as pool:
+        futures = {pool.submit(analyze_item, it, language, screens.get(it.sha256)): it for it in unique}
+        for done, fut in enumerate(as_completed(futures), 1):
+            row = fut.result()
+            rows_by_hash[futures[fut].sha256] = row
+            if on_item:
+                on_item(done, len(unique), row)
+
+    report = []
+    for it in items:
+        original = first_by_hash[it.sha256]
+        row = dict(rows_by_hash[it.sha256])
+        if it is not original:
+            row.update(file=it.name, duplicate_of=original.name, seconds=0.0)
+        report.append(row)
+    return report
+
+
+def report_csv(rows: list[dict]) -> str:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=REPORT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(rows)
+    return buf.getvalue()
+
+
+def report_jsonl(rows: list[dict]) -> str:
+    return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in rows)
+
+
+def write_report(rows: list[dict], path: str) -> None:
+    body = report_jsonl(rows) if path.lower().endswith((".jsonl", ".json")) else report_csv(rows)
+    with open(path, "w", encoding="utf-8", newline="") as fh:
+        fh.write(body)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Analyze a folder of crop images and documents with CropCare.")
+    parser.add_argument("folder")
+    parser.add_argument("--language", default="English")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS)
+    parser.add_argument("--out", default="cropcare_report.csv", help=".csv or .jsonl")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    items = list(iter_folder(args.folder))
+    if not items:
+        print(f"No supported files under {args.folder}")
+        return 1
+
+    def progress(done, total, row):
+        print(f"[{done}/{total}] {row['status']:<9} {row['seconds']:>7.2f}s  {row['file']}")
+
+    start = time.perf_counter()
+    rows = run_batch(items, language=args.language, max_workers=args.workers, on_item=progress)
+    write_report(rows, args.out)
+    dupes = sum(1 for r in rows if r["duplicate_of"])
+    print(f"{len(rows)} files ({dupes} duplicates) in {time.perf_counter() - start:.1f}s -> {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,143 @@
+# -------------------------------------------------
+# DOCX/TXT extraction throughput and peak RSS vs file size
+# -------------------------------------------------
+# Compares the old python-docx path (`Document(f).paragraphs`, tables
+# dropped) with doc_extract's streaming parser, and the old
+# utf-8/errors="ignore" TXT read with decode_text. Sizes are uncompressed
+# word/document.xml (or TXT) megabytes; the generated DOCX mixes headings,
+# paragraphs and fertilizer-schedule tables. Each run is a fresh subprocess
+# (spawned from a parent that never holds the files) so ru_maxrss is not
+# polluted by earlier runs.
+#
+#     python benchmarks/bench_extract.py --mb 5 20 50 --json out.json
+import io, os, sys, json, time, random, zipfile, argparse, resource, subprocess, tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MODES = ("docx-legacy", "docx-streaming", "txt-legacy", "txt-streaming")
+WORDS = ("urea", "nitrogen", "paddy", "soil", "potash", "irrigation", "leaf", "blight", "yield", "sowing",
+         "ಮಣ್ಣು", "मिट्टी", "నేల", "മണ്ണ്")
+
+_W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/></Types>'
+)
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="word/document.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/></Relationships>'
+)
+
+
+def _para(text: str, style: str = "") -> str:
+    ppr = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ""
+    return f"<w:p>{ppr}<w:r><w:t xml:space=\"preserve\">{text}</w:t></w:r></w:p>"
+
+
+def _table(rng: random.Random, rows: int) -> str:
+    def row(cells):
+        return "<w:tr>" + "".join(f"<w:tc>{_para(c)}</w:tc>" for c in cells) + "</w:tr>"
+    body = [row(["Week", "Fertilizer", "Dose (kg/acre)"])]
+    body += [row([str(i + 1), rng.choice(WORDS), f"{rng.uniform(5, 60):.1f}"]) for i in range(rows)]
+    return "<w:tbl>" + "".join(body) + "</w:tbl>"
+
+
+def make_docx(path: str, mb: float, seed: int = 0) -> None:
+    """A DOCX whose document.xml is about `mb` megabytes, written straight to the zip."""
+    rng = random.Random(seed)
+    target = int(mb * 1024 * 1024)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        zf.writestr("_rels/.rels", _RELS)
+        with zf.open("word/document.xml", "w", force_zip64=True) as fh:
+            fh.write(f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:document {_W}><w:body>'.encode())
+            written, section = 0, 0
+            while written < target:
+                section += 1
+                parts = [_para(f"Field {section}", "Heading1")]
+                parts += [_para(" ".join(rng.choice(WORDS) for _ in range(40))) for _ in range(8)]
+                parts.append(_table(rng, 12))
+                chunk = "".join(parts).encode()
+                fh.write(chunk)
+                written += len(chunk)
+            fh.write(b"<w:sectPr/></w:body></w:document>")
+
+
+def make_txt(path: str, mb: float, seed: int = 0) -> None:
+    """Mixed-script text in UTF-16 (with BOM), which the old utf-8 read turns into garbage."""
+    rng = random.Random(seed)
+    with open(path, "wb") as fh:
+        fh.write(b"\xff\xfe")
+        while fh.tell() < mb * 1024 * 1024:
+            fh.write((" ".join(rng.choice(WORDS) for _ in range(30)) + "\n").encode("utf-16-le"))
+
+
+def run_child(mode: str, path: str) -> dict:
+    with open(path, "rb") as fh:
+        data = fh.read()
+    start = time.perf_counter()
+    if mode == "docx-legacy":
+        import docx
+        text = "\n".join(p.text for p in docx.Document(io.BytesIO(data)).paragraphs).strip()
+    elif mode == "docx-streaming":
+        from doc_extract import docx_to_text
+        text = docx_to_text(io.BytesIO(data)).strip()
+    elif mode == "txt-legacy":
+        text = data.decode("utf-8", errors="ignore")
+    else:
+        from doc_extract import decode_text
+        text = decode_text(data)
+    seconds = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KiB on Linux
+    return {"mode": mode, "file_mb": round(len(data) / 2 ** 20, 1), "seconds": round(seconds, 2),
+            "chars": len(text), "peak_rss_mb": round(peak_kb / 1024, 1)}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="DOCX/TXT extraction throughput and peak RSS vs size.")
+    parser.add_argument("--mb", type=float, nargs="+", default=[5, 20, 50],
+                        help="uncompressed document.xml / TXT sizes in MB")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--json", help="also write results to this file")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    parser.add_argument("--make", nargs=3, metavar=("KIND", "MB", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_child(*args.child)))
+        return 0
+    if args.make:
+        kind, mb, path = args.make
+        (make_docx if kind == "docx" else make_txt)(path, float(mb))
+        return 0
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for mb in args.mb:
+            files = {"docx": os.path.join(tmp, f"report-{mb}.docx"), "txt": os.path.join(tmp, f"notes-{mb}.txt")}
+            for kind, path in files.items():  # in a subprocess too: ru_maxrss survives fork+exec
+                subprocess.run([sys.executable, __file__, "--make", kind, str(mb), path], check=True)
+            for mode in args.modes:
+                out = subprocess.run([sys.executable, __file__, "--child", mode, files[mode.split("-")[0]]],
+                                     capture_output=True, text=True, check=True)
+                row = json.loads(out.stdout.strip().splitlines()[-1])
+                row["mb"] = mb
+                row["mb_per_s"] = round(mb / max(row["seconds"], 1e-3), 1)
+                results.append(row)
+                print(f"{row['mode']:<15} {mb:>6.0f} MB  {row['seconds']:>6.2f}s  {row['mb_per_s']:>7.1f} MB/s"
+                      f"  {row['peak_rss_mb']:>8.1f} MB RSS  {row['chars']:>11,} chars")
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
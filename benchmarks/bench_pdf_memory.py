@@ -0,0 +1,88 @@
+# -------------------------------------------------
+# Peak RSS of scanned-PDF extraction vs page count
+# -------------------------------------------------
+# Compares the old approach (convert_from_bytes renders every page into RAM,
+# then OCR) with pdf_pipeline.iter_pdf_pages. OCR is faked, so this measures
+# rendering/buffering memory only. Each run is a fresh subprocess so
+# ru_maxrss is not polluted by earlier runs. Requires poppler (pdftoppm).
+#
+#     python benchmarks/bench_pdf_memory.py --pages 10 50 100 --json out.json
+import os, sys, json, time, shutil, argparse, resource, subprocess, tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MODES = ("legacy", "streaming")
+
+
+def make_scanned_pdf(path: str, pages: int, label: str = "Field report") -> None:
+    """Image-only A4 pages at 150 dpi, so every page goes through OCR."""
+    from PIL import Image, ImageDraw
+
+    def page(i):
+        img = Image.new("RGB", (1240, 1754), "white")
+        draw = ImageDraw.Draw(img)
+        for y in range(100, 1650, 40):
+            draw.line((100, y, 1140, y), fill=(40, 40, 40), width=3)
+        draw.text((100, 40), f"{label} page {i + 1}", fill="black")
+        return img
+
+    first = page(0)
+    first.save(path, "PDF", resolution=150, save_all=True, append_images=(page(i) for i in range(1, pages)))
+
+
+def fake_ocr(jpeg: bytes) -> str:
+    return f"{len(jpeg)} bytes"
+
+
+def run_child(mode: str, pdf_path: str) -> dict:
+    with open(pdf_path, "rb") as fh:
+        data = fh.read()
+    start = time.perf_counter()
+    if mode == "legacy":
+        import pdf2image
+        from pdf_pipeline import page_to_jpeg
+        images = pdf2image.convert_from_bytes(data, dpi=200)
+        pages = [fake_ocr(page_to_jpeg(img)) for img in images]
+    else:
+        from pdf_pipeline import iter_pdf_pages
+        pages = [p.text for p in iter_pdf_pages(data, fake_ocr)]
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KiB on Linux
+    return {"mode": mode, "pages": len(pages), "seconds": round(time.perf_counter() - start, 2),
+            "peak_rss_mb": round(peak_kb / 1024, 1)}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Peak RSS of scanned-PDF extraction vs page count.")
+    parser.add_argument("--pages", type=int, nargs="+", default=[5, 20, 50])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--json", help="also write results to this file")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PDF"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_child(*args.child)))
+        return 0
+    if shutil.which("pdftoppm") is None:
+        print("poppler (pdftoppm) is not installed; nothing to measure.", file=sys.stderr)
+        return 1
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.pages:
+            pdf_path = os.path.join(tmp, f"scan-{n}.pdf")
+            make_scanned_pdf(pdf_path, n)
+            for mode in args.modes:
+                out = subprocess.run([sys.executable, __file__, "--child", mode, pdf_path],
+                                     capture_output=True, text=True, check=True)
+                row = json.loads(out.stdout.strip().splitlines()[-1])
+                results.append(row)
+                print(f"{row['mode']:<10} {row['pages']:>4} pages  {row['peak_rss_mb']:>8.1f} MB  {row['seconds']:>6.2f}s")
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,291 @@
+# -------------------------------------------------
+# Offline end-to-end benchmarks
+# -------------------------------------------------
+# Runs representative workloads through the real extract_text / ask_ai /
+# image analysis code with the Gemini models replaced by model_client.FakeModel
+# and gTTS by tts_service.StubBackend, so no network or API key is needed.
+# Each workload runs in its own subprocess with a fresh cache directory; every
+# iteration uses unique inputs, so the numbers are for the uncached path.
+#
+#     python benchmarks/bench_pipeline.py --profile realistic --iterations 20 --json run.json
+#     python benchmarks/bench_pipeline.py --compare run.json          # diff against an earlier run
+#
+# Reported per workload: throughput, latency p50/p95/max, model calls,
+# TTS calls, peak RSS, and the per-stage breakdown from metrics.summary().
+import os, io, sys, json, time, shutil, random, argparse, resource, subprocess, tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Latency/failure profiles for the fake model (seconds, probabilities).
+PROFILES = {
+    "fast":      {"latency": 0.01, "jitter": 0.0, "rate_limit_rate": 0.0, "failure_rate": 0.0, "chunk_delay": 0.0, "tts_latency": 0.0},
+    "realistic": {"latency": 0.6, "jitter": 0.8, "rate_limit_rate": 0.02, "failure_rate": 0.01, "chunk_delay": 0.02, "tts_latency": 0.3},
+    "flaky":     {"latency": 0.3, "jitter": 0.3, "rate_limit_rate": 0.15, "failure_rate": 0.05, "chunk_delay": 0.0, "tts_latency": 0.1},
+}
+
+WORDS = ("soil nitrogen yield irrigation pest blight fungicide harvest seedling rainfall potassium "
+         "wheat paddy tomato cotton mulch compost dosage hectare germination leaf rust aphid").split()
+
+
+# -------------------------------------------------
+# Inputs
+# -------------------------------------------------
+def prose(rng: random.Random, sentences: int) -> str:
+    return " ".join(
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 16))).capitalize() + "."
+        for _ in range(sentences)
+    )
+
+
+def make_text_pdf(pages: list[str]) -> bytes:
+    """Minimal PDF with a Helvetica text layer, one string of prose per page."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        lines = [text[i:i + 90] for i in range(0, len(text), 90)][:60]
+        ops = "BT /F1 10 Tf 40 800 Td 12 TL " + " ".join(
+            "({}) Tj T*".format(line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")) for line in lines
+        ) + " ET"
+        stream = ops.encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_no = len(objects)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_no)
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for no, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (no, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    out.write(b"".join(b"%010d 00000 n \n" % off for off in offsets))
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def make_docx(rng: random.Random) -> bytes:
+    import docx
+    doc = docx.Document()
+    doc.add_heading("Soil test report", 1)
+    for _ in range(40):
+        doc.add_paragraph(prose(rng, 4))
+    table = doc.add_table(rows=10, cols=3)
+    for row in table.rows:
+        for cell in row.cells:
+            cell.text = rng.choice(WORDS)
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+def make_photo(rng: random.Random, size=(3000, 2000)) -> bytes:
+    """A noisy green 'leaf photo' the size of a phone camera shot."""
+    import numpy as np
+    from PIL import Image
+    seed = rng.randrange(2 ** 32)
+    noise = np.random.default_rng(seed).integers(0, 60, (size[1] // 4, size[0] // 4, 3), dtype=np.uint8)
+    base = np.array([60, 140, 50], dtype=np.uint8) + noise
+    img = Image.fromarray(base.astype(np.uint8)).resize(size)
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=92)
+    return buf.getvalue()
+
+
+# -------------------------------------------------
+# Workloads (run inside the child process)
+# -------------------------------------------------
+def workload_text_pdf(core, rng, i):
+    from batch import NamedBytesIO
+    data = make_text_pdf([prose(rng, 30) for _ in range(12)])
+    text = core.extract_text(NamedBytesIO(data, f"report-{i}.pdf"))
+    core.ask_ai(text, mode="summary")
+
+
+def workload_scanned_pdf(core, rng, i):
+    from batch import NamedBytesIO
+    from bench_pdf_memory import make_scanned_pdf
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "scan.pdf")
+        make_scanned_pdf(path, 4, label=f"Scan {i} {rng.random():.6f}")
+        with open(path, "rb") as fh:
+            data = fh.read()
+    text = core.extract_text(NamedBytesIO(data, f"scan-{i}.pdf"))
+    core.ask_ai(text, mode="summary")
+
+
+def workload_docx(core, rng, i):
+    from batch import NamedBytesIO
+    text = core.extract_text(NamedBytesIO(make_docx(rng), f"soil-{i}.docx"))
+    core.ask_ai(text, mode="summary")
+
+
+def workload_image(core, rng, i):
+    from batch import NamedBytesIO
+    photo = make_photo(rng)
+    if core.analyze_image_combined(photo, "English") is None:
+        core.analyze_image_with_ai(photo, "English")
+        core.extract_text(NamedBytesIO(photo, f"leaf-{i}.jpg"))
+
+
+def workload_chat(core, rng, i):
+    text = prose(rng, 400)
+    summary = core.ask_ai(text, mode="summary")
+    for turn in range(5):
+        question = f"What about {rng.choice(WORDS)} and {rng.choice(WORDS)}? ({i}.{turn})"
+        "".join(core.ask_ai(text, question, "chat", stream=True, summary=summary))
+
+
+def workload_advisory(core, rng, i):
+    # Every session opens the same advisory at once; identical in-flight calls share one upstream call.
+    core.ask_ai(prose(random.Random(7), 200), mode="summary")
+
+
+def workload_tts(core, rng, i):
+    core.request_tts(prose(rng, 12), "English").result()
+
+
+WORKLOADS = {
+    "text_pdf": workload_text_pdf,
+    "scanned_pdf": workload_scanned_pdf,
+    "docx": workload_docx,
+    "image": workload_image,
+    "chat": workload_chat,
+    "advisory": workload_advisory,
+    "tts": workload_tts,
+}
+NEEDS_POPPLER = {"scanned_pdf"}
+
+
+def percentile(samples: list[float], q: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q * len(samples)))] if samples else 0.0
+
+
+def run_child(name: str, profile: dict, iterations: int, concurrency: int, seed: int) -> dict:
+    # Everything the core reads at import time must be set before importing it.
+    os.environ.update(CROPCARE_MODEL_BACKEND="fake", CROPCARE_TTS_BACKEND="stub",
+                      CROPCARE_CACHE_DIR=tempfile.mkdtemp(prefix="cropcare-bench-"))
+    os.environ.setdefault("CROPCARE_MODEL_RPS", "1000")
+    os.environ.setdefault("CROPCARE_MODEL_BURST", "1000")
+    import warnings
+    warnings.filterwarnings("ignore")
+    import cropcare_core as core
+    import metrics
+    from model_client import FakeModel
+    from tts_service import StubBackend
+
+    fake = {k: profile[k] for k in ("latency", "jitter", "rate_limit_rate", "failure_rate", "chunk_delay")}
+    core.model.model = FakeModel(seed=seed, **fake)
+    core.vision_model.model = FakeModel(seed=seed + 1, **fake)
+    tts = core.get_tts_service()
+    tts.backend = StubBackend(latency=profile["tts_latency"])
+
+    fn = WORKLOADS[name]
+    latencies, errors = [], []
+
+    def one(i: int) -> None:
+        start = time.perf_counter()
+        try:
+            fn(core, random.Random(seed * 100003 + i), i)
+        except Exception as e:
+            errors.append(repr(e))
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        list(pool.map(one, range(iterations)))
+    elapsed = time.perf_counter() - start
+    shutil.rmtree(os.environ["CROPCARE_CACHE_DIR"], ignore_errors=True)
+    return {
+        "workload": name,
+        "iterations": iterations,
+        "errors": len(errors),
+        "error_samples": errors[:3],
+        "seconds": round(elapsed, 3),
+        "throughput_per_s": round(iterations / elapsed, 3) if elapsed else 0.0,
+        "p50_s": round(percentile(latencies, 0.50), 4),
+        "p95_s": round(percentile(latencies, 0.95), 4),
+        "max_s": round(max(latencies, default=0.0), 4),
+        "model_calls": core.model.model.calls + core.vision_model.model.calls,
+        "model_retries": core.model.stats["retries"] + core.vision_model.stats["retries"],
+        "tts_calls": len(tts.backend.calls),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "stages": metrics.summary(),
+    }
+
+
+# -------------------------------------------------
+# Driver
+# -------------------------------------------------
+COLUMNS = ("throughput_per_s", "p50_s", "p95_s", "model_calls", "peak_rss_mb")
+
+
+def print_table(rows: list[dict], baseline: dict[str, dict] | None = None) -> None:
+    print(f"{'workload':<12} {'ops/s':>8} {'p50 s':>8} {'p95 s':>8} {'calls':>6} {'RSS MB':>8} {'errors':>6}")
+    for r in rows:
+        if r.get("skipped"):
+            print(f"{r['workload']:<12} skipped: {r['skipped']}")
+            continue
+        print(f"{r['workload']:<12} {r['throughput_per_s']:>8.2f} {r['p50_s']:>8.3f} {r['p95_s']:>8.3f} "
+              f"{r['model_calls']:>6} {r['peak_rss_mb']:>8.1f} {r['errors']:>6}")
+        old = (baseline or {}).get(r["workload"])
+        if old and not old.get("skipped"):
+            deltas = "  ".join(
+                f"{col} {100 * (r[col] - old[col]) / old[col]:+.1f}%" for col in COLUMNS if old.get(col)
+            )
+            print(f"{'':<12} vs baseline: {deltas}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline CropCare pipeline benchmarks (fake model and TTS).")
+    parser.add_argument("--workloads", nargs="+", choices=list(WORKLOADS), default=list(WORKLOADS))
+    parser.add_argument("--profile", choices=list(PROFILES), default="fast")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="earlier --json output to diff against")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    profile = PROFILES[args.profile]
+    if args.child:
+        print(json.dumps(run_child(args.child, profile, args.iterations, args.concurrency, args.seed)))
+        return 0
+
+    rows = []
+    for name in args.workloads:
+        if name in NEEDS_POPPLER and shutil.which("pdftoppm") is None:
+            rows.append({"workload": name, "skipped": "poppler (pdftoppm) not installed"})
+            continue
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", name, "--profile", args.profile, "--iterations", str(args.iterations),
+             "--concurrency", str(args.concurrency), "--seed", str(args.seed)],
+            capture_output=True, text=True,
+        )
+        if out.returncode != 0:
+            rows.append({"workload": name, "skipped": f"crashed: {out.stderr.strip().splitlines()[-1:]}"})
+            continue
+        rows.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = {r["workload"]: r for r in json.load(fh)["results"]}
+    print(f"profile={args.profile} iterations={args.iterations} concurrency={args.concurrency}")
+    print_table(rows, baseline)
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump({"profile": args.profile, "config": PROFILES[args.profile], "iterations": args.iterations,
+                       "concurrency": args.concurrency, "created": time.time(), "results": rows}, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
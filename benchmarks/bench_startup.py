@@ -0,0 +1,70 @@
+# -------------------------------------------------
+# App cold-start and per-rerun time
+# -------------------------------------------------
+# Each sample is a fresh interpreter running the Streamlit script headless
+# (streamlit.testing AppTest) on the language-selection screen:
+#   cold_s   - first run: imports + module-level setup + first render
+#   rerun_s  - median of the following reruns (what every click costs)
+# plus which heavy optional modules were imported by then.
+#
+#     python benchmarks/bench_startup.py --samples 5 --json startup.json
+import os, sys, json, time, argparse, statistics, subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("google.generativeai", "PyPDF2", "docx", "gtts", "langdetect", "pdf2image", "numpy", "PIL")
+
+CHILD = """
+import os, sys, time, json, warnings
+warnings.filterwarnings("ignore")
+sys.path.insert(0, {root!r})
+os.chdir({root!r})
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+framework = time.perf_counter() - start
+at = AppTest.from_file("CropCare.py", default_timeout=60)
+start = time.perf_counter()
+at.run()
+cold = time.perf_counter() - start
+reruns = []
+for _ in range({reruns}):
+    start = time.perf_counter()
+    at.run()
+    reruns.append(time.perf_counter() - start)
+print(json.dumps({{"framework_s": framework, "cold_s": cold, "reruns": reruns,
+                  "loaded": [m for m in {heavy!r} if m in sys.modules], "exception": bool(at.exception)}}))
+"""
+
+
+def sample(reruns: int) -> dict:
+    env = dict(os.environ, CROPCARE_MODEL_BACKEND=os.getenv("CROPCARE_MODEL_BACKEND", "fake"))
+    code = CHILD.format(root=ROOT, reruns=reruns, heavy=HEAVY_MODULES)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure CropCare cold start and rerun time.")
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--reruns", type=int, default=10)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args(argv)
+
+    runs = [sample(args.reruns) for _ in range(args.samples)]
+    result = {
+        "samples": args.samples,
+        "cold_s": round(statistics.median(r["cold_s"] for r in runs), 3),
+        "rerun_s": round(statistics.median(t for r in runs for t in r["reruns"]), 4),
+        "loaded_on_first_screen": runs[-1]["loaded"],
+        "errors": sum(r["exception"] for r in runs),
+        "measured": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    print(f"cold start {result['cold_s']:.3f}s   rerun {result['rerun_s'] * 1000:.1f}ms")
+    print(f"heavy modules loaded on the language screen: {', '.join(result['loaded_on_first_screen']) or 'none'}")
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(result, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
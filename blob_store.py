@@ -0,0 +1,148 @@
+# -------------------------------------------------
+# CropCare - server-side content-addressed blob store
+# -------------------------------------------------
+# Large per-session artifacts (extracted text, summaries, uploaded files,
+# batch reports) are written once to disk under their SHA-256 and sessions
+# keep only that reference, so a session's memory no longer grows with the
+# size of its document and identical content across sessions is stored once.
+# A bounded process-wide LRU keeps hot blobs in memory.
+#
+# References are counted per owner (a browser session). Owners touch the
+# store while active; `sweep` drops the references of owners idle longer
+# than `idle_ttl` and deletes blobs nobody references any more (after a
+# `grace` period, so unowned blobs written for API clients live that long).
+import os, re, time, sqlite3, threading
+from collections import OrderedDict
+
+from result_cache import DEFAULT_CACHE_DIR, content_hash
+
+SESSION_IDLE_TTL = float(os.getenv("CROPCARE_SESSION_IDLE_HOURS", "6")) * 3600
+BLOB_GRACE = 24 * 3600
+MEMORY_BYTES = 64 * 1024 * 1024
+SWEEP_EVERY = 600.0
+REF_RE = re.compile(r"[0-9a-f]{64}")
+
+
+class BlobStore:
+    def __init__(self, root: str | None = None, idle_ttl: float = SESSION_IDLE_TTL, grace: float = BLOB_GRACE,
+                 memory_bytes: int = MEMORY_BYTES):
+        self.root = root or os.path.join(DEFAULT_CACHE_DIR, "blobs")
+        os.makedirs(self.root, exist_ok=True)
+        self.idle_ttl = idle_ttl
+        self.grace = grace
+        self.memory_bytes = memory_bytes
+        self._mem: OrderedDict[str, bytes] = OrderedDict()
+        self._mem_size = 0
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+        self.stats = {"puts": 0, "memory_hits": 0, "disk_reads": 0, "deleted": 0}
+        self._db = sqlite3.connect(os.path.join(self.root, "refs.sqlite"), check_same_thread=False, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS blobs (ref TEXT PRIMARY KEY, size INTEGER NOT NULL, created REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS refs (owner TEXT NOT NULL, ref TEXT NOT NULL, PRIMARY KEY (owner, ref));"
+            "CREATE TABLE IF NOT EXISTS owners (owner TEXT PRIMARY KEY, seen REAL NOT NULL);"
+        )
+        self._db.commit()
+
+    def _path(self, ref: str) -> str:
+        return os.path.join(self.root, ref[:2], ref)
+
+    # -- read / write ---------------------------------------------------
+    def put(self, data: bytes, owner: str | None = None) -> str:
+        """Store `data` (once per content) and return its reference."""
+        ref = content_hash(data)
+        path = self._path(ref)
+        with self._lock:
+            self.stats["puts"] += 1
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp, "wb") as fh:
+                    fh.write(data)
+                os.replace(tmp, path)
+            # Re-putting restarts the grace period, so an unowned ref just handed out survives the next sweep.
+            self._db.execute("INSERT INTO blobs (ref, size, created) VALUES (?, ?, ?)"
+                             " ON CONFLICT (ref) DO UPDATE SET created = excluded.created", (ref, len(data), time.time()))
+            if owner:
+                self._db.execute("INSERT OR IGNORE INTO refs (owner, ref) VALUES (?, ?)", (owner, ref))
+            self._db.commit()
+            self._remember(ref, data)
+        return ref
+
+    def put_text(self, text: str, owner: str | None = None) -> str:
+        return self.put(text.encode("utf-8"), owner)
+
+    def get(self, ref: str) -> bytes | None:
+        if not ref or not REF_RE.fullmatch(ref):
+            return None  # refs may come from API clients; never let one become a path
+        with self._lock:
+            data = self._mem.get(ref)
+            if data is not None:
+                self._mem.move_to_end(ref)
+                self.stats["memory_hits"] += 1
+                return data
+        try:
+            with open(self._path(ref), "rb") as fh:
+                data = fh.read()
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self.stats["disk_reads"] += 1
+            self._remember(ref, data)
+        return data
+
+    def get_text(self, ref: str) -> str | None:
+        data = self.get(ref)
+        return data.decode("utf-8") if data is not None else None
+
+    def _remember(self, ref: str, data: bytes) -> None:
+        if len(data) > self.memory_bytes // 4:
+            return  # huge blobs are cheaper to re-read than to pin
+        if ref not in self._mem:
+            self._mem_size += len(data)
+        self._mem[ref] = data
+        self._mem.move_to_end(ref)
+        while self._mem_size > self.memory_bytes and self._mem:
+            _, old = self._mem.popitem(last=False)
+            self._mem_size -= len(old)
+
+    # -- references -----------------------------------------------------
+    def touch(self, owner: str) -> None:
+        """Mark `owner` as active; occasionally sweeps idle owners as a side effect."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO owners (owner, seen) VALUES (?, ?)", (owner, now))
+            self._db.commit()
+        if now - self._last_sweep > SWEEP_EVERY:
+            self.sweep(now)
+
+    def release(self, owner: str) -> None:
+        """Drop every reference held by `owner` (e.g. the session started over)."""
+        with self._lock:
+            self._db.execute("DELETE FROM refs WHERE owner = ?", (owner,))
+            self._db.commit()
+
+    def sweep(self, now: float | None = None) -> int:
+        """Expire idle owners and delete unreferenced blobs past the grace period. Returns blobs deleted."""
+        now = now or time.time()
+        with self._lock:
+            self._last_sweep = now
+            idle = [r[0] for r in self._db.execute("SELECT owner FROM owners WHERE seen < ?", (now - self.idle_ttl,))]
+            for owner in idle:
+                self._db.execute("DELETE FROM refs WHERE owner = ?", (owner,))
+                self._db.execute("DELETE FROM owners WHERE owner = ?", (owner,))
+            orphans = [r[0] for r in self._db.execute(
+                "SELECT ref FROM blobs WHERE created < ? AND ref NOT IN (SELECT ref FROM refs)", (now - self.grace,))]
+            for ref in orphans:
+                try:
+                    os.remove(self._path(ref))
+                except FileNotFoundError:
+                    pass
+                self._db.execute("DELETE FROM blobs WHERE ref = ?", (ref,))
+                old = self._mem.pop(ref, None)
+                if old is not None:
+                    self._mem_size -= len(old)
+            self._db.commit()
+            self.stats["deleted"] += len(orphans)
+        return len(orphans)
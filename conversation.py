@@ -0,0 +1,83 @@
+# -------------------------------------------------
+# CropCare - token-budgeted conversation context
+# -------------------------------------------------
+# A Conversation keeps the last few messages verbatim and folds anything
+# older into a rolling summary, one incremental model call at a time (the
+# previous summary plus the messages being dropped, never the whole
+# transcript). `context_budget` splits a prompt's token budget between the
+# fixed parts, the conversation and the document excerpts, so every request
+# stays under CONTEXT_TOKENS however long the session runs.
+import os
+
+from summarizer import estimate_tokens
+
+CONTEXT_TOKENS = int(os.getenv("CROPCARE_CONTEXT_TOKENS", "6000"))  # whole prompt, per request
+HISTORY_TOKENS = 1500   # verbatim turns + rolling summary
+KEEP_RECENT = 6         # messages (3 exchanges) always kept verbatim when they fit; up to twice that between compactions
+MAX_MESSAGE_CHARS = 4000
+
+
+class Conversation:
+    """Chat history with older turns compressed into a rolling summary."""
+
+    def __init__(self, messages: list[dict] | None = None, summary: str = "", keep_recent: int = KEEP_RECENT,
+                 history_tokens: int = HISTORY_TOKENS):
+        self.messages: list[dict] = list(messages or [])
+        self.summary = summary
+        self.keep_recent = keep_recent
+        self.history_tokens = history_tokens
+
+    def add(self, role: str, content: str) -> None:
+        self.messages.append({"role": role, "content": content})
+
+    def tokens(self) -> int:
+        return estimate_tokens(self.summary) + sum(estimate_tokens(m["content"]) for m in self.messages)
+
+    def needs_compaction(self) -> bool:
+        # Hysteresis: let the verbatim part grow to twice keep_recent before folding it back
+        # down to keep_recent, so the summary call happens every few turns, not every turn.
+        return len(self.messages) > 2 * self.keep_recent or (len(self.messages) > 2 and self.tokens() > self.history_tokens)
+
+    def compact(self, summarize) -> bool:
+        """Fold the oldest messages into the summary, down to keep_recent messages within budget.
+
+        `summarize(previous_summary, messages) -> str` is one model call; it is
+        made at most once per compaction. Returns True if anything was folded.
+        """
+        if not self.needs_compaction():
+            return False
+        drop = max(len(self.messages) - self.keep_recent, 0)
+        # Also drop whole exchanges while the verbatim part alone is over budget (keep the latest one).
+        while drop < len(self.messages) - 2 and sum(
+                estimate_tokens(m["content"]) for m in self.messages[drop:]) > self.history_tokens // 2:
+            drop += 2
+        drop += drop % 2  # user/assistant pairs stay together
+        if not drop:
+            return False
+        # Summarize first: if the call fails the messages are still there for next time.
+        self.summary = summarize(self.summary, self.messages[:drop]).strip()
+        self.messages = self.messages[drop:]
+        return True
+
+    def render(self) -> str:
+        """Conversation block for a prompt ("" for a fresh conversation)."""
+        parts = []
+        if self.summary:
+            parts.append(f"Earlier in this conversation (summary):\n{self.summary}")
+        if self.messages:
+            parts.append("Recent messages:\n" + "\n".join(
+                f"{m['role'].capitalize()}: {m['content'][:MAX_MESSAGE_CHARS]}" for m in self.messages))
+        return "\n".join(parts)
+
+    def to_dict(self) -> dict:
+        return {"messages": self.messages, "summary": self.summary}
+
+    @classmethod
+    def from_dict(cls, data: dict | None) -> "Conversation":
+        data = data or {}
+        return cls(data.get("messages"), data.get("summary", ""))
+
+
+def context_budget(fixed: str, conversation: str, total: int = CONTEXT_TOKENS) -> int:
+    """Tokens left for document excerpts once the fixed prompt and conversation are in."""
+    return max(total - estimate_tokens(fixed) - estimate_tokens(conversation), 0)
@@ -0,0 +1,701 @@
+# -------------------------------------------------
+# CropCare core pipeline (no Streamlit)
+# -------------------------------------------------
+# Everything needed to extract, analyze and answer lives here so it can be
+# imported by the Streamlit app (CropCare.py), the HTTP service
+# (api_server.py) and the batch CLI (batch.py) alike. Nothing in this module
+# touches the page; progress and problems go through a Reporter.
+import os, re, json, base64, logging, threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+load_dotenv()
+
+from result_cache import ResultCache, make_key, content_hash
+from answer_cache import AnswerCache
+from blob_store import BlobStore
+from image_index import ImageIndex, image_hashes
+from image_triage import TriageResult, triage_many
+from doc_index import DocIndex
+from summarizer import condense_document
+from conversation import Conversation, context_budget
+from tts_service import TTSService
+from image_prep import prepare_image
+from pdf_pipeline import iter_pdf_pages, join_pages
+from doc_extract import EXTRACT_VERSION, docx_to_text, decode_text
+from model_client import get_client, VISION_HEDGE_AFTER
+from metrics import span, timed, count, REGISTRY
+
+log = logging.getLogger("cropcare")
+
+# -------------------------------------------------
+# API / Models
+# -------------------------------------------------
+API_KEY = os.getenv("GEMINI_API_KEY", "")
+MODEL_NAME = "gemini-2.5-flash-lite"
+
+def _gemini_model():
+    # The SDK takes about a second to import, so it is loaded on the first model call instead of at startup.
+    import google.generativeai as genai
+    genai.configure(api_key=API_KEY)
+    return genai.GenerativeModel(MODEL_NAME)
+
+# Shared per process: deadlines, retries with backoff, rate limiting and circuit breaking live in model_client.
+model = get_client("text", _gemini_model)
+vision_model = get_client("vision", _gemini_model, hedge_after=VISION_HEDGE_AFTER)
+# Bump whenever a prompt below changes so stale cached answers are not reused.
+PROMPT_VERSION = "3"
+# Diagnose and OCR an uploaded photo with one structured vision call instead of two.
+COMBINED_IMAGE_ANALYSIS = os.getenv("CROPCARE_COMBINED_IMAGE", "1") != "0"
+
+# -------------------------------------------------
+# Languages
+# -------------------------------------------------
+LANGUAGES = {
+    "English": "🇺🇸",
+    "हिंदी": "🇮🇳",
+    "తెలుగు": "🇮🇳",
+    "മലയാളം": "🇮🇳"
+}
+
+LANG_CODE_MAP_TTS = {
+    "English": "en", "हिंदी": "hi", "తెలుగు": "te", "മലയാളം": "ml"
+}
+
+def pick_tts_code(lang_name: str) -> str:
+    return LANG_CODE_MAP_TTS.get(lang_name, "en")
+
+# -------------------------------------------------
+# Shared resources (one per process)
+# -------------------------------------------------
+_resources: dict[str, object] = {}
+_resources_lock = threading.Lock()
+
+def _shared(name: str, factory):
+    with _resources_lock:
+        if name not in _resources:
+            _resources[name] = factory()
+        return _resources[name]
+
+def get_result_cache() -> ResultCache:
+    return _shared("result_cache", ResultCache)
+
+def get_tts_service() -> TTSService:
+    return _shared("tts_service", TTSService)
+
+def get_answer_cache() -> AnswerCache:
+    return _shared("answer_cache", lambda: AnswerCache(namespace=f"{MODEL_NAME}:{PROMPT_VERSION}"))
+
+def get_blob_store() -> BlobStore:
+    return _shared("blob_store", BlobStore)
+
+def get_image_index() -> ImageIndex:
+    return _shared("image_index", lambda: ImageIndex(namespace=f"{MODEL_NAME}:{PROMPT_VERSION}"))
+
+def get_background_pool() -> ThreadPoolExecutor:
+    """Threads for UI work that overlaps a streamed response (e.g. OCR while a diagnosis streams)."""
+    return _shared("background_pool", lambda: ThreadPoolExecutor(max_workers=4, thread_name_prefix="cropcare-bg"))
+
+def _cache_gauges() -> dict[str, float]:
+    cache, answers, blobs, images = get_result_cache(), get_answer_cache(), get_blob_store(), get_image_index()
+    return ({f"result_cache_{k}": v for k, v in cache.stats.items()} | {"result_cache_hit_rate": cache.hit_rate()}
+            | {f"answer_cache_{k}": v for k, v in answers.stats.items()}
+            | {f"blob_store_{k}": v for k, v in blobs.stats.items()}
+            | {f"image_index_{k}": v for k, v in images.stats.items()})
+
+REGISTRY.register_collector(_cache_gauges)
+
+# -------------------------------------------------
+# Progress / problem reporting
+# -------------------------------------------------
+class Reporter:
+    """Receives progress and problems from long-running extraction. The default only logs."""
+
+    def progress(self, fraction: float, text: str = "") -> None:
+        pass
+
+    def warning(self, message: str) -> None:
+        log.warning(message)
+
+    def error(self, message: str) -> None:
+        log.error(message)
+
+    def done(self) -> None:
+        pass
+
+NULL_REPORTER = Reporter()
+
+# -------------------------------------------------
+# AI Helpers
+# -------------------------------------------------
+def stream_response(model_obj, contents, cache: ResultCache, key: str, error_prefix: str | None = None,
+                    stage: str = "stream", on_complete=None, **kwargs):
+    """Yield text chunks from a streaming generate_content call and cache the full text at the end.
+    `on_complete(text)` is called once the stream has finished successfully."""
+    parts = []
+    with span(stage):
+        try:
+            for chunk in model_obj.generate_content(contents, stream=True, **kwargs):
+                try:
+                    text = chunk.text
+                except ValueError:  # chunk without text parts (e.g. safety block)
+                    continue
+                if text:
+                    parts.append(text)
+                    yield text
+        except Exception as e:
+            if error_prefix is None:
+                raise
+            yield f"{error_prefix}: {str(e)}"
+            return
+    cache.set(key, "".join(parts))
+    if on_complete and parts:
+        on_complete("".join(parts))
+
+_TRIAGE_LRU_SIZE = 256
+_triage: OrderedDict[str, TriageResult] = OrderedDict()
+
+@timed("image.triage")
+def triage_images(images: list[bytes]) -> list[TriageResult]:
+    """Local quality and scene screen, cached per image. Callers should ask for a retake instead of
+    analyzing photos that are not `usable`; usable ones get `prior()` added to their vision prompt."""
+    keys = [content_hash(data) for data in images]
+    with _resources_lock:
+        found = {k: _triage[k] for k in keys if k in _triage}
+    missing = {k: data for k, data in zip(keys, images) if k not in found}
+    if missing:
+        for k, result in zip(missing, triage_many(list(missing.values()))):
+            found[k] = result
+            if not result.usable:
+                count("image.triage", f"rejected_{result.reason}")
+        with _resources_lock:
+            for k in missing:
+                _triage[k] = found[k]
+            while len(_triage) > _TRIAGE_LRU_SIZE:
+                _triage.popitem(last=False)
+    return [found[k] for k in keys]
+
+def triage_image(image_bytes: bytes) -> TriageResult:
+    return triage_images([image_bytes])[0]
+
+def detect_language(text: str) -> str | None:
+    """ISO code of the language `text` is written in (e.g. "te"), or None if it cannot be told."""
+    from langdetect import DetectorFactory, LangDetectException, detect  # ~0.3 s to load its profiles
+    DetectorFactory.seed = 0  # deterministic results
+    try:
+        return detect(text[:2000])
+    except LangDetectException:
+        return None
+
+@timed("translate", stream_arg="stream")
+def translate_text(text: str, language: str, stream: bool = False):
+    """Translate generated advice into `language` (one text-model call, cached).
+    With `stream`, returns an iterator of chunks."""
+    cache = get_result_cache()
+    key = make_key(text, language=language, mode="translate", prompt_version=PROMPT_VERSION, model=MODEL_NAME)
+    cached = cache.get(key)
+    if cached is not None:
+        count("translate", "cache_hits")
+        return iter([cached]) if stream else cached
+    prompt = f"""Translate the following agricultural advice into {language}.
+Keep headings, lists, numbers, product names and units. Output only the translation.
+
+{text}"""
+    generation_config = {"temperature": 0.2}
+    if stream:
+        return stream_response(model, prompt, cache, key, stage="stream.translate", generation_config=generation_config)
+    response = model.generate_content(prompt, generation_config=generation_config)
+    cache.set(key, response.text)
+    return response.text
+
+def similar_image_result(hashes: tuple[int, int] | None, language: str, need_text: bool = False) -> tuple[str, str | None] | None:
+    """(diagnosis, extracted text) of a near-identical photo analyzed before, translated if it was
+    only diagnosed in another language. A text call is far cheaper than a new vision call."""
+    found = get_image_index().lookup(hashes)
+    if found is None:
+        return None
+    results, entry_id = found
+    if language in results and (results[language][1] is not None or not need_text):
+        return results[language]
+    usable = [r for r in results.values() if r[1] is not None] if need_text else list(results.values())
+    if not usable:
+        return None
+    diagnosis, text = usable[0]
+    try:
+        diagnosis = translate_text(diagnosis, language)
+    except Exception as e:
+        log.warning("Could not translate a stored diagnosis: %s", e)
+        return None
+    get_image_index().add(hashes, language, diagnosis, text, entry_id=entry_id)
+    return diagnosis, text
+
+@timed("analyze_image", stream_arg="stream")
+def analyze_image_with_ai(image_bytes: bytes, language: str, query: str | None = None, stream: bool = False):
+    cache = get_result_cache()
+    key = make_key(image_bytes, language=language, mode="image", prompt_version=PROMPT_VERSION, model=MODEL_NAME, extra=query or "")
+    cached = cache.get(key)
+    if cached is not None:
+        count("analyze_image", "cache_hits")
+        return iter([cached]) if stream else cached
+
+    # Same leaf, different bytes (recompressed, resized, re-cropped): reuse the earlier diagnosis.
+    hashes = image_hashes(image_bytes) if not query else None
+    similar = similar_image_result(hashes, language) if hashes else None
+    if similar is not None:
+        count("analyze_image", "similar_hits")
+        cache.set(key, similar[0])
+        return iter([similar[0]]) if stream else similar[0]
+    remember = (lambda text: get_image_index().add(hashes, language, text)) if hashes else None
+
+    prepared = prepare_image(image_bytes, task="diagnosis")
+    image_part = {"mime_type": prepared.mime_type, "data": base64.b64encode(prepared.data).decode('utf-8')}
+    prompt = f"You are CropCare. Analyze this agricultural image in {language}: identification, problems, solutions, and prevention."
+    if prior := triage_image(image_bytes).prior():
+        prompt += f"\n{prior}"
+    if stream:
+        return stream_response(vision_model, [prompt, image_part], cache, key, error_prefix="Error analyzing image",
+                               stage="stream.image", on_complete=remember)
+    try:
+        # Pass both prompt and image to the vision model
+        response = vision_model.generate_content([prompt, image_part])
+        cache.set(key, response.text)
+        if remember:
+            remember(response.text)
+        return response.text
+    except Exception as e:
+        return f"Error analyzing image: {str(e)}"
+
+IMAGE_ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "diagnosis": {"type": "string"},
+        "extracted_text": {"type": "string"},
+    },
+    "required": ["diagnosis", "extracted_text"],
+}
+
+def parse_image_analysis(raw: str) -> tuple[str, str] | None:
+    try:
+        data = json.loads(raw.strip().removeprefix("```json").removesuffix("```").strip())
+        diagnosis = data["diagnosis"].strip()
+        return (diagnosis, data.get("extracted_text", "").strip()) if diagnosis else None
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+@timed("analyze_image_combined")
+def analyze_image_combined(image_bytes: bytes, language: str) -> tuple[str, str] | None:
+    """One vision call returning (diagnosis, extracted text); None means use the two-call path."""
+    cache = get_result_cache()
+    key = make_key(image_bytes, language=language, mode="image-combined", prompt_version=PROMPT_VERSION, model=MODEL_NAME)
+    cached = cache.get(key)
+    if cached is not None and (parsed := parse_image_analysis(cached)):
+        count("analyze_image_combined", "cache_hits")
+        return parsed
+
+    hashes = image_hashes(image_bytes)
+    similar = similar_image_result(hashes, language, need_text=True)
+    if similar is not None:
+        count("analyze_image_combined", "similar_hits")
+        return similar
+
+    prepared = prepare_image(image_bytes, task="ocr")
+    image_part = {"mime_type": prepared.mime_type, "data": base64.b64encode(prepared.data).decode('utf-8')}
+    prompt = f"""You are CropCare. For this agricultural image return JSON with two fields:
+- "diagnosis": analysis in {language}: identification, problems, solutions, and prevention.
+- "extracted_text": all text visible in the image, verbatim, or "" if there is none."""
+    if prior := triage_image(image_bytes).prior():
+        prompt += f"\n{prior}"
+    try:
+        response = vision_model.generate_content(
+            [prompt, image_part],
+            generation_config={"response_mime_type": "application/json", "response_schema": IMAGE_ANALYSIS_SCHEMA},
+        )
+        parsed = parse_image_analysis(response.text)
+    except Exception:
+        return None
+    if parsed is None:
+        return None
+    cache.set(key, response.text)
+    get_image_index().add(hashes, language, parsed[0], parsed[1])
+    # Seed the single-purpose entries so the two-call path and re-extraction reuse this answer.
+    cache.set(make_key(image_bytes, language=language, mode="image", prompt_version=PROMPT_VERSION, model=MODEL_NAME), parsed[0])
+    cache.set(make_key(image_bytes, mode="ocr", prompt_version=PROMPT_VERSION, model=MODEL_NAME), parsed[1])
+    return parsed
+
+def get_sector_prompt(mode: str = "summary") -> str:
+    prompts = {
+        "summary": "You are CropCare 🌾, an agricultural document explainer. ONLY analyze agricultural documents.",
+        "chat": "You are CropCare 🌾, an agricultural assistant. ONLY answer agriculture questions.",
+        "general": "You are CropCare 🌾, an agricultural guide. ONLY provide farming information."
+    }
+    return prompts.get(mode, prompts["summary"])
+
+CHAT_TOP_K = 4
+CHAT_SUMMARY_CHARS = 1500
+_INDEX_LRU_SIZE = 32
+_indexes: OrderedDict[str, DocIndex] = OrderedDict()
+
+def index_for(text: str) -> DocIndex:
+    """Process-wide LRU of retrieval indexes, shared by all sessions and API clients."""
+    h = content_hash(text)
+    with _resources_lock:
+        idx = _indexes.get(h)
+        if idx is not None:
+            _indexes.move_to_end(h)
+            return idx
+    idx = DocIndex(text)
+    with _resources_lock:
+        _indexes[h] = idx
+        while len(_indexes) > _INDEX_LRU_SIZE:
+            _indexes.popitem(last=False)
+    return idx
+
+def summarize_chunk(chunk: str, language: str) -> str:
+    """Map step of the long-document summary: condensed notes for one chunk."""
+    prompt = f"""{get_sector_prompt("summary")}
+Write concise notes in {language} on this part of a larger document.
+Keep every figure, date, dosage, crop, pest and disease that is mentioned.
+Document part:
+{chunk}
+"""
+    response = model.generate_content(prompt, generation_config={"temperature": 0.3, "max_output_tokens": 800})
+    return response.text
+
+@timed("ask_ai", stream_arg="stream")
+def ask_ai(document_text: str = "", query: str | None = None, mode: str = "summary", image_bytes: bytes | None = None,
+           stream: bool = False, language: str = "English", summary: str = "", doc_index: DocIndex | None = None,
+           conversation: Conversation | None = None):
+    """Returns the answer text, or an iterator of text chunks when `stream` is True.
+
+    In chat/general mode `conversation` (earlier turns) is included in the prompt, and the
+    document excerpts get whatever is left of the CONTEXT_TOKENS budget.
+    """
+    if image_bytes:
+        return analyze_image_with_ai(image_bytes, language, query, stream=stream)
+
+    history = conversation.render() if conversation is not None and mode != "summary" else ""
+    cache = get_result_cache()
+    key = make_key(document_text if mode != "general" else "", language=language, mode=mode,
+                   prompt_version=PROMPT_VERSION, model=MODEL_NAME, extra=f"{query or ''}\x1f{history}" if history else query or "")
+    cached = cache.get(key)
+    if cached is not None:
+        count("ask_ai", "cache_hits")
+        return iter([cached]) if stream else cached
+    # Opening general questions repeat a lot across farmers; near-duplicates share one answer.
+    # Follow-ups depend on the conversation, so they always go to the model.
+    answers = get_answer_cache() if mode == "general" and not history and query else None
+    if answers is not None:
+        hit = answers.lookup(query, language)
+        if hit is not None:
+            count("ask_ai", "answer_cache_hits")
+            return iter([hit]) if stream else hit
+
+    sector_restriction = "CRITICAL: Provide only agriculture-related information."
+    lang_clause = f"Respond ONLY in {language}."
+    base_prompt = get_sector_prompt(mode)
+
+    if mode == "summary":
+        # Long documents are condensed chunk-by-chunk first (map), then summarized as a whole (reduce).
+        doc_for_prompt, condensed = condense_document(
+            document_text, lambda chunk: summarize_chunk(chunk, language),
+            cache=cache, language=language, prompt_version=PROMPT_VERSION, model=MODEL_NAME,
+        )
+        doc_label = "Section notes condensed from a long document" if condensed else "Document"
+        prompt = f"""{base_prompt}
+{lang_clause}
+{sector_restriction}
+Analyze this document in {language}:
+- Summary, Key findings, Important recommendations, and Risks
+{doc_label}:
+{doc_for_prompt}
+"""
+    elif mode == "chat":
+        # Only the chunks relevant to this question (plus a short summary) are sent, not the whole document,
+        # and only as many as fit next to the conversation.
+        idx = doc_index if doc_index is not None and doc_index.doc_hash == content_hash(document_text) else index_for(document_text)
+        running_summary = (summary or "")[:CHAT_SUMMARY_CHARS]
+        head = f"""{base_prompt}
+{lang_clause}
+{sector_restriction}
+Document summary:
+{running_summary}
+"""
+        budget = context_budget(head + (query or ""), history)
+        excerpts = "\n---\n".join(idx.search(query or "", k=CHAT_TOP_K, max_tokens=budget))
+        prompt = f"""{head}Relevant document excerpts:
+{excerpts}
+{history}
+User question: {query}
+"""
+    else: # general mode
+        prompt = f"""{base_prompt}
+{lang_clause}
+{sector_restriction}
+{history}
+User question: {query}
+"""
+    # For text-only tasks, we can use the 'model' object
+    generation_config = {"temperature": 0.7, "max_output_tokens": 1500}
+    remember = (lambda text: answers.put(query, language, text)) if answers is not None else None
+    if stream:
+        return stream_response(model, prompt, cache, key, stage=f"stream.{mode}", on_complete=remember,
+                               generation_config=generation_config)
+    response = model.generate_content(prompt, generation_config=generation_config)
+    cache.set(key, response.text)
+    if remember:
+        remember(response.text)
+    return response.text
+
+# -------------------------------------------------
+# Canonical summaries (one generation per document, translated per language)
+# -------------------------------------------------
+def _canonical_key(source: str) -> str:
+    return make_key(source, mode="canonical-summary", prompt_version=PROMPT_VERSION, model=MODEL_NAME)
+
+def remember_canonical(source: str, summary: str, language: str) -> None:
+    """Record the first summary of a document or image (`source` is its content hash);
+    later requests in other languages translate it instead of re-analyzing."""
+    cache = get_result_cache()
+    if summary and cache.get(_canonical_key(source)) is None:
+        cache.set(_canonical_key(source), json.dumps({"language": language, "summary": summary}, ensure_ascii=False))
+
+def localized_summary(source: str, language: str, stream: bool = False, text: str | None = None):
+    """The stored summary of `source` in `language` (translated lazily, cached), or None if there is
+    none yet. Also None when the document `text` is itself written in `language`: summarizing the
+    original beats translating a summary made in another language."""
+    raw = get_result_cache().get(_canonical_key(source))
+    if raw is None:
+        return None
+    canonical = json.loads(raw)
+    if canonical["language"] == language:
+        return iter([canonical["summary"]]) if stream else canonical["summary"]
+    if text is not None and detect_language(text) == pick_tts_code(language):
+        count("translate", "skipped_same_language")
+        return None
+    return translate_text(canonical["summary"], language, stream=stream)
+
+def _remember_when_done(chunks, source: str, language: str):
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    remember_canonical(source, "".join(parts), language)
+
+def summarize_document(text: str, language: str, stream: bool = False):
+    """Summary of `text` in `language`. The document is summarized once; asking for another
+    language translates that summary (cheaper than re-sending the document) unless the document
+    is written in that language, and keeps working after the user switches language mid-session."""
+    source = content_hash(text)
+    variant = localized_summary(source, language, stream=stream, text=text)
+    if variant is not None:
+        return variant
+    result = ask_ai(text, mode="summary", language=language, stream=stream)
+    if stream:
+        return _remember_when_done(result, source, language)
+    remember_canonical(source, result, language)
+    return result
+
+def summarize_conversation(previous: str, messages: list[dict], language: str) -> str:
+    """Fold `messages` into the running conversation summary (one small model call)."""
+    transcript = "\n".join(f"{m['role'].capitalize()}: {m['content']}" for m in messages)
+    prompt = f"""Update the summary of a conversation between a farmer and CropCare.
+Keep crops, symptoms, locations, quantities and advice already given. Write at most 120 words in {language}.
+Current summary:
+{previous or "(none)"}
+New messages:
+{transcript}
+"""
+    response = model.generate_content(prompt, generation_config={"temperature": 0.2, "max_output_tokens": 300})
+    return response.text
+
+def compact_conversation(conversation: Conversation, language: str) -> bool:
+    """Fold older turns into the summary if over budget; on failure the full history is kept for next time."""
+    try:
+        return conversation.compact(lambda prev, msgs: summarize_conversation(prev, msgs, language))
+    except Exception as e:
+        log.warning("Conversation summary failed, keeping full history for now: %s", e)
+        return False
+
+def record_exchange(conversation: Conversation, question: str, answer: str, language: str) -> None:
+    """Append a question/answer pair and compact older turns into the summary if over budget."""
+    conversation.add("user", question)
+    conversation.add("assistant", answer)
+    compact_conversation(conversation, language)
+
+def prewarm_answer_cache(max_workers: int = 4) -> int:
+    """Answer every EXAMPLE_GEN_Q question in every language so first askers get cache hits."""
+    jobs = [(q, lang) for lang in LANGUAGES for q in EXAMPLE_GEN_Q["Agriculture"].get(lang, [])]
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="cropcare-prewarm") as pool:
+        answers = list(pool.map(lambda job: ask_ai(query=job[0], mode="general", language=job[1]), jobs))
+    return sum(1 for a in answers if a)
+
+# -------------------------------------------------
+# TTS
+# -------------------------------------------------
+EMOJI_RE = re.compile("["
+    u"\U0001F600-\U0001F64F"  # emoticons
+    u"\U0001F300-\U0001F5FF"  # symbols & pictographs
+    u"\U0001F680-\U0001F6FF"  # transport & map symbols
+    u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
+    u"\U00002700-\U000027BF"
+    u"\U0001F900-\U0001F9FF"
+    u"\U00002600-\U000026FF"
+    u"\U00002B00-\U00002BFF"
+    "]+", flags=re.UNICODE)
+MARKDOWN_RE = re.compile(r'(\*\*|__|\*|_|#+)')
+
+def clean_text(text: str) -> str:
+    # Removes emojis and markdown for cleaner TTS
+    text = EMOJI_RE.sub(r'', text)
+    text = MARKDOWN_RE.sub('', text)
+    return text.strip()
+
+def request_tts(text: str, lang_name: str):
+    """Start (or join) background synthesis of `text`; returns a tts_service.TTSJob."""
+    return get_tts_service().request(clean_text(text), pick_tts_code(lang_name))
+
+# -------------------------------------------------
+# OCR with Gemini Vision
+# -------------------------------------------------
+def ocr_image_bytes(image_bytes: bytes) -> str:
+    """Gemini Vision OCR; raises on API errors. Safe to call from worker threads."""
+    cache = get_result_cache()
+    key = make_key(image_bytes, mode="ocr", prompt_version=PROMPT_VERSION, model=MODEL_NAME)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    prepared = prepare_image(image_bytes, task="ocr")
+    image_part = {"mime_type": prepared.mime_type, "data": base64.b64encode(prepared.data).decode('utf-8')}
+    prompt = "Extract all text from this image. Only return the raw text content, with no additional commentary or formatting."
+    response = vision_model.generate_content([prompt, image_part])
+    text = response.text.strip()
+    cache.set(key, text)
+    return text
+
+@timed("extract.image")
+def extract_text_with_gemini_vision(image_bytes: bytes, reporter: Reporter = NULL_REPORTER) -> str:
+    """Uses Gemini Vision to extract text from an image."""
+    try:
+        return ocr_image_bytes(image_bytes)
+    except Exception as e:
+        reporter.error(f"Gemini Vision OCR failed: {e}")
+        return ""
+
+# -------------------------------------------------
+# Extraction
+# -------------------------------------------------
+@timed("extract.pdf")
+def extract_text_from_pdf(uploaded_file, reporter: Reporter = NULL_REPORTER, done_pages: dict[int, str] | None = None,
+                          on_page=None, on_failed_page=None) -> tuple[str, bool]:
+    """Each page is classified on its own: pages with a usable text layer are read directly,
+    only the rest are rendered (one at a time) and OCR'd. Returns (text, complete); `complete`
+    is False when any page (or the whole file) could not be read.
+
+    `done_pages` holds OCR text already checkpointed for this file and is not redone.
+    `on_page(page_no, text)` is called as each newly OCR'd page finishes so callers can checkpoint it.
+    `on_failed_page(page_no, error)` is called for each page that failed even after retries.
+    """
+    uploaded_file.seek(0)
+    pdf_bytes = uploaded_file.read()
+    results: dict[int, str] = {}
+    errors: list[Exception] = []
+    sources: dict[str, int] = {}
+    try:
+        for page in iter_pdf_pages(pdf_bytes, ocr_image_bytes, done_pages=done_pages):
+            results[page.page_no] = page.text
+            sources[page.source] = sources.get(page.source, 0) + 1
+            count("extract.pdf", f"pages_{page.source}")
+            if page.source == "ocr" and on_page:
+                on_page(page.page_no, page.text)
+            elif page.source == "error":
+                errors.append(page.error)
+                reporter.warning(f"Could not read page {page.page_no}: {page.error}")
+                if on_failed_page:
+                    on_failed_page(page.page_no, page.error)
+            reporter.progress(page.page_no / page.total, "Reading PDF pages...")
+        log.info("PDF pages by source: %s", sources)
+        text = join_pages(results)
+        if not text and errors:
+            raise errors[0]
+        return text, not errors
+    except Exception as e:
+        reporter.error(f"Visual PDF processing failed. Ensure 'poppler' is installed. Error: {e}")
+        return "", False
+    finally:
+        reporter.done()
+
+
+@timed("extract.docx")
+def extract_text_from_docx(f, reporter: Reporter = NULL_REPORTER):
+    """Paragraphs, headings and tables in document order, streamed from the DOCX XML."""
+    try:
+        f.seek(0)
+        return docx_to_text(f).strip()
+    except Exception as e:
+        reporter.error(f"DOCX read error: {e}")
+        return ""
+
+def extract_text(file, reporter: Reporter = NULL_REPORTER, **pdf_options):
+    """`file` is any binary file object with a `.name` (Streamlit upload, batch.NamedBytesIO, ...).
+    `pdf_options` (done_pages, on_page, on_failed_page) are passed to extract_text_from_pdf.
+    Text with unreadable pages is returned but not cached, so the next request tries those pages again."""
+    if not file: return ""
+    ext = file.name.lower().split(".")[-1]
+    # Extraction does not depend on language, so every session shares one entry per file.
+    cache = get_result_cache()
+    key = make_key(file.getvalue(), mode=f"extract:{ext}:{EXTRACT_VERSION}", prompt_version=PROMPT_VERSION, model=MODEL_NAME)
+    cached = cache.get(key)
+    if cached is not None:
+        count("extract", "cache_hits")
+        return cached
+    text, complete = _extract_text_uncached(file, ext, reporter, **pdf_options)
+    if complete:
+        cache.set(key, text)
+    else:
+        count("extract", "incomplete")
+    return text
+
+def _extract_text_uncached(file, ext: str, reporter: Reporter, **pdf_options) -> tuple[str, bool]:
+    if ext == "pdf":
+        return extract_text_from_pdf(file, reporter, **pdf_options)
+    elif ext == "docx":
+        return extract_text_from_docx(file, reporter), True
+    elif ext in ("jpg", "jpeg", "png"):
+        # Use Gemini Vision directly for images; "" after an API error is not worth caching.
+        text = extract_text_with_gemini_vision(file.getvalue(), reporter)
+        return text, bool(text)
+    elif ext == "txt":
+        return decode_text(file.getvalue()), True
+    else:
+        reporter.error("Unsupported file type")
+        return "", False
+
+# -------------------------------------------------
+# Stored documents (for stateless clients)
+# -------------------------------------------------
+def remember_document(text: str) -> str:
+    """Store extracted text and return its id, so API clients can chat about it later."""
+    return get_blob_store().put_text(text)
+
+def load_document(doc_id: str) -> str | None:
+    return get_blob_store().get_text(doc_id)
+
+# -------------------------------------------------
+# Examples
+# -------------------------------------------------
+EXAMPLE_DOC_Q = {
+    "Agriculture": {
+        "English": ["What disease is this?", "How do I treat this crop issue?", "When should I harvest?"],
+        "हिंदी": ["यह कौन-सी बीमारी है?", "इस फसल समस्या का इलाज कैसे करें?", "कटाई कब करनी चाहिए?"],
+        "తెలుగు": ["ఇది ఏ వ్యాధి?", "ఈ పంట సమస్యను ఎలా పరిష్కరించాలి?", "పంటను ఎప్పుడు కోయాలి?"],
+        "മലയാളം": ["ഇത് ഏത് രോഗമാണ്?", "ഈ വിള പ്രശ്നം എങ്ങനെ പരിഹരിക്കാം?", "എപ്പോൾ കൊയ്ത്ത് നടത്തണം?"],
+    },
+}
+EXAMPLE_GEN_Q = {
+    "Agriculture": {
+        "English": ["Tomato leaves are yellow—cause?", "How to identify pest damage?", "Best time to plant corn?"],
+        "हिंदी": ["टमाटर के पत्ते पीले—कारण?", "कीट नुकसान कैसे पहचानें?", "मक्का बोने का सही समय?"],
+        "తెలుగు": ["టమోటా ఆకులు పసుపు—కారణం?", "కీటకాల నష్టం ఎలా గుర్తించాలి?", "మొక్కజొన్న ఎప్పుడు నాటాలి?"],
+        "മലയാളം": ["തക്കാളി ഇലകൾ മഞ്ഞ—കാരണം?", "കീടനാശം എങ്ങനെ തിരിച്ചറിയാം?", "മക്ക ചോളം വിതയ്ക്കാൻ മികച്ച സമയം?"],
+    },
+}
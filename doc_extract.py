@@ -0,0 +1,223 @@
+# -------------------------------------------------
+# CropCare - streaming DOCX and TXT extraction
+# -------------------------------------------------
+# `iter_docx_sections` inflates word/document.xml straight out of the zip,
+# feeds it to an expat parser with an event target and yields headings,
+# paragraphs and tables in document order. No element tree is built, so
+# memory stays flat however long the document is (python-docx builds the
+# whole lxml tree first, and its `.paragraphs` skips tables - where soil
+# test values and fertilizer schedules usually are).
+#
+# `sections_to_text` renders sections with blank lines between them, which
+# is what summarizer.content_defined_chunks and doc_index.chunk_text split
+# on. Headings become "# ..." lines, and large tables are cut into row
+# blocks that repeat the header row, so no chunk holds rows without their
+# column names.
+#
+# `decode_text` replaces the utf-8/errors="ignore" read of TXT uploads:
+# BOMs, then strict UTF-8, then a charset-normalizer guess on a sample, so
+# UTF-16 and legacy code pages survive. Western European text decodes
+# without errors under several code pages that charset-normalizer scores
+# alike; cp1252 wins those ties ("crème" rather than cp1250's "crčme").
+import re, zipfile
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from typing import Iterator
+
+EXTRACT_VERSION = "2"  # part of the extraction cache key; bump when the output format changes
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+TABLE_BLOCK_CHARS = 1000   # row block size, below doc_index's 1200-char chunks
+DETECT_SAMPLE = 1 << 20    # bytes handed to the encoding detector
+PREFERRED_ENCODING = "cp1252"
+CLOSE_CHAOS = 0.02         # detector candidates this close to the best count as a tie
+
+_P, _TBL, _TR, _TC, _T = f"{W}p", f"{W}tbl", f"{W}tr", f"{W}tc", f"{W}t"
+_TAB, _BR, _CR, _PPR = f"{W}tab", f"{W}br", f"{W}cr", f"{W}pPr"
+_PSTYLE, _OUTLINE, _NUMPR, _VAL = f"{W}pStyle", f"{W}outlineLvl", f"{W}numPr", f"{W}val"
+_HEADING_RE = re.compile(r"^(?:heading\s*(\d)|title)$", re.I)
+READ_CHUNK = 1 << 20
+
+
+@dataclass
+class Section:
+    kind: str             # "heading" | "paragraph" | "table"
+    text: str = ""        # heading/paragraph text
+    level: int = 0        # heading level (1 = top)
+    rows: list[list[str]] | None = None  # table cells, row by row
+
+
+class _DocxTarget:
+    """XMLParser target turning WordprocessingML events into Sections; no element tree is built.
+
+    Paragraphs nested in a paragraph (text boxes) are skipped, as python-docx does, and
+    tables nested in a cell are flattened into that cell's text.
+    """
+
+    def __init__(self):
+        self.sections: list[Section] = []
+        self.p_depth = self.tbl_depth = 0
+        self.in_t = self.in_ppr = False
+        self.parts: list[str] = []
+        self.style, self.outline, self.listed = "", None, False
+        self.rows: list[list[str]] = []
+        self.cells: list[str] = []
+        self.cell: list[str] = []
+
+    def start(self, tag, attrs):
+        if tag == _T:
+            self.in_t = self.p_depth == 1
+        elif tag == _P:
+            self.p_depth += 1
+            if self.p_depth == 1:
+                self.parts, self.style, self.outline, self.listed = [], "", None, False
+        elif self.p_depth != 1:
+            if tag == _TBL:
+                self.tbl_depth += 1
+                if self.tbl_depth == 1:
+                    self.rows = []
+            elif self.tbl_depth == 1:
+                if tag == _TR:
+                    self.cells = []
+                elif tag == _TC:
+                    self.cell = []
+        elif tag == _PPR:
+            self.in_ppr = True
+        elif self.in_ppr:  # tab stops in paragraph properties are not text
+            if tag == _PSTYLE:
+                self.style = attrs.get(_VAL, "")
+            elif tag == _OUTLINE:
+                self.outline = attrs.get(_VAL, "")
+            elif tag == _NUMPR:
+                self.listed = True
+        elif tag == _TAB:
+            self.parts.append("\t")
+        elif tag == _BR or tag == _CR:
+            self.parts.append("\n")
+
+    def end(self, tag):
+        if tag == _T:
+            self.in_t = False
+        elif tag == _P:
+            if self.p_depth == 1:
+                self._paragraph("".join(self.parts).strip())
+            self.p_depth -= 1
+        elif tag == _PPR:
+            self.in_ppr = False
+        elif self.p_depth == 0:
+            if tag == _TBL:
+                self.tbl_depth -= 1
+                if self.tbl_depth == 0 and self.rows:
+                    self.sections.append(Section("table", rows=self.rows))
+            elif self.tbl_depth == 1:
+                if tag == _TC:
+                    self.cells.append(" ".join(self.cell))
+                elif tag == _TR and any(self.cells):
+                    self.rows.append(self.cells)
+
+    def data(self, text):
+        if self.in_t:
+            self.parts.append(text)
+
+    def close(self):
+        return None
+
+    def _paragraph(self, text: str) -> None:
+        if not text:
+            return
+        if self.tbl_depth:
+            self.cell.append(text)
+            return
+        m = _HEADING_RE.match(self.style)
+        if m:
+            self.sections.append(Section("heading", text, level=int(m.group(1) or 1)))
+        elif self.outline is not None and self.outline.isdigit() and int(self.outline) < 9:
+            self.sections.append(Section("heading", text, level=int(self.outline) + 1))
+        else:
+            self.sections.append(Section("paragraph", f"- {text}" if self.listed or self.style.startswith("List") else text))
+
+
+def iter_docx_sections(fileobj) -> Iterator[Section]:
+    """Headings, paragraphs and tables of a .docx in document order, parsed as the XML is inflated."""
+    target = _DocxTarget()
+    parser = ET.XMLParser(target=target)
+    with zipfile.ZipFile(fileobj) as zf, zf.open("word/document.xml") as xml:
+        while chunk := xml.read(READ_CHUNK):
+            parser.feed(chunk)
+            yield from target.sections
+            target.sections.clear()
+    parser.close()
+    yield from target.sections
+
+
+# -------------------------------------------------
+# Rendering
+# -------------------------------------------------
+def _table_blocks(rows: list[list[str]], max_chars: int = TABLE_BLOCK_CHARS) -> list[str]:
+    """Rows as "a | b | c" lines, in blocks of about `max_chars`; each later block repeats the header row."""
+    lines = [" | ".join(cell.replace("\n", " ") for cell in row) for row in rows]
+    header, blocks, cur, size = lines[0], [], [lines[0]], len(lines[0])
+    for line in lines[1:]:
+        if size + len(line) + 1 > max_chars and len(cur) > 1:
+            blocks.append("\n".join(cur))
+            cur, size = [header], len(header)
+        cur.append(line)
+        size += len(line) + 1
+    blocks.append("\n".join(cur))
+    return blocks
+
+
+def sections_to_text(sections, table_block_chars: int = TABLE_BLOCK_CHARS) -> str:
+    """Plain text with one blank line between sections (and between table row blocks)."""
+    parts = []
+    for s in sections:
+        if s.kind == "heading":
+            parts.append(f"{'#' * min(s.level, 6)} {s.text}")
+        elif s.kind == "table":
+            parts.extend(_table_blocks(s.rows, table_block_chars))
+        else:
+            parts.append(s.text)
+    return "\n\n".join(parts)
+
+
+def docx_to_text(fileobj) -> str:
+    return sections_to_text(iter_docx_sections(fileobj))
+
+
+# -------------------------------------------------
+# TXT decoding
+# -------------------------------------------------
+_BOMS = (
+    (b"\xef\xbb\xbf", "utf-8-sig"),
+    (b"\xff\xfe\x00\x00", "utf-32"), (b"\x00\x00\xfe\xff", "utf-32"),
+    (b"\xff\xfe", "utf-16"), (b"\xfe\xff", "utf-16"),
+)
+
+
+def detect_encoding(data: bytes) -> str:
+    """Best guess at the encoding of `data`; "utf-8" when nothing better is known."""
+    for bom, encoding in _BOMS:
+        if data.startswith(bom):
+            return encoding
+    if b"\x00" not in data[:DETECT_SAMPLE]:  # NULs are valid UTF-8 but mean UTF-16/32 without a BOM
+        try:
+            data.decode("utf-8")
+            return "utf-8"
+        except UnicodeDecodeError as e:
+            if e.start >= len(data) - 3 and e.reason == "unexpected end of data":
+                return "utf-8"  # only a truncated final character
+    from charset_normalizer import from_bytes
+    matches = from_bytes(data[:DETECT_SAMPLE])
+    best = matches.best()
+    if best is None:
+        return PREFERRED_ENCODING  # no confident guess; a single-byte code page at least loses nothing
+    for match in matches:
+        if (PREFERRED_ENCODING in match.could_be_from_charset and match.chaos <= best.chaos + CLOSE_CHAOS
+                and match.coherence >= best.coherence - CLOSE_CHAOS):
+            return PREFERRED_ENCODING
+    return best.encoding
+
+
+def decode_text(data: bytes) -> str:
+    """Decode a text upload with its detected encoding and normalise line endings."""
+    text = data.decode(detect_encoding(data), errors="replace")
+    return text.replace("\r\n", "\n").replace("\r", "\n").lstrip("\ufeff")
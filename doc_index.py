@@ -0,0 +1,108 @@
+# -------------------------------------------------
+# CropCare - in-memory BM25 retrieval over document chunks
+# -------------------------------------------------
+# Built once per uploaded document so chat prompts can carry only the chunks
+# relevant to the question instead of the whole extracted text.
+import re
+import numpy as np
+
+from result_cache import content_hash
+from summarizer import estimate_tokens, trim_to_tokens
+
+# \w alone splits Indic words at combining vowel signs, so include the
+# Devanagari..Malayalam blocks explicitly.
+TOKEN_RE = re.compile(r"[\w\u0900-\u0DFF]+", re.UNICODE)
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+def chunk_text(text: str, max_chars: int = 1200, overlap: int = 150) -> list[str]:
+    """Split on paragraph boundaries into chunks of roughly `max_chars`."""
+    paras = [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
+    chunks, cur = [], ""
+    for p in paras:
+        while len(p) > max_chars:  # a single huge paragraph: hard-wrap it
+            if cur:
+                chunks.append(cur)
+                cur = ""
+            cut = p.rfind(" ", 0, max_chars)
+            cut = cut if cut > max_chars // 2 else max_chars
+            chunks.append(p[:cut].strip())
+            p = p[max(cut - overlap, 0):].strip()
+        if cur and len(cur) + len(p) + 2 > max_chars:
+            chunks.append(cur)
+            cur = cur[-overlap:] + "\n\n" + p if overlap else p
+        else:
+            cur = f"{cur}\n\n{p}" if cur else p
+    if cur:
+        chunks.append(cur)
+    return chunks
+
+
+class DocIndex:
+    """Okapi BM25 over fixed chunks, with NumPy postings per term."""
+
+    def __init__(self, text: str, max_chars: int = 1200, k1: float = 1.5, b: float = 0.75):
+        self.doc_hash = content_hash(text)
+        self.chunks = chunk_text(text, max_chars=max_chars)
+        self.k1, self.b = k1, b
+        n = len(self.chunks)
+        lengths = np.zeros(n, dtype=np.float32)
+        postings: dict[str, dict[int, int]] = {}
+        for i, chunk in enumerate(self.chunks):
+            toks = tokenize(chunk)
+            lengths[i] = len(toks)
+            for t in toks:
+                row = postings.setdefault(t, {})
+                row[i] = row.get(i, 0) + 1
+        self.avgdl = float(lengths.mean()) if n else 0.0
+        self._norm = k1 * (1 - b + b * lengths / (self.avgdl or 1.0))
+        self._postings = {
+            t: (np.fromiter(row.keys(), dtype=np.int32), np.fromiter(row.values(), dtype=np.float32))
+            for t, row in postings.items()
+        }
+        self._idf = {
+            t: float(np.log(1 + (n - len(row) + 0.5) / (len(row) + 0.5)))
+            for t, row in postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def scores(self, query: str) -> np.ndarray:
+        out = np.zeros(len(self.chunks), dtype=np.float32)
+        for t in set(tokenize(query)):
+            hit = self._postings.get(t)
+            if hit is None:
+                continue
+            ids, tf = hit
+            out[ids] += self._idf[t] * tf * (self.k1 + 1) / (tf + self._norm[ids])
+        return out
+
+    def search(self, query: str, k: int = 4, max_tokens: int | None = None) -> list[str]:
+        """Top-k chunks for `query`, returned in document order.
+
+        With `max_tokens`, lower-ranked chunks are dropped until the excerpts fit
+        (the best chunk is kept, truncated if it alone is too long).
+        """
+        if len(self.chunks) <= k:
+            top = list(range(len(self.chunks)))
+        else:
+            s = self.scores(query)
+            ranked = np.argsort(-s, kind="stable")[:k]
+            top = ranked.tolist() if s[ranked].any() else list(range(k))  # nothing matched: use the opening
+        if max_tokens is None:
+            return [self.chunks[i] for i in sorted(top)]
+        picked, used = [], 0
+        for i in top:
+            cost = estimate_tokens(self.chunks[i])
+            if used + cost > max_tokens and picked:
+                break
+            picked.append(i)
+            used += cost
+        out = [self.chunks[i] for i in sorted(picked)]
+        if used > max_tokens and out:
+            out[0] = trim_to_tokens(out[0], max_tokens)
+        return out
@@ -0,0 +1,224 @@
+# -------------------------------------------------
+# CropCare - perceptual-hash index of analyzed crop photos
+# -------------------------------------------------
+# The same leaf photographed twice, recompressed by a messenger app,
+# resized or slightly cropped has different bytes but nearly the same
+# perceptual hash. Every analyzed photo is stored with a 64-bit dHash
+# (indexed) and a 64-bit pHash (verification); a new photo within
+# `max_distance` dHash bits and `verify_distance` pHash bits of a stored one
+# reuses that diagnosis.
+#
+# Lookups use multi-index hashing: the dHash is split into 8 bytes and each
+# byte value maps to the entries having it. Two hashes within 7 bits of each
+# other agree exactly on at least one byte (pigeonhole), so only those
+# buckets are checked. Each holds about N/256 entries, so a lookup scans
+# about N/32 candidates: ~9k (a few milliseconds) at 3*10^5 entries.
+#
+# Entries older than `ttl` are skipped by lookups and dropped from memory
+# and SQLite every EXPIRE_EVERY seconds, not only at startup.
+import io, os, time, sqlite3, threading
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from result_cache import DEFAULT_CACHE_DIR
+
+HASH_DISTANCE = int(os.getenv("CROPCARE_IMAGE_HASH_DISTANCE", "6"))
+VERIFY_DISTANCE = 10  # pHash moves more under recompression (up to ~8 bits) but rejects look-alike leaves
+BLOCKS = 8  # 8-bit blocks; exact-match buckets guarantee recall for distances up to BLOCKS - 1
+IMAGE_TTL = 30 * 24 * 3600
+EXPIRE_EVERY = 3600.0
+
+_DCT = np.cos(np.pi * np.outer(np.arange(32), 2 * np.arange(32) + 1) / 64)  # DCT-II basis for pHash
+
+
+def _open_gray(image_bytes: bytes) -> Image.Image:
+    img = Image.open(io.BytesIO(image_bytes))
+    img.draft("L", (256, 256))  # JPEG: decode at reduced scale, much faster than full size
+    return ImageOps.exif_transpose(img).convert("L")
+
+
+def _pixels(img: Image.Image, size: tuple[int, int]) -> np.ndarray:
+    return np.asarray(img.resize(size, Image.Resampling.LANCZOS), dtype=np.float32)
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    return int("".join("1" if b else "0" for b in bits.ravel()), 2)
+
+
+def dhash(img: Image.Image) -> int:
+    """64-bit difference hash: is each pixel brighter than its right neighbour (9x8 grid)."""
+    px = _pixels(img, (9, 8))
+    return _bits_to_int(px[:, 1:] > px[:, :-1])
+
+
+def phash(img: Image.Image) -> int:
+    """64-bit DCT hash: low-frequency coefficients of a 32x32 thumbnail above their median."""
+    px = _pixels(img, (32, 32))
+    low = (_DCT @ px @ _DCT.T)[:8, :8].ravel()[1:]  # drop the DC term (overall brightness)
+    bits = np.concatenate([[False], low > np.median(low)])
+    return _bits_to_int(bits)
+
+
+def image_hashes(image_bytes: bytes) -> tuple[int, int] | None:
+    """(dHash, pHash) of an encoded image, or None if Pillow cannot read it."""
+    try:
+        img = _open_gray(image_bytes)
+    except Exception:
+        return None
+    return dhash(img), phash(img)
+
+
+def _signed(h: int) -> int:
+    return h - (1 << 64) if h >= 1 << 63 else h  # SQLite INTEGER is signed 64-bit
+
+
+class ImageIndex:
+    """Near-duplicate photo lookup; each entry holds diagnoses keyed by language."""
+
+    def __init__(self, path: str | None = None, namespace: str = "", max_distance: int = HASH_DISTANCE,
+                 verify_distance: int = VERIFY_DISTANCE, ttl: float = IMAGE_TTL):
+        if not 0 <= max_distance < BLOCKS:
+            raise ValueError(f"max_distance must be below {BLOCKS} for exact-block lookups")
+        self.path = path if path is not None else os.path.join(DEFAULT_CACHE_DIR, "images.sqlite")
+        self.namespace = namespace  # model + prompt version, as for the answer cache
+        self.max_distance = max_distance
+        self.verify_distance = verify_distance
+        self.ttl = ttl
+        self._dhash: list[int] = []
+        self._phash: list[int] = []
+        self._ids: list[int] = []  # SQLite row ids, parallel to the hash lists
+        self._created: list[float] = []
+        self._buckets: list[dict[int, list[int]]] = [{} for _ in range(BLOCKS)]
+        self._lock = threading.Lock()
+        self._last_expire = time.time()
+        self.stats = {"entries": 0, "hits": 0, "misses": 0}
+        self._db = None
+        if self.path:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.executescript(
+                    "CREATE TABLE IF NOT EXISTS images (id INTEGER PRIMARY KEY, namespace TEXT NOT NULL,"
+                    " dhash INTEGER NOT NULL, phash INTEGER NOT NULL, created REAL NOT NULL);"
+                    "CREATE TABLE IF NOT EXISTS diagnoses (image_id INTEGER NOT NULL, language TEXT NOT NULL,"
+                    " diagnosis TEXT NOT NULL, extracted_text TEXT, PRIMARY KEY (image_id, language));"
+                )
+                self._db.commit()
+                self._load()
+            except sqlite3.Error:
+                self._db = None
+
+    def _load(self) -> None:
+        expired = time.time() - self.ttl
+        self._delete_expired(expired)
+        rows = self._db.execute("SELECT id, dhash, phash, created FROM images WHERE namespace = ? AND created >= ?",
+                                (self.namespace, expired))
+        for row_id, d, p, created in rows:
+            self._index(row_id, d & (1 << 64) - 1, p & (1 << 64) - 1, created)
+
+    def _delete_expired(self, expired: float) -> None:
+        self._db.execute("DELETE FROM diagnoses WHERE image_id IN (SELECT id FROM images WHERE created < ?)", (expired,))
+        self._db.execute("DELETE FROM images WHERE created < ?", (expired,))
+        self._db.commit()
+
+    def _index(self, row_id: int, d: int, p: int, created: float) -> None:
+        pos = len(self._ids)
+        self._ids.append(row_id)
+        self._dhash.append(d)
+        self._phash.append(p)
+        self._created.append(created)
+        for b in range(BLOCKS):
+            self._buckets[b].setdefault((d >> (8 * b)) & 0xFF, []).append(pos)
+        self.stats["entries"] = len(self._ids)
+
+    def _expire(self, now: float) -> None:
+        """Rebuild the in-memory index without entries older than ttl and delete them from SQLite."""
+        self._last_expire = now
+        expired = now - self.ttl
+        keep = [pos for pos, created in enumerate(self._created) if created >= expired]
+        if len(keep) < len(self._ids):
+            entries = [(self._ids[pos], self._dhash[pos], self._phash[pos], self._created[pos]) for pos in keep]
+            self._ids, self._dhash, self._phash, self._created = [], [], [], []
+            self._buckets = [{} for _ in range(BLOCKS)]
+            for entry in entries:
+                self._index(*entry)
+            self.stats["entries"] = len(self._ids)
+        if self._db is not None:
+            self._delete_expired(expired)
+
+    def _nearest(self, d: int, p: int) -> int | None:
+        """Position of the closest live entry within max_distance (dHash) and verify_distance (pHash)."""
+        now = time.time()
+        if now - self._last_expire > EXPIRE_EVERY:
+            self._expire(now)
+        expired = now - self.ttl
+        best, best_dist = None, self.max_distance + 1
+        seen = set()
+        for b in range(BLOCKS):
+            for pos in self._buckets[b].get((d >> (8 * b)) & 0xFF, ()):
+                if pos in seen:
+                    continue
+                seen.add(pos)
+                dist = (self._dhash[pos] ^ d).bit_count()
+                if (dist < best_dist and (self._phash[pos] ^ p).bit_count() <= self.verify_distance
+                        and self._created[pos] >= expired):
+                    best, best_dist = pos, dist
+        return best
+
+    # -- lookups --------------------------------------------------------
+    def lookup(self, hashes: tuple[int, int] | None) -> tuple[dict[str, tuple[str, str | None]], int] | None:
+        """Diagnoses of the nearest stored photo as {language: (diagnosis, extracted_text)} plus its
+        entry id, or None. extracted_text is None when the photo was only diagnosed, not transcribed.
+        Callers translate when their language is missing from the dict."""
+        if hashes is None or self._db is None:
+            return None
+        with self._lock:
+            pos = self._nearest(*hashes)
+            if pos is None:
+                self.stats["misses"] += 1
+                return None
+            row_id = self._ids[pos]
+            try:
+                rows = self._db.execute("SELECT language, diagnosis, extracted_text FROM diagnoses WHERE image_id = ?",
+                                        (row_id,)).fetchall()
+            except sqlite3.Error:
+                return None
+            if not rows:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+            return {lang: (diag, text) for lang, diag, text in rows}, row_id
+
+    def add(self, hashes: tuple[int, int] | None, language: str, diagnosis: str, extracted_text: str | None = None,
+            entry_id: int | None = None) -> int | None:
+        """Store a diagnosis; pass `entry_id` (from `lookup`) to add a language to an existing photo."""
+        if hashes is None or self._db is None or not diagnosis:
+            return None
+        with self._lock:
+            try:
+                if entry_id is None:
+                    pos = self._nearest(*hashes)
+                    entry_id = self._ids[pos] if pos is not None else None
+                if entry_id is None:
+                    now = time.time()
+                    entry_id = self._db.execute(
+                        "INSERT INTO images (namespace, dhash, phash, created) VALUES (?, ?, ?, ?)",
+                        (self.namespace, _signed(hashes[0]), _signed(hashes[1]), now),
+                    ).lastrowid
+                    self._index(entry_id, *hashes, now)
+                self._db.execute(
+                    "INSERT INTO diagnoses (image_id, language, diagnosis, extracted_text) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT (image_id, language) DO UPDATE SET diagnosis = excluded.diagnosis,"
+                    " extracted_text = COALESCE(excluded.extracted_text, diagnoses.extracted_text)",
+                    (entry_id, language, diagnosis, extracted_text),
+                )
+                self._db.commit()
+            except sqlite3.Error:
+                return None
+        return entry_id
+
+    def hit_rate(self) -> float:
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
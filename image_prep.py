@@ -0,0 +1,100 @@
+# -------------------------------------------------
+# CropCare - image preparation before vision calls
+# -------------------------------------------------
+# Phone photos arrive as 12 MP JPEGs or PNGs; the model does not need that
+# many pixels. Each image is EXIF-rotated, downscaled to a task-specific
+# limit and re-encoded, with the matching MIME type sent alongside.
+import io, os, threading
+from dataclasses import dataclass
+
+from PIL import Image, ImageOps
+
+# Diagnosis needs lesion colour and shape, not fine print; OCR needs legible glyphs.
+TASK_PROFILES = {
+    "diagnosis": {"max_dim": 1024, "quality": 80},
+    "ocr": {"max_dim": 2048, "quality": 85},
+}
+OUTPUT_FORMAT = os.getenv("CROPCARE_IMAGE_FORMAT", "JPEG").upper()  # JPEG or WEBP
+MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png"}
+
+stats = {"images": 0, "bytes_in": 0, "bytes_out": 0}
+_stats_lock = threading.Lock()
+
+
+@dataclass
+class PreparedImage:
+    data: bytes
+    mime_type: str
+    width: int
+    height: int
+    original_size: int
+
+    @property
+    def bytes_saved(self) -> int:
+        return max(self.original_size - len(self.data), 0)
+
+
+def preprocess_pil(img: Image.Image) -> Image.Image:
+    img = ImageOps.exif_transpose(img)
+    if img.mode in ("RGBA", "LA", "P"):
+        # Flatten transparency onto white instead of letting it turn black.
+        img = img.convert("RGBA")
+        bg = Image.new("RGB", img.size, (255, 255, 255))
+        bg.paste(img, mask=img.getchannel("A"))
+        img = bg
+    elif img.mode != "RGB":
+        img = img.convert("RGB")
+    return img
+
+
+def _record(original_size: int, prepared_size: int) -> None:
+    with _stats_lock:
+        stats["images"] += 1
+        stats["bytes_in"] += original_size
+        stats["bytes_out"] += prepared_size
+
+
+def _encode(img: Image.Image, task: str, fmt: str | None) -> tuple[bytes, str, Image.Image]:
+    profile = TASK_PROFILES.get(task, TASK_PROFILES["diagnosis"])
+    fmt = (fmt or OUTPUT_FORMAT).upper()
+    img = preprocess_pil(img)
+    img.thumbnail((profile["max_dim"], profile["max_dim"]), Image.Resampling.LANCZOS)
+    buf = io.BytesIO()
+    if fmt == "WEBP":
+        img.save(buf, format="WEBP", quality=profile["quality"], method=4)
+    else:
+        fmt = "JPEG"
+        img.save(buf, format="JPEG", quality=profile["quality"], optimize=True, progressive=True)
+    return buf.getvalue(), MIME_TYPES[fmt], img
+
+
+def prepare_pil(img: Image.Image, task: str = "diagnosis", fmt: str | None = None) -> PreparedImage:
+    """Prepare an in-memory image (e.g. a rendered PDF page) for `task`."""
+    data, mime, out = _encode(img, task, fmt)
+    _record(len(data), len(data))
+    return PreparedImage(data, mime, out.width, out.height, len(data))
+
+
+def prepare_image(image_bytes: bytes, task: str = "diagnosis", fmt: str | None = None) -> PreparedImage:
+    """Downscale/re-encode `image_bytes` for `task`; small, upright JPEG/WebP passes through untouched."""
+    profile = TASK_PROFILES.get(task, TASK_PROFILES["diagnosis"])
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        src_format, size = img.format, img.size
+        upright = img.getexif().get(0x0112, 1) == 1
+        fits = max(size) <= profile["max_dim"]
+        if src_format in ("JPEG", "WEBP") and img.mode == "RGB" and upright and fits:
+            _record(len(image_bytes), len(image_bytes))
+            return PreparedImage(image_bytes, MIME_TYPES[src_format], size[0], size[1], len(image_bytes))
+        img.load()
+        data, mime, out = _encode(img, task, fmt)
+    if len(data) >= len(image_bytes) and src_format in MIME_TYPES and upright and fits:
+        # Re-encoding made it bigger (e.g. a tiny PNG): send the original with its real MIME type.
+        data, mime, out_size = image_bytes, MIME_TYPES[src_format], size
+    else:
+        out_size = out.size
+    _record(len(image_bytes), len(data))
+    return PreparedImage(data, mime, out_size[0], out_size[1], len(image_bytes))
+
+
+def bytes_saved() -> int:
+    return max(stats["bytes_in"] - stats["bytes_out"], 0)
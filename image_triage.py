@@ -0,0 +1,204 @@
+# -------------------------------------------------
+# CropCare - on-box image triage before the vision API
+# -------------------------------------------------
+# A few milliseconds of NumPy on a downscaled copy answer two questions
+# before a multi-second vision call is spent on a photo:
+#   - is it usable at all (sharp enough, not too dark or washed out, big
+#     enough)? If not, the farmer is asked to retake it straight away;
+#   - what does it look like (crop/leaf, soil, document, other) and which
+#     visible cues (yellowing, brown lesions) stand out? The top labels go
+#     into the vision prompt as a prior.
+# Scene labels come from colour statistics (excess-green index and hue
+# bands) unless CROPCARE_TRIAGE_MODEL points at an ONNX classifier (needs
+# onnxruntime; labels one per line in <model>.labels.txt), which is loaded
+# once and run on whole batches.
+import io, os, threading
+from dataclasses import dataclass, field
+
+import numpy as np
+from PIL import Image, ImageOps
+
+TRIAGE_MODEL = os.getenv("CROPCARE_TRIAGE_MODEL", "")
+MIN_SIDE = 160
+MIN_SHARPNESS = float(os.getenv("CROPCARE_TRIAGE_MIN_SHARPNESS", "25"))  # see sharpness(); sharp photos score 80+
+# Exposure is judged on the tails, not the mean: a white page or app screenshot is mostly paper
+# white but its ink is dark, while a blown-out photo has nothing darker than light grey left.
+DARK = 60                       # too dark: 99% of pixels below this grey level (0-255)
+BRIGHT = 200                    # too bright: all but 0.05% of pixels above it
+ANALYSIS_SIDE = 512
+TOP_K = 3
+
+
+@dataclass
+class TriageResult:
+    usable: bool
+    reason: str = ""             # "", "unreadable", "too_small", "blurry", "too_dark", "too_bright"
+    sharpness: float = 0.0
+    brightness: float = 0.0
+    labels: list[tuple[str, float]] = field(default_factory=list)  # top-k (label, score), best first
+    cues: list[str] = field(default_factory=list)
+
+    @property
+    def scene(self) -> str:
+        return self.labels[0][0] if self.labels else ""
+
+    def prior(self) -> str:
+        """One prompt line with the local labels; "" when there is nothing useful to say."""
+        if not self.labels:
+            return ""
+        top = ", ".join(f"{label} ({score:.2f})" for label, score in self.labels if score >= 0.05)
+        cues = f"; visible cues: {', '.join(self.cues)}" if self.cues else ""
+        return f"Local pre-screen (a rough guess, confirm or correct it): {top}{cues}."
+
+
+# -------------------------------------------------
+# Quality and colour features
+# -------------------------------------------------
+def load_rgb(image_bytes: bytes) -> np.ndarray:
+    img = Image.open(io.BytesIO(image_bytes))
+    img.draft("RGB", (ANALYSIS_SIDE, ANALYSIS_SIDE))  # JPEG: decode at reduced scale
+    img = ImageOps.exif_transpose(img).convert("RGB")
+    original = max(img.size)
+    img.thumbnail((ANALYSIS_SIDE, ANALYSIS_SIDE), Image.Resampling.BILINEAR)
+    arr = np.asarray(img, dtype=np.float32)
+    return arr if original >= MIN_SIDE else arr[:0]
+
+
+def sharpness(gray: np.ndarray) -> float:
+    """Strongest edges (99.5th percentile of the 4-neighbour Laplacian) relative to the image's
+    contrast, in percent. Unlike the plain Laplacian variance it does not punish photos that are
+    mostly smooth leaf surface; out-of-focus and motion-blurred shots score below ~25."""
+    lap = gray[1:-1, :-2] + gray[1:-1, 2:] + gray[:-2, 1:-1] + gray[2:, 1:-1] - 4 * gray[1:-1, 1:-1]
+    lo, hi = np.percentile(gray, [1, 99])
+    return float(np.percentile(np.abs(lap), 99.5) / (hi - lo + 1) * 100)
+
+
+def colour_fractions(rgb: np.ndarray) -> dict[str, float]:
+    """Share of pixels in the colour classes the heuristic labels are built from."""
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    total = r + g + b + 1e-6
+    exg = (2 * g - r - b) / total                     # excess-green index on chromaticity
+    mx, mn = rgb.max(axis=-1), rgb.min(axis=-1)
+    sat = (mx - mn) / (mx + 1e-6)
+    hue = np.degrees(np.arctan2(np.sqrt(3) * (g - b), 2 * r - g - b)) % 360
+    green = (exg > 0.08) & (sat > 0.15)
+    yellow = ~green & (hue >= 40) & (hue < 70) & (sat > 0.3) & (mx > 90)
+    brown = ~green & (hue >= 10) & (hue < 40) & (sat > 0.25) & (mx > 40) & (mx < 200)
+    paper = (sat < 0.12) & (mx > 170)
+    ink = (sat < 0.2) & (mx < 90)
+    return {k: float(v.mean()) for k, v in
+            {"green": green, "yellow": yellow, "brown": brown, "paper": paper, "ink": ink}.items()}
+
+
+def heuristic_labels(fr: dict[str, float]) -> tuple[list[tuple[str, float]], list[str]]:
+    plant_tissue = fr["green"] + fr["yellow"] + 0.5 * fr["brown"]
+    scores = {
+        "crop or leaf": plant_tissue if fr["green"] > 0.03 else 0.5 * plant_tissue,
+        "soil": fr["brown"] * (1.0 if fr["green"] < 0.1 else 0.3),
+        "document or label": fr["paper"] if 0.005 < fr["ink"] < 0.4 else 0.3 * fr["paper"],
+    }
+    scores["other"] = max(0.0, 1.0 - sum(scores.values()))
+    total = sum(scores.values()) or 1.0
+    labels = sorted(((k, round(v / total, 2)) for k, v in scores.items()), key=lambda kv: -kv[1])[:TOP_K]
+    cues = []
+    if labels[0][0] == "crop or leaf":
+        tissue = fr["green"] + fr["yellow"] + fr["brown"] or 1.0
+        if fr["yellow"] / tissue > 0.1:
+            cues.append("yellowing")
+        if fr["brown"] / tissue > 0.08:
+            cues.append("brown spots or lesions")
+    return labels, cues
+
+
+def check_quality(rgb: np.ndarray) -> TriageResult:
+    if rgb.size == 0:
+        return TriageResult(False, "too_small")
+    gray = rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    result = TriageResult(True, sharpness=round(sharpness(gray), 1), brightness=round(float(gray.mean()), 1))
+    darkest, brightest = np.percentile(gray, [0.05, 99])
+    if brightest < DARK:
+        result.usable, result.reason = False, "too_dark"
+    elif darkest > BRIGHT:
+        result.usable, result.reason = False, "too_bright"
+    elif result.sharpness < MIN_SHARPNESS:
+        result.usable, result.reason = False, "blurry"
+    return result
+
+
+# -------------------------------------------------
+# Optional ONNX classifier
+# -------------------------------------------------
+class OnnxClassifier:
+    """ImageNet-style classifier: 1x3x224x224 float input, one logit per label."""
+
+    MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+    STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+    def __init__(self, path: str):
+        import onnxruntime  # optional dependency, only needed when a model is configured
+        self.session = onnxruntime.InferenceSession(path, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        with open(os.path.splitext(path)[0] + ".labels.txt", encoding="utf-8") as fh:
+            self.labels = [line.strip() for line in fh if line.strip()]
+
+    def predict(self, images: list[np.ndarray]) -> list[list[tuple[str, float]]]:
+        batch = np.stack([self._prepare(im) for im in images])
+        logits = self.session.run(None, {self.input_name: batch})[0]
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+        probs = exp / exp.sum(axis=1, keepdims=True)
+        return [[(self.labels[i], round(float(p[i]), 2)) for i in np.argsort(-p)[:TOP_K]] for p in probs]
+
+    def _prepare(self, rgb: np.ndarray) -> np.ndarray:
+        img = Image.fromarray(rgb.astype(np.uint8)).resize((224, 224), Image.Resampling.BILINEAR)
+        arr = (np.asarray(img, dtype=np.float32) / 255.0 - self.MEAN) / self.STD
+        return arr.transpose(2, 0, 1)
+
+
+_classifier: OnnxClassifier | None = None
+_classifier_failed = False
+_classifier_lock = threading.Lock()
+
+
+def get_classifier() -> OnnxClassifier | None:
+    """The configured ONNX model, loaded once per process; None if unset or unavailable."""
+    global _classifier, _classifier_failed
+    if not TRIAGE_MODEL or _classifier_failed:
+        return None
+    with _classifier_lock:
+        if _classifier is None and not _classifier_failed:
+            try:
+                _classifier = OnnxClassifier(TRIAGE_MODEL)
+            except Exception:
+                _classifier_failed = True  # fall back to the colour heuristics
+        return _classifier
+
+
+# -------------------------------------------------
+# Entry points
+# -------------------------------------------------
+def triage_many(images: list[bytes]) -> list[TriageResult]:
+    """Screen several images; the ONNX model (if any) runs once over all usable ones."""
+    results, usable = [], []
+    for data in images:
+        try:
+            rgb = load_rgb(data)
+        except Exception:
+            results.append(TriageResult(False, "unreadable"))
+            continue
+        result = check_quality(rgb)
+        if result.usable:
+            result.labels, result.cues = heuristic_labels(colour_fractions(rgb[::2, ::2]))  # shares need no more pixels
+            usable.append((result, rgb))
+        results.append(result)
+    model = get_classifier()
+    if model is not None and usable:
+        try:
+            for (result, _), labels in zip(usable, model.predict([rgb for _, rgb in usable])):
+                result.labels = labels
+        except Exception:
+            pass  # keep the heuristic labels
+    return results
+
+
+def triage(image_bytes: bytes) -> TriageResult:
+    return triage_many([image_bytes])[0]
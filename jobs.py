@@ -0,0 +1,288 @@
+# -------------------------------------------------
+# CropCare - background document jobs
+# -------------------------------------------------
+# Long PDF analyses (OCR + summary) run as jobs on local worker threads
+# instead of inside a Streamlit request. The queue, per-page progress and
+# per-page OCR checkpoints live in SQLite, so:
+#   * a browser that reconnects can resume by job id,
+#   * several app processes on one box share the queue without a broker,
+#   * a job interrupted by a crash is picked up again and only OCRs the
+#     pages that were not checkpointed yet.
+# Finished jobs stay pollable for `ttl`; workers sweep older ones, their
+# leftover checkpoints and any uploaded input no queued or running job needs.
+import os, time, uuid, sqlite3, threading, logging
+from contextlib import contextmanager
+
+import cropcare_core as core
+from batch import NamedBytesIO
+from result_cache import DEFAULT_CACHE_DIR, content_hash
+
+JOB_WORKERS = int(os.getenv("CROPCARE_JOB_WORKERS", "2"))
+STALE_AFTER = 300.0   # a running job with no progress for this long is assumed dead and re-queued
+HEARTBEAT = 60.0      # how often a live job bumps `updated`, so long summaries are not mistaken for dead ones
+RETRY_DELAY = 30.0    # wait before re-running a job whose PDF had pages that failed OCR
+POLL_INTERVAL = 0.5
+JOB_TTL = float(os.getenv("CROPCARE_JOB_TTL_HOURS", "168")) * 3600
+SWEEP_EVERY = 600.0
+
+log = logging.getLogger("cropcare.jobs")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    input_hash TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    language TEXT NOT NULL,
+    status TEXT NOT NULL,              -- queued | running | done | failed
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT NOT NULL DEFAULT '',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    doc_text TEXT,
+    summary TEXT,
+    error TEXT,                        -- failed: the reason; done: page numbers that could not be read
+    created REAL NOT NULL,
+    updated REAL NOT NULL              -- queued for a retry: the earliest time it may run
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created);
+CREATE INDEX IF NOT EXISTS jobs_input ON jobs (input_hash, language);
+CREATE TABLE IF NOT EXISTS job_pages (
+    input_hash TEXT NOT NULL,
+    page_no INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (input_hash, page_no)
+);
+"""
+
+
+class JobReporter(core.Reporter):
+    def __init__(self, queue: "JobQueue", job_id: str):
+        self.queue = queue
+        self.job_id = job_id
+
+    def progress(self, fraction: float, text: str = "") -> None:
+        self.queue._update(self.job_id, progress=round(fraction, 4), message=text)
+
+    def warning(self, message: str) -> None:
+        log.warning("job %s: %s", self.job_id, message)
+        self.queue._update(self.job_id, message=message)
+
+
+class JobQueue:
+    def __init__(self, path: str | None = None, workers: int = JOB_WORKERS, max_attempts: int = 3,
+                 ttl: float = JOB_TTL):
+        root = os.path.join(DEFAULT_CACHE_DIR, "jobs")
+        self.path = path or os.path.join(root, "jobs.sqlite")
+        self.input_dir = os.path.join(os.path.dirname(self.path), "inputs")
+        os.makedirs(self.input_dir, exist_ok=True)
+        self.max_attempts = max_attempts
+        self.ttl = ttl
+        self._local = threading.local()
+        self._last_sweep = 0.0
+        with self._db() as db:
+            db.executescript(SCHEMA)
+        self._stop = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"cropcare-job-{i}", daemon=True) for i in range(max(0, workers))
+        ]
+        for t in self._threads:
+            t.start()
+
+    # -- storage --------------------------------------------------------
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.row_factory = sqlite3.Row
+            self._local.db = db
+        return db
+
+    def _update(self, job_id: str, **fields) -> None:
+        fields.setdefault("updated", time.time())
+        cols = ", ".join(f"{k} = ?" for k in fields)
+        self._db().execute(f"UPDATE jobs SET {cols} WHERE id = ?", (*fields.values(), job_id))
+
+    def _input_path(self, input_hash: str, filename: str) -> str:
+        ext = filename.lower().rsplit(".", 1)[-1]
+        return os.path.join(self.input_dir, f"{input_hash}.{ext}")
+
+    # -- public API -----------------------------------------------------
+    def submit(self, filename: str, data: bytes, language: str) -> str:
+        """Queue analysis of `data`; an identical live (or finished) job for the same language is reused,
+        unless it finished with pages missing."""
+        input_hash = content_hash(data)
+        db = self._db()
+        row = db.execute(
+            "SELECT id FROM jobs WHERE input_hash = ? AND language = ? AND status != 'failed'"
+            " AND NOT (status = 'done' AND error IS NOT NULL) ORDER BY created DESC LIMIT 1",  # missing pages: try again
+            (input_hash, language),
+        ).fetchone()
+        if row is not None:
+            return row["id"]
+        path = self._input_path(input_hash, filename)
+        if not os.path.exists(path):
+            tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp, path)
+        job_id = uuid.uuid4().hex[:16]
+        now = time.time()
+        db.execute(
+            "INSERT INTO jobs (id, input_hash, filename, language, status, created, updated) VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+            (job_id, input_hash, filename, language, now, now),
+        )
+        return job_id
+
+    def get(self, job_id: str) -> dict | None:
+        row = self._db().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def checkpointed_pages(self, input_hash: str) -> dict[int, str]:
+        rows = self._db().execute("SELECT page_no, text FROM job_pages WHERE input_hash = ?", (input_hash,)).fetchall()
+        return {r["page_no"]: r["text"] for r in rows}
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def sweep(self, now: float | None = None) -> int:
+        """Delete jobs finished more than `ttl` ago, checkpoints no job refers to, and input files
+        no queued or running job needs (once older than STALE_AFTER, so a file written by a
+        concurrent `submit` is not taken before its row exists). Returns the number of jobs deleted."""
+        now = now or time.time()
+        self._last_sweep = now
+        db = self._db()
+        deleted = db.execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated < ?",
+                             (now - self.ttl,)).rowcount
+        db.execute("DELETE FROM job_pages WHERE input_hash NOT IN (SELECT input_hash FROM jobs)")
+        live = {r[0] for r in db.execute("SELECT DISTINCT input_hash FROM jobs WHERE status IN ('queued', 'running')")}
+        for name in os.listdir(self.input_dir):
+            if name.split(".", 1)[0] in live:
+                continue
+            path = os.path.join(self.input_dir, name)
+            try:
+                if os.path.getmtime(path) < now - STALE_AFTER:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+        return deleted
+
+    # -- workers --------------------------------------------------------
+    def _claim(self) -> dict | None:
+        db = self._db()
+        now = time.time()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            # Jobs whose worker died (no progress for STALE_AFTER) go back in the queue.
+            db.execute(
+                "UPDATE jobs SET status = 'queued' WHERE status = 'running' AND updated < ?",
+                (now - STALE_AFTER,),
+            )
+            row = db.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' AND updated <= ? ORDER BY created LIMIT 1", (now,)
+            ).fetchone()
+            if row is not None:
+                db.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, updated = ? WHERE id = ?",
+                    (now, row["id"]),
+                )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return dict(row) if row is not None else None
+
+    def _worker(self) -> None:
+        while not self._stop.is_set():
+            if time.time() - self._last_sweep > SWEEP_EVERY:
+                try:
+                    self.sweep()
+                except (sqlite3.Error, OSError) as e:
+                    log.warning("job sweep failed: %s", e)
+            try:
+                job = self._claim()
+            except sqlite3.Error as e:
+                log.warning("job queue unavailable: %s", e)
+                job = None
+            if job is None:
+                self._stop.wait(POLL_INTERVAL)
+                continue
+            self._run(job)
+
+    @contextmanager
+    def _heartbeat(self, job_id: str):
+        """Keep `updated` fresh while the job runs, including stretches that report no progress
+        (the map-reduce summary, 429 backoff)."""
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(HEARTBEAT):
+                try:
+                    self._db().execute("UPDATE jobs SET updated = ? WHERE id = ? AND status = 'running'",
+                                       (time.time(), job_id))
+                except sqlite3.Error as e:
+                    log.warning("job %s heartbeat failed: %s", job_id, e)
+
+        thread = threading.Thread(target=beat, name=f"cropcare-job-heartbeat-{job_id}", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def _run(self, job: dict) -> None:
+        if job["attempts"] >= self.max_attempts:
+            self._update(job["id"], status="failed", error="Gave up after repeated interruptions")
+            return
+        with self._heartbeat(job["id"]):
+            self._process(job)
+
+    def _process(self, job: dict) -> None:
+        job_id, input_hash = job["id"], job["input_hash"]
+        try:
+            with open(self._input_path(input_hash, job["filename"]), "rb") as fh:
+                data = fh.read()
+            reporter = JobReporter(self, job_id)
+            done_pages = self.checkpointed_pages(input_hash)
+            db = self._db()
+
+            def save_page(page_no: int, text: str) -> None:
+                db.execute(
+                    "INSERT OR REPLACE INTO job_pages (input_hash, page_no, text) VALUES (?, ?, ?)",
+                    (input_hash, page_no, text),
+                )
+
+            failed_pages: list[int] = []
+            text = core.extract_text(NamedBytesIO(data, job["filename"]), reporter, done_pages=done_pages,
+                                     on_page=save_page, on_failed_page=lambda page_no, error: failed_pages.append(page_no))
+            if failed_pages and job["attempts"] + 1 < self.max_attempts:
+                # Usually a transient API error; the pages read so far are checkpointed, so only these are redone.
+                self._update(job_id, status="queued", message=f"Retrying {len(failed_pages)} unreadable page(s)…",
+                             updated=time.time() + RETRY_DELAY)
+                return
+            if not text:
+                self._update(job_id, status="failed", error="No readable text found in the uploaded file.")
+                return
+            self._update(job_id, progress=1.0, message="Generating analysis…", doc_text=text)
+            summary = core.summarize_document(text, job["language"])
+            missing = ", ".join(map(str, sorted(failed_pages))) or None
+            self._update(job_id, status="done", summary=summary, message="", error=missing)
+            if not failed_pages:
+                # The finished text is in the result cache now; page checkpoints are no longer needed.
+                # With pages missing it was not cached, and the checkpoints spare a later upload the OCR.
+                db.execute("DELETE FROM job_pages WHERE input_hash = ?", (input_hash,))
+        except Exception as e:
+            log.exception("job %s failed", job_id)
+            self._update(job_id, status="failed", error=str(e))
+
+
+_queue: JobQueue | None = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
@@ -0,0 +1,177 @@
+# -------------------------------------------------
+# CropCare - lightweight instrumentation
+# -------------------------------------------------
+# Stages (model calls, PDF rendering, OCR, TTS, ...) are timed with `span`
+# or `@timed`. Each stage keeps a Prometheus-style latency histogram, an
+# error count, free-form counters (payload bytes, tokens, cache hits) and a
+# window of recent samples for p50/p95. Everything is in-process and
+# lock-protected; `prometheus()` renders the text exposition format for
+# GET /metrics and `summary()` feeds the admin panel in the app.
+import time, inspect, threading, functools
+from collections import deque
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+SAMPLE_WINDOW = 1024  # recent samples kept per stage for percentiles
+
+
+class StageStats:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.recent: deque[float] = deque(maxlen=SAMPLE_WINDOW)
+        self.counters: dict[str, float] = {}
+
+    def observe(self, seconds: float, ok: bool) -> None:
+        self.count += 1
+        self.errors += 0 if ok else 1
+        self.total += seconds
+        self.recent.append(seconds)
+        for i, le in enumerate(LATENCY_BUCKETS):
+            if seconds <= le:
+                self.buckets[i] += 1
+
+    def percentile(self, q: float) -> float:
+        samples = sorted(self.recent)
+        if not samples:
+            return 0.0
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+class Registry:
+    def __init__(self):
+        self._stages: dict[str, StageStats] = {}
+        self._collectors: list = []
+        self._lock = threading.Lock()
+
+    def _stage(self, stage: str) -> StageStats:
+        st = self._stages.get(stage)
+        if st is None:
+            st = self._stages[stage] = StageStats()
+        return st
+
+    def observe(self, stage: str, seconds: float, ok: bool = True, **counts) -> None:
+        with self._lock:
+            st = self._stage(stage)
+            st.observe(seconds, ok)
+            for name, value in counts.items():
+                st.counters[name] = st.counters.get(name, 0) + value
+
+    def count(self, stage: str, name: str, value: float = 1) -> None:
+        with self._lock:
+            st = self._stage(stage)
+            st.counters[name] = st.counters.get(name, 0) + value
+
+    def register_collector(self, fn) -> None:
+        """`fn() -> {name: value}` is read at export time (gauges such as cache size)."""
+        self._collectors.append(fn)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+
+    def summary(self) -> list[dict]:
+        """One row per stage with call counts, p50/p95 (seconds) and counters."""
+        with self._lock:
+            return [
+                {"stage": name, "count": st.count, "errors": st.errors,
+                 "p50": round(st.percentile(0.50), 4), "p95": round(st.percentile(0.95), 4),
+                 "mean": round(st.total / st.count, 4) if st.count else 0.0, **st.counters}
+                for name, st in sorted(self._stages.items())
+            ]
+
+    def prometheus(self) -> str:
+        lines = [
+            "# HELP cropcare_stage_seconds Time spent per pipeline stage.",
+            "# TYPE cropcare_stage_seconds histogram",
+        ]
+        counters: dict[str, list[str]] = {}
+        with self._lock:
+            for name, st in sorted(self._stages.items()):
+                label = f'stage="{name}"'
+                for le, n in zip(LATENCY_BUCKETS, st.buckets):
+                    lines.append(f'cropcare_stage_seconds_bucket{{{label},le="{le}"}} {n}')
+                lines.append(f'cropcare_stage_seconds_bucket{{{label},le="+Inf"}} {st.count}')
+                lines.append(f"cropcare_stage_seconds_sum{{{label}}} {st.total:.6f}")
+                lines.append(f"cropcare_stage_seconds_count{{{label}}} {st.count}")
+                counters.setdefault("stage_errors", []).append(f"{{{label}}} {st.errors}")
+                for cname, value in sorted(st.counters.items()):
+                    counters.setdefault(cname, []).append(f"{{{label}}} {value:g}")
+        for cname, samples in counters.items():
+            lines.append(f"# TYPE cropcare_{cname}_total counter")
+            lines.extend(f"cropcare_{cname}_total{s}" for s in samples)
+        for fn in self._collectors:
+            try:
+                gauges = fn()
+            except Exception:
+                continue
+            for gname, value in gauges.items():
+                lines.append(f"# TYPE cropcare_{gname} gauge")
+                lines.append(f"cropcare_{gname} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class Span:
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.counts: dict[str, float] = {}
+
+    def add(self, **counts) -> None:
+        for name, value in counts.items():
+            self.counts[name] = self.counts.get(name, 0) + value
+
+
+@contextmanager
+def span(stage: str, registry: Registry | None = None):
+    """Time the block as `stage`; `sp.add(payload_bytes=..., ...)` attaches counters to it."""
+    sp = Span(stage)
+    ok = True
+    start = time.perf_counter()
+    try:
+        yield sp
+    except GeneratorExit:  # a consumer stopped reading a stream early; not a failure
+        raise
+    except BaseException:
+        ok = False
+        raise
+    finally:
+        (registry or REGISTRY).observe(stage, time.perf_counter() - start, ok, **sp.counts)
+
+
+def timed(stage: str, stream_arg: str | None = None):
+    """Decorator form of `span` for functions whose work finishes before they return.
+
+    For functions that return an iterator when `stream_arg` (e.g. "stream") is true, only the
+    non-streaming calls are timed; streamed work happens while the caller iterates and is
+    measured by the `stream.*` spans.
+    """
+    def decorate(fn):
+        sig = inspect.signature(fn) if stream_arg else None
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if sig is not None:
+                bound = sig.bind_partial(*args, **kwargs)
+                if bound.arguments.get(stream_arg, sig.parameters[stream_arg].default):
+                    return fn(*args, **kwargs)
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(stage: str, name: str, value: float = 1) -> None:
+    REGISTRY.count(stage, name, value)
+
+
+def summary() -> list[dict]:
+    return REGISTRY.summary()
+
+
+def prometheus() -> str:
+    return REGISTRY.prometheus()
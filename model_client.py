@@ -0,0 +1,513 @@
+# -------------------------------------------------
+# CropCare - resilient model client
+# -------------------------------------------------
+# Every generate_content call goes through ModelClient, which adds a per-call
+# deadline, retries with jittered exponential backoff, a process-wide token
+# bucket (shared by all sessions), a circuit breaker, and optional hedging.
+# Identical requests already in flight (same prompt, images and config) are
+# coalesced: followers wait for the leader's upstream call and share it.
+# FakeModel stands in for genai.GenerativeModel so all of it runs offline.
+import os, json, time, random, hashlib, threading, itertools
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from metrics import span, count, REGISTRY
+from summarizer import estimate_tokens
+
+MODEL_TIMEOUT = float(os.getenv("CROPCARE_MODEL_TIMEOUT", "60"))
+MODEL_RETRIES = int(os.getenv("CROPCARE_MODEL_RETRIES", "3"))
+MODEL_RPS = float(os.getenv("CROPCARE_MODEL_RPS", "5"))        # sustained requests/second for the process
+MODEL_BURST = int(os.getenv("CROPCARE_MODEL_BURST", "10"))
+VISION_HEDGE_AFTER = float(os.getenv("CROPCARE_VISION_HEDGE_AFTER", "8"))  # 0 disables hedging
+COALESCE = os.getenv("CROPCARE_MODEL_COALESCE", "1") != "0"
+
+# Exception class names (google.api_core / requests / grpc) worth retrying.
+RETRYABLE_ERRORS = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "DeadlineExceeded",
+    "InternalServerError", "GatewayTimeout", "Timeout", "ConnectionError", "UpstreamTimeoutError",
+}
+
+
+class ModelUnavailableError(RuntimeError):
+    """Raised without calling upstream while the circuit breaker is open."""
+
+
+class UpstreamTimeoutError(TimeoutError):
+    """Upstream did not answer before the deadline (counted as a failure by the circuit breaker)."""
+
+
+def is_retryable(exc: Exception) -> bool:
+    if type(exc).__name__ in RETRYABLE_ERRORS:
+        return True
+    msg = str(exc).lower()
+    return "429" in msg or "rate limit" in msg or "quota" in msg
+
+
+def backoff_delay(attempt: int, base_delay: float = 1.0, max_delay: float = 30.0) -> float:
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+def prompt_text(contents) -> str:
+    if isinstance(contents, str):
+        return contents
+    if isinstance(contents, (list, tuple)):
+        return "\n".join(p for p in contents if isinstance(p, str))
+    return ""
+
+
+def payload_bytes(contents) -> int:
+    """Approximate request size: text parts plus (base64) inline image data."""
+    if isinstance(contents, str):
+        return len(contents.encode("utf-8"))
+    if isinstance(contents, dict):
+        return len(contents.get("data") or b"")
+    if isinstance(contents, (list, tuple)):
+        return sum(payload_bytes(p) for p in contents)
+    return 0
+
+
+def usage_counts(contents, response) -> dict[str, int]:
+    """Token counts from the response's usage metadata, or estimated when the backend has none."""
+    usage = getattr(response, "usage_metadata", None)
+    prompt = getattr(usage, "prompt_token_count", 0) or estimate_tokens(prompt_text(contents))
+    reply = getattr(usage, "candidates_token_count", 0)
+    if not reply:
+        try:
+            reply = estimate_tokens(response.text)
+        except Exception:
+            reply = 0
+    return {"prompt_tokens": prompt, "response_tokens": reply}
+
+
+def request_key(name: str, contents, kwargs: dict) -> str:
+    """Hash of everything that determines the response: client, text parts, inline images, config."""
+    h = hashlib.sha256(name.encode("utf-8"))
+    for part in contents if isinstance(contents, (list, tuple)) else [contents]:
+        if isinstance(part, str):
+            h.update(b"\0t" + part.encode("utf-8"))
+        elif isinstance(part, dict):
+            data = part.get("data") or b""
+            h.update(b"\0i" + str(part.get("mime_type")).encode("utf-8"))
+            h.update(data if isinstance(data, bytes) else str(data).encode("utf-8"))
+        else:
+            h.update(b"\0r" + repr(part).encode("utf-8"))
+    h.update(json.dumps(kwargs, sort_keys=True, default=repr).encode("utf-8"))
+    return h.hexdigest()
+
+
+# -------------------------------------------------
+# Request coalescing
+# -------------------------------------------------
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+        self.started = time.monotonic()
+
+
+class SharedStream:
+    """Replays one upstream stream to any number of readers. Whichever reader is furthest
+    ahead pulls the next chunk, so the stream keeps going as long as anyone reads it."""
+
+    def __init__(self, source, on_done=None):
+        self._source = source
+        self._chunks: list = []
+        self._done = False
+        self._error: BaseException | None = None
+        self._pump = threading.Lock()
+        self._on_done = on_done
+
+    def __iter__(self):
+        i = 0
+        while True:
+            if i < len(self._chunks):
+                yield self._chunks[i]
+                i += 1
+                continue
+            with self._pump:
+                if i < len(self._chunks):
+                    continue
+                if self._done:
+                    break
+                try:
+                    self._chunks.append(next(self._source))
+                except StopIteration:
+                    self._finish()
+                except Exception as e:
+                    self._error = e
+                    self._finish()
+        if self._error is not None:
+            raise self._error
+
+    def _finish(self) -> None:
+        self._done = True
+        if self._on_done:
+            self._on_done()
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share one execution and its result or exception."""
+
+    def __init__(self):
+        self._flights: dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn, wait_timeout: float, max_age: float, stream: bool = False):
+        """Returns (result, shared). Raises TimeoutError if a follower waits longer than `wait_timeout`.
+        Streams stay joinable until they finish (or `max_age`), replaying from the first chunk."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None or time.monotonic() - flight.started > max_age
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            if not flight.done.wait(wait_timeout):
+                raise TimeoutError("deadline exceeded waiting for an identical in-flight request")
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+        try:
+            result = fn()
+            if stream:
+                result = SharedStream(result, on_done=lambda: self._forget(key, flight))
+            flight.result = result
+        except BaseException as e:
+            flight.error = e
+            self._forget(key, flight)
+            raise
+        finally:
+            flight.done.set()
+        if not stream:
+            self._forget(key, flight)
+        return result, False
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+
+# -------------------------------------------------
+# Rate limiting / circuit breaking
+# -------------------------------------------------
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float | None = None) -> bool:
+        """Block until a token is available; False if `timeout` elapses first."""
+        end = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait_for = (1 - self._tokens) / self.rate
+            if end is not None and time.monotonic() + wait_for > end:
+                return False
+            time.sleep(wait_for)
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures; lets one probe through after `reset_after` seconds."""
+
+    def __init__(self, threshold: int = 5, reset_after: float = 30.0):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.reset_after else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def release(self) -> None:
+        """End a call that says nothing about upstream health (e.g. a 4xx) without counting it either way."""
+        with self._lock:
+            self._probing = False
+
+    def record(self, ok: bool) -> None:
+        with self._lock:
+            self._probing = False
+            if ok:
+                self.failures, self.opened_at = 0, None
+                return
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+# -------------------------------------------------
+# Client
+# -------------------------------------------------
+_hedge_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="cropcare-hedge")
+
+
+class ModelClient:
+    """Drop-in for GenerativeModel.generate_content with deadlines, retries, limits and hedging."""
+
+    def __init__(self, model=None, *, factory=None, name: str = "model", timeout: float = MODEL_TIMEOUT,
+                 retries: int = MODEL_RETRIES, limiter: TokenBucket | None = None, breaker: CircuitBreaker | None = None,
+                 hedge_after: float = 0.0, coalesce: bool = COALESCE):
+        self._model = model
+        self._factory = factory  # builds the model on first use, so importing the app stays cheap
+        self._model_lock = threading.Lock()
+        self.name = name
+        self.timeout = timeout
+        self.retries = retries
+        self.limiter = limiter
+        self.breaker = breaker or CircuitBreaker()
+        self.hedge_after = hedge_after
+        self._flights = SingleFlight() if coalesce else None
+        self.stats = {"calls": 0, "retries": 0, "failures": 0, "hedges": 0, "hedges_skipped": 0, "rejected": 0,
+                      "coalesced": 0, "coalesce_timeouts": 0}
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self._factory()
+        return self._model
+
+    @model.setter
+    def model(self, value) -> None:
+        self._model = value
+
+    def generate_content(self, contents, *, stream: bool = False, timeout: float | None = None, **kwargs):
+        # Streams are timed to the first chunk; their token counts are added when the stream ends.
+        stage = f"model.{self.name}.first_chunk" if stream else f"model.{self.name}"
+        with span(stage) as sp:
+            sp.add(payload_bytes=payload_bytes(contents))
+            if self._flights is None:
+                result, shared = self._generate(contents, stream, timeout, **kwargs), False
+            else:
+                result, shared = self._coalesced(contents, stream, timeout, **kwargs)
+            if shared:
+                sp.add(coalesced=1)  # no upstream usage of its own
+                return iter(result) if stream else result
+            if stream:
+                return self._count_stream(stage, contents, result)
+            sp.add(**usage_counts(contents, result))
+            return result
+
+    def _coalesced(self, contents, stream: bool, timeout: float | None, **kwargs):
+        key = request_key(f"{self.name}:{stream}", contents, kwargs)
+        try:
+            result, shared = self._flights.do(key, lambda: self._generate(contents, stream, timeout, **kwargs),
+                                              wait_timeout=timeout or self.timeout, max_age=self.timeout, stream=stream)
+        except TimeoutError:
+            self.stats["coalesce_timeouts"] += 1
+            raise
+        if shared:
+            self.stats["coalesced"] += 1
+        return result, shared
+
+    def _generate(self, contents, stream: bool, timeout: float | None, **kwargs):
+        deadline = time.monotonic() + (timeout or self.timeout)
+        for attempt in range(self.retries + 1):
+            if not self.breaker.allow():
+                self.stats["rejected"] += 1
+                raise ModelUnavailableError(f"{self.name}: upstream marked unavailable after repeated failures")
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or (self.limiter and not self.limiter.acquire(timeout=remaining)):
+                self.breaker.release()  # our own budget ran out; not an upstream result
+                raise TimeoutError(f"{self.name}: deadline exceeded waiting for rate limiter")
+            try:
+                self.stats["calls"] += 1
+                if stream:
+                    result = self._stream(contents, deadline, **kwargs)
+                elif self.hedge_after and self.hedge_after < remaining:
+                    result = self._hedged(contents, deadline, **kwargs)
+                else:
+                    result = self._call(contents, deadline, **kwargs)
+                self.breaker.record(True)
+                return result
+            except Exception as e:
+                retryable = is_retryable(e)
+                if retryable:
+                    self.breaker.record(False)
+                else:
+                    self.breaker.release()  # 4xx-style errors say nothing about upstream health
+                pause = backoff_delay(attempt)
+                if not retryable or attempt == self.retries or time.monotonic() + pause >= deadline:
+                    self.stats["failures"] += 1
+                    raise
+                self.stats["retries"] += 1
+                time.sleep(pause)
+
+    @staticmethod
+    def _count_stream(stage: str, contents, chunks):
+        parts = []
+        for chunk in chunks:
+            try:
+                parts.append(chunk.text or "")
+            except ValueError:  # chunk without text parts (e.g. safety block)
+                pass
+            yield chunk
+        count(stage, "prompt_tokens", estimate_tokens(prompt_text(contents)))
+        count(stage, "response_tokens", estimate_tokens("".join(parts)))
+
+    def _call(self, contents, deadline: float, **kwargs):
+        remaining = max(deadline - time.monotonic(), 0.1)
+        return self.model.generate_content(contents, request_options={"timeout": remaining}, **kwargs)
+
+    def _stream(self, contents, deadline: float, **kwargs):
+        # Retries apply until the first chunk arrives; after that the caller already shows partial output.
+        response = self._call(contents, deadline, stream=True, **kwargs)
+        it = iter(response)
+        try:
+            first = next(it)
+        except StopIteration:
+            return iter(())
+        return itertools.chain([first], it)
+
+    def _hedged(self, contents, deadline: float, **kwargs):
+        """Send a duplicate request if the first is slower than `hedge_after`; first success wins."""
+        primary = _hedge_pool.submit(self._call, contents, deadline, **kwargs)
+        done, _ = wait([primary], timeout=self.hedge_after)
+        if done:
+            return primary.result()
+        pending = {primary}
+        # The duplicate is a real upstream request: it needs a token too, and is skipped if none is free now.
+        if self.limiter is None or self.limiter.acquire(timeout=0):
+            self.stats["hedges"] += 1
+            pending.add(_hedge_pool.submit(self._call, contents, deadline, **kwargs))
+        else:
+            self.stats["hedges_skipped"] += 1
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(deadline - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+            if not done:
+                raise UpstreamTimeoutError(f"{self.name}: deadline exceeded")
+            for fut in done:
+                if fut.exception() is None:
+                    return fut.result()
+                error = fut.exception()
+        raise error
+
+
+# -------------------------------------------------
+# Offline fake backend
+# -------------------------------------------------
+class FakeError(Exception):
+    pass
+
+
+class ResourceExhausted(FakeError):
+    """Named like google.api_core's 429 error so retry classification treats it the same."""
+
+
+class ServiceUnavailable(FakeError):
+    pass
+
+
+class DeadlineExceeded(FakeError):
+    pass
+
+
+class FakeChunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeResponse:
+    def __init__(self, text: str, chunk_size: int = 40, chunk_delay: float = 0.0):
+        self.text = text
+        self._chunk_size = chunk_size
+        self._chunk_delay = chunk_delay
+
+    def __iter__(self):
+        for i in range(0, len(self.text), self._chunk_size):
+            if self._chunk_delay:
+                time.sleep(self._chunk_delay)
+            yield FakeChunk(self.text[i:i + self._chunk_size])
+
+
+class FakeModel:
+    """Deterministic stand-in for genai.GenerativeModel with a configurable latency/failure profile."""
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.0, rate_limit_rate: float = 0.0,
+                 failure_rate: float = 0.0, chunk_delay: float = 0.0, response_fn=None, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_rate = rate_limit_rate
+        self.failure_rate = failure_rate
+        self.chunk_delay = chunk_delay
+        self.response_fn = response_fn or self.default_response
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def default_response(contents, generation_config=None) -> str:
+        cfg = generation_config or {}
+        if isinstance(cfg, dict) and cfg.get("response_mime_type") == "application/json":
+            return '{"diagnosis": "Fake diagnosis: healthy leaf.", "extracted_text": "FAKE OCR TEXT"}'
+        prompt = contents[0] if isinstance(contents, list) else contents
+        if isinstance(contents, list) and "Extract all text" in str(prompt):
+            return "FAKE OCR TEXT"
+        return f"Fake answer ({len(str(prompt))} prompt chars)."
+
+    def generate_content(self, contents, *, stream: bool = False, generation_config=None, request_options=None, **_):
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            roll = self._rng.random()
+        timeout = (request_options or {}).get("timeout")
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise DeadlineExceeded("fake request timed out")
+        time.sleep(delay)
+        if roll < self.rate_limit_rate:
+            raise ResourceExhausted("429 fake quota exceeded")
+        if roll < self.rate_limit_rate + self.failure_rate:
+            raise ServiceUnavailable("503 fake backend unavailable")
+        return FakeResponse(self.response_fn(contents, generation_config), chunk_delay=self.chunk_delay)
+
+
+# -------------------------------------------------
+# Process-wide registry
+# -------------------------------------------------
+_shared_limiter = TokenBucket(MODEL_RPS, MODEL_BURST)
+_clients: dict[str, ModelClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(name: str, factory, **options) -> ModelClient:
+    """Create the named client once per process; all sessions share it and the rate limiter.
+    `factory()` runs on the first model call, not here."""
+    with _clients_lock:
+        client = _clients.get(name)
+        if client is None:
+            if os.getenv("CROPCARE_MODEL_BACKEND") == "fake":
+                factory = FakeModel
+            client = ModelClient(factory=factory, name=name, limiter=_shared_limiter, **options)
+            _clients[name] = client
+            REGISTRY.register_collector(lambda: {f"model_{name}_{k}": v for k, v in client.stats.items()})
+        return client
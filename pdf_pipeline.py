@@ -0,0 +1,196 @@
+# -------------------------------------------------
+# CropCare - streaming PDF extraction pipeline
+# -------------------------------------------------
+# `iter_pdf_pages` walks a PDF one page at a time and yields each page's text
+# in page order. Every page is classified on its own (`classify_page`):
+# pages with a usable text layer are read straight from PyPDF2; the rest are
+# rendered by poppler into a temp directory (one page per call,
+# `paths_only`) and OCR'd on a bounded thread pool, so mixed documents
+# (typed report + scanned lab sheets) only pay OCR for the scanned pages.
+# At most `window` page images exist at once, so peak memory depends on the
+# concurrency limit and not on the page count.
+import os, io, tempfile, unicodedata
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from PIL import Image
+
+from image_prep import prepare_pil
+from metrics import timed
+
+OCR_WORKERS = int(os.getenv("CROPCARE_OCR_WORKERS", "4"))
+OCR_DPI = 200  # 200 dpi is a good balance between legibility and payload size
+PAGE_BREAK = "\n\n--- Page Break ---\n\n"
+MIN_PAGE_CHARS = 20        # fewer extractable characters than this and the page is always OCR'd
+MIN_TEXT_DENSITY = 5.0     # chars per square inch; a typed A4 page has ~30, a stray header line < 1
+SCAN_COVERAGE = 0.6        # images covering this much of the page + sparse text => a scan with a text stamp
+MIN_WORD_CHAR_RATIO = 0.5  # below this the text layer is likely broken font encoding, not words
+
+
+@dataclass
+class PdfPage:
+    page_no: int          # 1-based
+    total: int
+    text: str
+    source: str           # "text" | "ocr" | "checkpoint" | "error"
+    error: Exception | None = None
+
+
+def pdf_page_count(pdf_bytes: bytes) -> int:
+    import pdf2image
+    return int(pdf2image.pdfinfo_from_bytes(pdf_bytes)["Pages"])
+
+
+def open_pdf(pdf_bytes: bytes):
+    """PyPDF2 reader, or None if the file has no parseable structure (poppler may still render it)."""
+    import PyPDF2
+    try:
+        return PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    except Exception:
+        return None
+
+
+def page_text(page) -> str:
+    try:
+        return (page.extract_text() or "").strip()
+    except Exception:
+        return ""
+
+
+def image_coverage(page) -> float:
+    """Fraction of the page area painted by image XObjects (0..1).
+
+    Only the determinant of the transformation matrix is tracked: the unit
+    square an image is drawn into has area |det(CTM)|, which is all we need.
+    """
+    from PyPDF2.generic import ContentStream
+    try:
+        resources = page.get("/Resources") or {}
+        xobjects = resources.get("/XObject") or {}
+        images = {name for name, ref in xobjects.items() if ref.get_object().get("/Subtype") == "/Image"}
+        if not images:
+            return 0.0
+        box = page.mediabox
+        page_area = float(box.width) * float(box.height)
+        stack, det, painted = [], 1.0, 0.0
+        for operands, op in ContentStream(page.get_contents(), page.pdf).operations:
+            if op == b"q":
+                stack.append(det)
+            elif op == b"Q":
+                det = stack.pop() if stack else 1.0
+            elif op == b"cm":
+                a, b, c, d = (float(x) for x in operands[:4])
+                det *= a * d - b * c
+            elif op == b"Do" and operands and operands[0] in images:
+                painted += abs(det)
+        return min(painted / page_area, 1.0) if page_area > 0 else 0.0
+    except Exception:
+        return 0.0
+
+
+@timed("pdf.classify")
+def classify_page(page) -> tuple[str, str]:
+    """Return ("text", text) if the page's text layer is usable, else ("scanned", "")."""
+    text = page_text(page)
+    if len(text) < MIN_PAGE_CHARS:
+        return "scanned", ""
+    visible = [ch for ch in text if not ch.isspace()]
+    # Letters, digits and combining marks (Indic vowel signs) count as words.
+    word_chars = sum(unicodedata.category(ch)[0] in "LNM" for ch in visible)
+    if word_chars / max(len(visible), 1) < MIN_WORD_CHAR_RATIO:
+        return "scanned", ""
+    box = page.mediabox
+    area_sq_in = max(float(box.width) * float(box.height) / (72 * 72), 1.0)
+    if len(text) / area_sq_in < MIN_TEXT_DENSITY and image_coverage(page) >= SCAN_COVERAGE:
+        return "scanned", ""
+    return "text", text
+
+
+@timed("pdf.render")
+def render_page(pdf_path: str, page_no: int, out_dir: str, dpi: int = OCR_DPI) -> str | None:
+    """Render a single 1-based page to an image file in `out_dir` and return its path."""
+    import pdf2image
+    paths = pdf2image.convert_from_path(
+        pdf_path, dpi=dpi, first_page=page_no, last_page=page_no, output_folder=out_dir,
+        output_file=f"page-{page_no}", single_file=True, fmt="png", paths_only=True,
+    )
+    return paths[0] if paths else None
+
+
+def page_to_jpeg(img) -> bytes:
+    return prepare_pil(img, task="ocr").data
+
+
+def iter_pdf_pages(pdf_bytes: bytes, ocr_page, *, done_pages: dict[int, str] | None = None,
+                   max_workers: int = OCR_WORKERS, dpi: int = OCR_DPI, window: int | None = None):
+    """Yield a PdfPage per page, in page order, as soon as it and every earlier page is ready.
+
+    `ocr_page(jpeg_bytes) -> str` runs on worker threads for pages without a
+    text layer and may raise (retries belong to the model client); a failed
+    page is yielded with source "error". Pages in `done_pages` (previously
+    checkpointed OCR text) are yielded as-is without rendering.
+    """
+    done_pages = done_pages or {}
+    reader = open_pdf(pdf_bytes)
+    total = len(reader.pages) if reader is not None else pdf_page_count(pdf_bytes)
+    window = max(1, window or max_workers * 2)
+
+    with tempfile.TemporaryDirectory(prefix="cropcare-pdf-") as tmp:
+        pdf_path = os.path.join(tmp, "input.pdf")
+        rendered = False
+
+        def ocr(page_no: int) -> str:
+            path = render_page(pdf_path, page_no, tmp, dpi=dpi)
+            if path is None:
+                return ""
+            try:
+                with Image.open(path) as img:
+                    data = page_to_jpeg(img)
+            finally:
+                os.remove(path)  # release the bitmap before the (slow) network call
+            return ocr_page(data)
+
+        pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="cropcare-ocr")
+        pending: deque = deque()  # (page_no, ready PdfPage | Future), in page order
+        in_flight = 0
+
+        def pop() -> PdfPage:
+            nonlocal in_flight
+            n, item = pending.popleft()
+            if isinstance(item, PdfPage):
+                return item
+            in_flight -= 1
+            try:
+                return PdfPage(n, total, item.result() or "", "ocr")
+            except Exception as e:
+                return PdfPage(n, total, "", "error", e)
+
+        try:
+            for n in range(1, total + 1):
+                if n in done_pages:
+                    pending.append((n, PdfPage(n, total, done_pages[n], "checkpoint")))
+                else:
+                    kind, text = classify_page(reader.pages[n - 1]) if reader is not None else ("scanned", "")
+                    if kind == "text":
+                        pending.append((n, PdfPage(n, total, text, "text")))
+                    else:
+                        if not rendered:
+                            with open(pdf_path, "wb") as fh:
+                                fh.write(pdf_bytes)
+                            rendered = True
+                        while in_flight >= window:
+                            yield pop()
+                        pending.append((n, pool.submit(ocr, n)))
+                        in_flight += 1
+                # Ready pages at the head of the line can go out right away.
+                while pending and (isinstance(pending[0][1], PdfPage) or pending[0][1].done()):
+                    yield pop()
+            while pending:
+                yield pop()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+def join_pages(results: dict[int, str]) -> str:
+    return PAGE_BREAK.join(results[n] for n in sorted(results) if results[n]).strip()
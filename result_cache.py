@@ -0,0 +1,184 @@
+# -------------------------------------------------
+# CropCare - content-addressed result cache
+# -------------------------------------------------
+# Two tiers: an in-process LRU (fast, per server process) and a SQLite file
+# (survives restarts, shared by every session and worker process on the box).
+# Keys are SHA-256 digests, so identical uploads map to the same entry no
+# matter which session or file name they came from.
+#
+# The memory tier has its own lock, so its hits never wait on SQLite. The
+# disk tier keeps a running byte total and evicts in one indexed pass:
+# every EVICT_EVERY seconds, or when the total passes the cap. LRU eviction
+# goes down to EVICT_TO of the cap, so the next writes don't evict again.
+import os, time, sqlite3, hashlib, threading
+from collections import OrderedDict
+
+EVICT_EVERY = 300.0  # seconds between TTL sweeps (and resyncs of the byte total with other processes)
+EVICT_TO = 0.9       # LRU eviction target, as a fraction of max_disk_bytes
+EVICT_BATCH = 500
+
+DEFAULT_CACHE_DIR = os.getenv("CROPCARE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+
+
+def content_hash(data: bytes | str) -> str:
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def make_key(data: bytes | str, *, language: str = "", mode: str = "", prompt_version: str = "", model: str = "", extra: str = "") -> str:
+    """Cache key for one model/extraction result over `data`."""
+    parts = [content_hash(data), language, mode, prompt_version, model, extra]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """LRU + TTL memory tier in front of a size-capped SQLite tier."""
+
+    def __init__(self, path: str | None = None, max_entries: int = 512, ttl: float = 7 * 24 * 3600,
+                 max_disk_bytes: int = 256 * 1024 * 1024):
+        self.path = path if path is not None else os.path.join(DEFAULT_CACHE_DIR, "results.sqlite")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_bytes = max_disk_bytes
+        self._mem: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()     # memory tier and stats
+        self._db_lock = threading.Lock()  # the SQLite connection; may take _lock inside, never the reverse
+        self.stats = {"hits": 0, "misses": 0, "memory_hits": 0, "disk_hits": 0, "evictions": 0}
+        self._db = None
+        self._disk_bytes = 0
+        self._next_sweep = 0.0
+        if self.path:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.executescript(
+                    "CREATE TABLE IF NOT EXISTS results ("
+                    " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+                    " created REAL NOT NULL, accessed REAL NOT NULL);"
+                    "CREATE INDEX IF NOT EXISTS results_created ON results (created);"
+                    "CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed);"
+                )
+                self._db.commit()
+                self._disk_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+            except sqlite3.Error:
+                # Read-only or full disk: degrade to memory-only rather than failing the app.
+                self._db = None
+
+    # -- lookups --------------------------------------------------------
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit is not None:
+                created, value = hit
+                if now - created <= self.ttl:
+                    self._mem.move_to_end(key)
+                    self.stats["hits"] += 1
+                    self.stats["memory_hits"] += 1
+                    return value
+                del self._mem[key]
+
+        row = None
+        if self._db is not None:
+            with self._db_lock:
+                try:
+                    row = self._db.execute("SELECT value, created, size FROM results WHERE key = ?", (key,)).fetchone()
+                    if row is not None and now - row[1] <= self.ttl:
+                        self._db.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                    elif row is not None:
+                        self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+                        self._db.commit()
+                        self._disk_bytes -= row[2]
+                        row = None
+                except sqlite3.Error:
+                    row = None
+
+        with self._lock:
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self._remember(key, row[1], row[0])
+            self.stats["hits"] += 1
+            self.stats["disk_hits"] += 1
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        if not value:
+            return
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+        if self._db is None:
+            return
+        size = len(value.encode("utf-8"))
+        with self._db_lock:
+            try:
+                old = self._db.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                    (key, value, size, now, now),
+                )
+                self._disk_bytes += size - (old[0] if old else 0)
+                if now >= self._next_sweep or self._disk_bytes > self.max_disk_bytes:
+                    self._evict_disk(now)
+                self._db.commit()
+            except sqlite3.Error:
+                pass
+
+    def get_or_compute(self, key: str, compute) -> str:
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        value = compute()
+        self.set(key, value)
+        return value
+
+    # -- eviction -------------------------------------------------------
+    def _remember(self, key: str, created: float, value: str) -> None:
+        self._mem[key] = (created, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _evict_disk(self, now: float) -> None:
+        """Expire old rows and, if over the cap, drop least-recently-used ones. Caller holds _db_lock."""
+        self._next_sweep = now + EVICT_EVERY
+        cur = self._db.execute("DELETE FROM results WHERE created < ?", (now - self.ttl,))
+        evicted = max(cur.rowcount, 0)
+        # Other processes write to the same file; the running total is only this process's view.
+        self._disk_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        dropped: list[str] = []
+        target = self.max_disk_bytes * EVICT_TO if self._disk_bytes > self.max_disk_bytes else self._disk_bytes
+        while self._disk_bytes > target:
+            rows = self._db.execute("SELECT key, size FROM results ORDER BY accessed LIMIT ?", (EVICT_BATCH,)).fetchall()
+            if not rows:
+                break
+            batch = []
+            for key, size in rows:
+                if self._disk_bytes <= target:
+                    break
+                batch.append(key)
+                self._disk_bytes -= size
+            self._db.executemany("DELETE FROM results WHERE key = ?", ((k,) for k in batch))
+            dropped.extend(batch)
+        with self._lock:
+            for key in dropped:
+                self._mem.pop(key, None)
+            self.stats["evictions"] += evicted + len(dropped)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+                self._disk_bytes = 0
+
+    def hit_rate(self) -> float:
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
@@ -0,0 +1,108 @@
+# -------------------------------------------------
+# CropCare - map-reduce summarization for large documents
+# -------------------------------------------------
+# Documents that do not fit one prompt are split into token-budgeted chunks,
+# each chunk is summarized concurrently (map), and the partial summaries are
+# folded into the final structured analysis (reduce). Chunk boundaries are
+# content-defined, so an edit in one place only changes the chunks around it
+# and every other chunk summary is served from the cache on re-upload.
+import re, hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+from result_cache import ResultCache, make_key
+
+CHUNK_TOKENS = 6000          # map-step input budget per chunk
+SINGLE_PASS_TOKENS = 12000   # documents below this go straight to the final prompt
+MAP_WORKERS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: ~4 chars/token for Latin text, ~2 for Indic scripts."""
+    if not text:
+        return 0
+    indic = sum(1 for ch in text if "\u0900" <= ch <= "\u0DFF")
+    return max(1, (len(text) - indic) // 4 + indic // 2)
+
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut `text` (at a word boundary) to roughly `max_tokens`."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    # estimate_tokens is linear in length, so one proportional cut lands close enough.
+    keep = int(len(text) * max_tokens / max(estimate_tokens(text), 1))
+    return text[:max(keep, 0)].rsplit(" ", 1)[0]
+
+
+def content_defined_chunks(text: str, max_tokens: int = CHUNK_TOKENS) -> list[str]:
+    """Pack paragraphs into chunks, cutting where a paragraph hash says so.
+
+    A cut happens after a paragraph once the chunk is at least half full and the
+    paragraph's hash hits 1-in-4, before a "#" heading once it is half full, or
+    unconditionally when the next paragraph would overflow. Because the decision
+    depends on content rather than offsets, boundaries re-synchronise right
+    after an edit.
+    """
+    paras = [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
+    chunks, cur, cur_tokens = [], [], 0
+    for p in paras:
+        t = estimate_tokens(p)
+        if t > max_tokens:  # oversized paragraph: split on sentence-ish boundaries
+            pieces = re.split(r"(?<=[.!?\u0964])\s+", p)
+            if len(pieces) == 1:
+                step = max(1, len(p) * max_tokens // t)
+                pieces = [p[i:i + step] for i in range(0, len(p), step)]
+            for piece in pieces:
+                piece_t = estimate_tokens(piece)
+                if cur and cur_tokens + piece_t > max_tokens:
+                    chunks.append("\n\n".join(cur))
+                    cur, cur_tokens = [], 0
+                cur.append(piece)
+                cur_tokens += piece_t
+            continue
+        # Headings (from structured DOCX extraction) also close a chunk that is at least half full.
+        if cur and (cur_tokens + t > max_tokens or (p.startswith("#") and cur_tokens >= max_tokens // 2)):
+            chunks.append("\n\n".join(cur))
+            cur, cur_tokens = [], 0
+        cur.append(p)
+        cur_tokens += t
+        if cur_tokens >= max_tokens // 2 and hashlib.sha256(p.encode("utf-8")).digest()[0] % 4 == 0:
+            chunks.append("\n\n".join(cur))
+            cur, cur_tokens = [], 0
+    if cur:
+        chunks.append("\n\n".join(cur))
+    return chunks
+
+
+def map_chunks(chunks: list[str], summarize_chunk, *, cache: ResultCache | None = None, language: str = "",
+               prompt_version: str = "", model: str = "", max_workers: int = MAP_WORKERS) -> list[str]:
+    """Summarize each chunk concurrently; results come back in chunk order."""
+    def one(chunk: str) -> str:
+        if cache is None:
+            return summarize_chunk(chunk)
+        key = make_key(chunk, language=language, mode="chunk-summary", prompt_version=prompt_version, model=model)
+        return cache.get_or_compute(key, lambda: summarize_chunk(chunk))
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="cropcare-map") as pool:
+        return list(pool.map(one, chunks))
+
+
+def reduce_partials(partials: list[str], summarize_chunk, *, max_tokens: int = CHUNK_TOKENS, **map_kwargs) -> str:
+    """Collapse partial summaries until they fit one prompt; returns the joined notes."""
+    joined = "\n\n".join(f"[Part {i}]\n{s}" for i, s in enumerate(partials, 1))
+    while estimate_tokens(joined) > max_tokens and len(partials) > 1:
+        groups = content_defined_chunks(joined, max_tokens=max_tokens)
+        if len(groups) >= len(partials):  # cannot shrink further by grouping
+            break
+        partials = map_chunks(groups, summarize_chunk, **map_kwargs)
+        joined = "\n\n".join(f"[Part {i}]\n{s}" for i, s in enumerate(partials, 1))
+    return joined
+
+
+def condense_document(text: str, summarize_chunk, *, single_pass_tokens: int = SINGLE_PASS_TOKENS,
+                      chunk_tokens: int = CHUNK_TOKENS, **map_kwargs) -> tuple[str, bool]:
+    """Return (text to put in the final summary prompt, whether it was condensed)."""
+    if estimate_tokens(text) <= single_pass_tokens:
+        return text, False
+    chunks = content_defined_chunks(text, max_tokens=chunk_tokens)
+    partials = map_chunks(chunks, summarize_chunk, **map_kwargs)
+    return reduce_partials(partials, summarize_chunk, max_tokens=chunk_tokens, **map_kwargs), True
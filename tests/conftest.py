@@ -0,0 +1,9 @@
+import os, sys, tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Offline backends and a throwaway cache for modules that touch cropcare_core.
+os.environ.setdefault("CROPCARE_MODEL_BACKEND", "fake")
+os.environ.setdefault("CROPCARE_TTS_BACKEND", "stub")
+os.environ.setdefault("CROPCARE_MODEL_RPS", "100")
+os.environ.setdefault("CROPCARE_CACHE_DIR", tempfile.mkdtemp(prefix="cropcare-tests-"))
@@ -0,0 +1,49 @@
+from answer_cache import AnswerCache
+
+
+def cache_with(question: str, language: str = "English") -> AnswerCache:
+    cache = AnswerCache(path="")
+    cache.put(question, language, f"answer to: {question}")
+    return cache
+
+
+def test_rephrasings_hit():
+    cache = cache_with("When should I plant corn?")
+    for asked in ("when should we plant the corn", "When should I plant my corn??", "WHEN SHOULD I PLANT CORN"):
+        assert cache.lookup(asked, "English") is not None, asked
+    cache = cache_with("When is the best time to plant corn?")
+    assert cache.lookup("when is best time to plant the corn", "English") is not None
+    cache = cache_with("Which fertilizer is best for tomatoes during the flowering stage?")
+    assert cache.lookup("which fertiliser is best for tomato during the flowering stage", "English") is not None
+
+
+def test_different_crop_or_stage_misses():
+    pairs = [
+        ("What is the best fertilizer for tomato plants during the flowering stage?",
+         "What is the best fertilizer for potato plants during the flowering stage?"),
+        ("When should I apply the first dose of urea to paddy after transplanting?",
+         "When should I apply the first dose of urea to maize after transplanting?"),
+        ("Can I spray neem oil on tomato during flowering to control whitefly?",
+         "Can I spray neem oil on tomato during fruiting to control whitefly?"),
+        ("Is it safe to plant rice in black soil?", "Is it safe to plant mice in black soil?"),
+    ]
+    for stored, asked in pairs:
+        assert cache_with(stored).lookup(asked, "English") is None, asked
+
+
+def test_different_question_words_miss():
+    cache = cache_with("When should I plant corn?")
+    for asked in ("How should I plant corn?", "Why plant corn?", "Can I plant corn?", "When can I plant corn?",
+                  "When could I plant corn?", "What should I plant with corn?"):
+        assert cache.lookup(asked, "English") is None, asked
+    cache = cache_with("Would urea help my paddy?")
+    assert cache.lookup("Could urea help my paddy?", "English") is None
+
+
+def test_negation_misses():
+    cache = cache_with("Should I spray pesticide on my cotton crop after heavy rain?")
+    assert cache.lookup("Should I not spray pesticide on my cotton crop after heavy rain?", "English") is None
+
+
+def test_languages_are_separate():
+    assert cache_with("best time to plant corn").lookup("best time to plant corn", "Hindi") is None
@@ -0,0 +1,51 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import api_server
+from api_server import WorkQueue, app
+
+client = TestClient(app)
+
+
+def test_malformed_conversation_is_rejected_with_422():
+    for conversation in ({"messages": [{"content": "hi"}]}, {"messages": [{"role": "system", "content": "x"}]},
+                         {"messages": "hi"}):
+        r = client.post("/chat", json={"question": "When should I sow paddy?", "conversation": conversation})
+        assert r.status_code == 422, conversation
+
+
+def test_conversation_round_trips():
+    conversation = {"messages": [{"role": "user", "content": "Hi"}, {"role": "assistant", "content": "Hello"}],
+                    "summary": "Farmer grows paddy."}
+    r = client.post("/chat", json={"question": "When should I sow paddy?", "conversation": conversation})
+    assert r.status_code == 200
+    assert r.json()["conversation"]["messages"][:2] == conversation["messages"]
+
+
+def test_streamed_chat_releases_its_slot():
+    r = client.post("/chat", json={"question": "How do I control aphids?", "stream": True})
+    assert r.status_code == 200 and r.text
+    assert api_server.get_queue().in_flight == 0
+
+
+def test_slot_is_released_when_the_client_leaves_before_the_body_starts():
+    async def scenario():
+        q = WorkQueue(workers=1, depth=0)
+        response = q.streaming_response(lambda: iter(["never sent"]))
+        assert q.in_flight == 1
+
+        async def receive():
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            raise OSError("client went away")
+
+        scope = {"type": "http", "asgi": {"spec_version": "2.4"}}
+        try:
+            await response(scope, receive, send)
+        except Exception:
+            pass
+        return q.in_flight
+
+    assert asyncio.run(scenario()) == 0
@@ -0,0 +1,83 @@
+import os, time
+
+from blob_store import BlobStore
+from result_cache import content_hash
+
+HOUR = 3600.0
+
+
+def store_at(tmp_path, **options) -> BlobStore:
+    return BlobStore(str(tmp_path / "blobs"), idle_ttl=HOUR, grace=HOUR, **options)
+
+
+def exists(store: BlobStore, ref: str) -> bool:
+    return os.path.exists(store._path(ref))
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    store = store_at(tmp_path)
+    a = store.put_text("Soil report", owner="s1")
+    b = store.put_text("Soil report", owner="s2")
+    assert a == b == content_hash("Soil report")
+    assert store.get_text(a) == "Soil report"
+    assert len(os.listdir(os.path.dirname(store._path(a)))) == 1
+
+
+def test_refs_are_never_paths(tmp_path):
+    store = store_at(tmp_path)
+    assert store.get("../refs.sqlite") is None and store.get("") is None
+    assert store.get("0" * 64) is None
+
+
+def test_reads_survive_a_restart_and_the_memory_tier_is_bounded(tmp_path):
+    store = store_at(tmp_path, memory_bytes=4000)
+    refs = [store.put(bytes([i]) * 900) for i in range(6)]
+    assert store._mem_size <= 4000
+    reopened = store_at(tmp_path)
+    assert reopened.get(refs[0]) == bytes([0]) * 900 and reopened.stats["disk_reads"] == 1
+
+
+def test_referenced_blobs_outlive_the_grace_period(tmp_path):
+    store = store_at(tmp_path)
+    now = time.time()
+    store.touch("s1")
+    kept = store.put_text("summary", owner="s1")
+    unowned = store.put_text("api document")
+    assert store.sweep(now + HOUR / 2) == 0  # within grace
+    store._db.execute("UPDATE owners SET seen = ?", (now + HOUR,))  # s1 still active
+    assert store.sweep(now + HOUR + 1) == 1
+    assert exists(store, kept) and not exists(store, unowned)
+    assert store.get(unowned) is None
+
+
+def test_idle_owners_lose_their_refs(tmp_path):
+    store = store_at(tmp_path)
+    now = time.time()
+    store.touch("idle")
+    store.touch("active")
+    only_idle = store.put_text("old upload", owner="idle")
+    shared = store.put_text("shared summary", owner="idle")
+    store.put_text("shared summary", owner="active")
+    store._db.execute("UPDATE owners SET seen = ? WHERE owner = 'active'", (now + 2 * HOUR,))
+    assert store.sweep(now + 2 * HOUR) == 1
+    assert not exists(store, only_idle) and exists(store, shared)
+
+
+def test_release_drops_an_owners_refs(tmp_path):
+    store = store_at(tmp_path)
+    now = time.time()
+    store.touch("s1")
+    old = store.put_text("previous upload", owner="s1")
+    store.release("s1")
+    new = store.put_text("new upload", owner="s1")
+    store._db.execute("UPDATE owners SET seen = ?", (now + 2 * HOUR,))
+    store.sweep(now + 2 * HOUR)
+    assert not exists(store, old) and exists(store, new)
+
+
+def test_putting_again_restarts_the_grace_period(tmp_path):
+    store = store_at(tmp_path)
+    ref = store.put_text("api document")
+    store._db.execute("UPDATE blobs SET created = ?", (time.time() - 2 * HOUR,))
+    store.put_text("api document")  # handed out again
+    assert store.sweep() == 0 and exists(store, ref)
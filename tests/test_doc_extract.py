@@ -0,0 +1,107 @@
+import io, zipfile
+
+import pytest
+
+from doc_extract import decode_text, detect_encoding, docx_to_text, iter_docx_sections
+
+_W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+
+def docx(body: str) -> io.BytesIO:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("word/document.xml", f'<?xml version="1.0" encoding="UTF-8"?><w:document {_W}><w:body>'
+                                         f"{body}<w:sectPr/></w:body></w:document>")
+    buf.seek(0)
+    return buf
+
+
+def p(text: str, style: str = "", props: str = "") -> str:
+    if style:
+        props = f'<w:pStyle w:val="{style}"/>' + props
+    ppr = f"<w:pPr>{props}</w:pPr>" if props else ""
+    return f"<w:p>{ppr}<w:r><w:t>{text}</w:t></w:r></w:p>"
+
+
+def table(*rows, nested: str = "") -> str:
+    cells = ["".join(f"<w:tc>{p(c)}</w:tc>" for c in row) for row in rows]
+    if nested:
+        cells[-1] = cells[-1][:-len("</w:tc>")] + nested + "</w:tc>"  # into the last cell
+    return "<w:tbl>" + "".join(f"<w:tr>{c}</w:tr>" for c in cells) + "</w:tbl>"
+
+
+# -------------------------------------------------
+# TXT decoding
+# -------------------------------------------------
+WESTERN = "naïve crème brûlée jalapeño"
+
+
+@pytest.mark.parametrize("encoding", ["cp1252", "latin-1"])
+@pytest.mark.parametrize("repeat", [1, 80])
+def test_western_code_pages_decode_as_cp1252(encoding, repeat):
+    text = " ".join([WESTERN] * repeat)
+    assert decode_text(text.encode(encoding)) == text
+
+
+@pytest.mark.parametrize("text, encoding", [
+    ("Düngung im Frühjahr: Weizen braucht Stickstoff, größere Mengen schaden. " * 10, "cp1252"),
+    ("Zażółć gęślą jaźń to polskie zdanie testowe o nawozach i glebie. " * 20, "cp1250"),
+    ("Урожай пшеницы в этом году хороший, удобрения внесены вовремя. " * 10, "cp1251"),
+    ("మట్టి పరీక్ష ఫలితాలు: నత్రజని తక్కువగా ఉంది.\n", "utf-16"),
+    ("मिट्टी परीक्षण: नाइट्रोजन कम है।\n", "utf-8-sig"),
+    ("Urea 50 kg/acre, ಮಣ್ಣು ಪರೀಕ್ಷೆ\n", "utf-8"),
+])
+def test_encodings_round_trip(text, encoding):
+    assert decode_text(text.encode(encoding)) == text
+
+
+def test_truncated_utf8_is_still_utf8():
+    data = "ಮಣ್ಣು ಪರೀಕ್ಷೆ".encode("utf-8")[:-1]
+    assert detect_encoding(data) == "utf-8"
+
+
+def test_line_endings_are_normalized():
+    assert decode_text(b"a\r\nb\rc\n") == "a\nb\nc\n"
+
+
+# -------------------------------------------------
+# DOCX
+# -------------------------------------------------
+def test_headings_paragraphs_and_lists_in_order():
+    body = (p("Soil report", "Title") + p("Field 1", "Heading2") + p("Sandy loam, pH 6.5.")
+            + p("Apply urea", props="<w:numPr/>") + p("Irrigate weekly", "ListBullet")
+            + p("Yield notes", props='<w:outlineLvl w:val="0"/>') + p("") + p("Good."))
+    sections = list(iter_docx_sections(docx(body)))
+    assert [(s.kind, s.text, s.level) for s in sections] == [
+        ("heading", "Soil report", 1), ("heading", "Field 1", 2), ("paragraph", "Sandy loam, pH 6.5.", 0),
+        ("paragraph", "- Apply urea", 0), ("paragraph", "- Irrigate weekly", 0),
+        ("heading", "Yield notes", 1), ("paragraph", "Good.", 0),
+    ]
+    assert docx_to_text(docx(body)).startswith("# Soil report\n\n## Field 1\n\nSandy loam, pH 6.5.\n\n- Apply urea")
+
+
+def test_tables_keep_their_place_and_rows():
+    body = p("Before") + table(["Week", "Fertilizer"], ["1", "Urea"], ["2", ""]) + p("After")
+    assert docx_to_text(docx(body)) == "Before\n\nWeek | Fertilizer\n1 | Urea\n2 | \n\nAfter"
+
+
+def test_large_tables_repeat_the_header_row():
+    rows = [["Week", "Fertilizer", "Dose"]] + [[str(i), "Potash", f"{i}.5 kg"] for i in range(200)]
+    text = docx_to_text(docx(table(*rows)))
+    blocks = text.split("\n\n")
+    assert len(blocks) > 1 and all(block.startswith("Week | Fertilizer | Dose\n") for block in blocks)
+    assert all(len(block) <= 1000 for block in blocks)
+    assert sum(block.count("Potash") for block in blocks) == 200
+
+
+def test_nested_tables_flatten_into_their_cell():
+    body = table(["Crop", "Schedule"], ["Paddy", "See"], nested=table(["Day 10", "Urea"]))
+    sections = list(iter_docx_sections(docx(body)))
+    assert len(sections) == 1 and sections[0].rows == [["Crop", "Schedule"], ["Paddy", "See Day 10 Urea"]]
+
+
+def test_tabs_breaks_and_text_boxes():
+    body = ('<w:p><w:pPr><w:tabs><w:tab w:val="left" w:pos="720"/></w:tabs></w:pPr>'
+            "<w:r><w:t>N</w:t><w:tab/><w:t>40</w:t><w:br/><w:t>P</w:t></w:r>"
+            "<w:r><w:pict><w:txbxContent><w:p><w:r><w:t>BOX</w:t></w:r></w:p></w:txbxContent></w:pict></w:r></w:p>")
+    assert docx_to_text(docx(body)) == "N\t40\nP"
@@ -0,0 +1,36 @@
+import time
+
+import image_index
+from image_index import ImageIndex
+
+PHOTO = (0x0123456789ABCDEF, 0xFEDCBA9876543210)
+RESAVED = (PHOTO[0] ^ 0b101, PHOTO[1] ^ 0b11)  # a few bits off, as after recompression
+
+
+def test_near_duplicate_reuses_diagnosis(tmp_path):
+    index = ImageIndex(str(tmp_path / "images.sqlite"))
+    entry = index.add(PHOTO, "English", "Early blight.")
+    assert index.lookup(RESAVED) == ({"English": ("Early blight.", None)}, entry)
+    assert index.lookup((~PHOTO[0] & (1 << 64) - 1, PHOTO[1])) is None
+
+
+def test_entries_expire_in_memory(tmp_path):
+    index = ImageIndex(str(tmp_path / "images.sqlite"), ttl=0.2)
+    index.add(PHOTO, "English", "Early blight.")
+    assert index.lookup(RESAVED) is not None
+    time.sleep(0.3)
+    assert index.lookup(RESAVED) is None  # without a restart
+    assert index.add(PHOTO, "English", "Late blight.") is not None  # stored as a new entry
+    assert index.lookup(RESAVED)[0] == {"English": ("Late blight.", None)}
+
+
+def test_expired_entries_are_dropped_periodically(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_index, "EXPIRE_EVERY", 0.0)
+    path = str(tmp_path / "images.sqlite")
+    index = ImageIndex(path, ttl=0.2)
+    index.add(PHOTO, "English", "Early blight.")
+    time.sleep(0.3)
+    index.add((PHOTO[0] ^ (1 << 63), 0), "English", "Healthy.")
+    assert index.stats["entries"] == 1
+    assert index._db.execute("SELECT COUNT(*) FROM images").fetchone()[0] == 1
+    assert index._db.execute("SELECT COUNT(*) FROM diagnoses").fetchone()[0] == 1
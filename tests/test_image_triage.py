@@ -0,0 +1,68 @@
+import io
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageEnhance, ImageFilter
+
+import image_triage
+
+
+def encode(img: Image.Image, fmt: str = "JPEG") -> bytes:
+    buf = io.BytesIO()
+    img.save(buf, fmt)
+    return buf.getvalue()
+
+
+def leaf_photo(seed: int = 0) -> Image.Image:
+    rng = np.random.default_rng(seed)
+    img = Image.new("RGB", (2000, 1500), (90, 110, 70))
+    draw = ImageDraw.Draw(img)
+    draw.ellipse([200, 150, 1800, 1350], fill=(50, 140, 45))
+    for k in range(25):
+        draw.line([300, 750, 1700, 225 + k * 42], fill=(120, 180, 100), width=4)
+    for _ in range(40):
+        x, y, s = rng.integers(400, 1600), rng.integers(300, 1200), rng.integers(15, 70)
+        draw.ellipse([x, y, x + s, y + s], fill=(130, 85, 35), outline=(200, 190, 60), width=5)
+    arr = np.asarray(img, dtype=float) + rng.normal(0, 10, (1500, 2000, 3))
+    return Image.fromarray(np.clip(arr, 0, 255).astype("uint8"))
+
+
+def soil_report(lines: int = 40) -> Image.Image:
+    img = Image.new("RGB", (1240, 1754), "white")
+    draw = ImageDraw.Draw(img)
+    for i in range(lines):
+        draw.text((100, 100 + i * 38), f"Sample {i}: pH 6.5  N 240 kg/ha  P 18  K 310  OC 0.62%", fill="black")
+    return img
+
+
+def test_sharp_leaf_is_usable():
+    result = image_triage.triage(encode(leaf_photo()))
+    assert result.usable, result
+    assert result.scene == "crop or leaf"
+
+
+def test_white_page_document_is_not_too_bright():
+    for fmt in ("PNG", "JPEG"):
+        result = image_triage.triage(encode(soil_report(), fmt))
+        assert result.usable, (fmt, result)
+    assert image_triage.triage(encode(soil_report(lines=3), "PNG")).usable
+
+
+def test_app_screenshot_is_usable():
+    img = Image.new("RGB", (1080, 1920), "white")
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((0, 0, 1080, 150), fill=(30, 140, 60))
+    for i in range(20):
+        draw.text((60, 200 + i * 60), "Advisory: spray mancozeb 2 g/l at 10 day intervals", fill=(40, 40, 40))
+    assert image_triage.triage(encode(img, "PNG")).usable
+
+
+def test_blown_out_and_dark_photos_are_rejected():
+    photo = leaf_photo()
+    assert image_triage.triage(encode(ImageEnhance.Brightness(photo).enhance(3.0))).reason == "too_bright"
+    assert image_triage.triage(encode(ImageEnhance.Brightness(photo).enhance(0.15))).reason == "too_dark"
+
+
+def test_blurry_and_unreadable():
+    assert image_triage.triage(encode(leaf_photo().filter(ImageFilter.GaussianBlur(12)))).reason == "blurry"
+    assert image_triage.triage(b"not an image").reason == "unreadable"
+    assert image_triage.triage(encode(Image.new("RGB", (100, 80), "green"))).reason == "too_small"
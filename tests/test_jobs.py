@@ -0,0 +1,134 @@
+import os, time
+
+import pytest
+
+import jobs
+from jobs import JobQueue
+
+NOTES = "Paddy leaves show brown spots after heavy rain. Urea was applied twice.".encode()
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.sqlite"), workers=0)
+
+
+def fake_extract(pages: dict[int, str], failing: set[int], seen: list | None = None):
+    """Stands in for core.extract_text on a PDF: checkpoints `pages`, reports `failing` as unreadable."""
+    def extract_text(file, reporter, done_pages, on_page, on_failed_page):
+        if seen is not None:
+            seen.append(dict(done_pages))
+        for page_no, text in pages.items():
+            if page_no in failing:
+                on_failed_page(page_no, RuntimeError("429"))
+            elif page_no not in done_pages:
+                on_page(page_no, text)
+        return "\n\n".join(text for page_no, text in sorted(pages.items()) if page_no not in failing)
+    return extract_text
+
+
+def test_submit_reuses_identical_jobs_and_claims_oldest_first(queue):
+    first = queue.submit("notes.txt", NOTES, "English")
+    assert queue.submit("notes.txt", NOTES, "English") == first
+    second = queue.submit("notes.txt", NOTES, "తెలుగు")
+    assert second != first
+    assert queue._claim()["id"] == first
+    assert queue.get(first)["status"] == "running" and queue.get(first)["attempts"] == 1
+    assert queue._claim()["id"] == second
+    assert queue._claim() is None
+
+
+def test_job_runs_to_done(queue):
+    job_id = queue.submit("notes.txt", NOTES, "English")
+    queue._run(queue._claim())
+    job = queue.get(job_id)
+    assert job["status"] == "done" and job["error"] is None
+    assert "brown spots" in job["doc_text"] and job["summary"]
+
+
+def test_failed_pages_are_retried_from_checkpoints(queue, monkeypatch):
+    seen = []
+    monkeypatch.setattr(jobs.core, "extract_text", fake_extract({1: "one", 2: "two"}, failing={2}, seen=seen))
+    job_id = queue.submit("report.pdf", b"%PDF fake", "English")
+    queue._run(queue._claim())
+    job = queue.get(job_id)
+    assert job["status"] == "queued" and job["updated"] > time.time() + jobs.RETRY_DELAY / 2
+    assert queue._claim() is None  # not due yet
+    assert queue.checkpointed_pages(job["input_hash"]) == {1: "one"}
+
+    queue._update(job_id, updated=time.time() - 1)
+    monkeypatch.setattr(jobs.core, "extract_text", fake_extract({1: "one", 2: "two"}, failing=set(), seen=seen))
+    queue._run(queue._claim())
+    job = queue.get(job_id)
+    assert job["status"] == "done" and job["error"] is None and job["doc_text"] == "one\n\ntwo"
+    assert seen[1] == {1: "one"}  # only page 2 was read again
+    assert queue.checkpointed_pages(job["input_hash"]) == {}
+
+
+def test_pages_still_missing_after_the_last_attempt_are_reported(tmp_path, monkeypatch):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"), workers=0, max_attempts=1)
+    monkeypatch.setattr(jobs.core, "extract_text", fake_extract({1: "one", 2: "two", 3: "three"}, failing={2, 3}))
+    job_id = queue.submit("report.pdf", b"%PDF fake", "English")
+    queue._run(queue._claim())
+    job = queue.get(job_id)
+    assert job["status"] == "done" and job["error"] == "2, 3" and job["doc_text"] == "one"
+    assert queue.checkpointed_pages(job["input_hash"]) == {1: "one"}  # kept for the next upload
+    assert queue.submit("report.pdf", b"%PDF fake", "English") != job_id
+
+
+def test_heartbeat_keeps_a_slow_job_fresh(queue, monkeypatch):
+    monkeypatch.setattr(jobs, "HEARTBEAT", 0.05)
+    job_id = queue.submit("notes.txt", NOTES, "English")
+    claimed_at = queue.get(job_id)["updated"]
+    during = []
+
+    def slow_summary(text, language):
+        time.sleep(0.3)
+        during.append(queue.get(job_id)["updated"])
+        return "summary"
+
+    monkeypatch.setattr(jobs.core, "summarize_document", slow_summary)
+    queue._run(queue._claim())
+    assert during[0] - claimed_at >= 0.2
+    assert queue.get(job_id)["status"] == "done"
+
+
+def test_interrupted_job_is_picked_up_after_a_restart(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    queue = JobQueue(path, workers=0)
+    job_id = queue.submit("notes.txt", NOTES, "English")
+    queue._claim()  # the process dies while running it
+    restarted = JobQueue(path, workers=0)
+    assert restarted._claim() is None  # still looks alive
+    restarted._update(job_id, updated=time.time() - jobs.STALE_AFTER - 1)
+    job = restarted._claim()
+    assert job["id"] == job_id and restarted.get(job_id)["attempts"] == 2
+    restarted._run(job)
+    assert restarted.get(job_id)["status"] == "done"
+
+
+def test_gives_up_after_max_attempts(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"), workers=0, max_attempts=2)
+    job_id = queue.submit("notes.txt", NOTES, "English")
+    for _ in range(2):
+        queue._claim()
+        queue._update(job_id, updated=time.time() - jobs.STALE_AFTER - 1)
+    queue._run(queue._claim())
+    assert queue.get(job_id)["status"] == "failed"
+
+
+def test_sweep_expires_finished_jobs_and_unused_inputs(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"), workers=0, ttl=3600)
+    done_id = queue.submit("notes.txt", NOTES, "English")
+    queue._run(queue._claim())
+    waiting_id = queue.submit("other.txt", b"Maize needs potash.", "English")
+    queue._db().execute("INSERT INTO job_pages (input_hash, page_no, text) VALUES ('gone', 1, 'x')")
+
+    later = time.time() + jobs.STALE_AFTER + 1
+    assert queue.sweep(later) == 0  # finished, but not past ttl
+    assert queue.get(done_id) is not None
+    assert sorted(os.listdir(queue.input_dir)) == [f"{queue.get(waiting_id)['input_hash']}.txt"]
+    assert queue.checkpointed_pages("gone") == {}
+
+    assert queue.sweep(time.time() + 3601) == 1
+    assert queue.get(done_id) is None and queue.get(waiting_id)["status"] == "queued"
@@ -0,0 +1,198 @@
+import time, threading
+
+import pytest
+
+from model_client import (
+    CircuitBreaker, FakeModel, ModelClient, ModelUnavailableError, SingleFlight, TokenBucket, UpstreamTimeoutError,
+)
+
+
+class BadRequest(Exception):
+    """A 4xx-style error: not retryable, says nothing about upstream health."""
+
+
+def failing(model: FakeModel, exc: Exception) -> FakeModel:
+    def raise_(contents, generation_config=None):
+        raise exc
+    model.response_fn = raise_
+    return model
+
+
+# -------------------------------------------------
+# Circuit breaker
+# -------------------------------------------------
+def test_client_errors_do_not_reset_the_breaker():
+    breaker = CircuitBreaker(threshold=2)
+    breaker.record(False)
+    client = ModelClient(failing(FakeModel(latency=0), BadRequest("400 bad prompt")), breaker=breaker, retries=0,
+                         coalesce=False)
+    with pytest.raises(BadRequest):
+        client.generate_content("hi")
+    assert breaker.failures == 1  # neither reset to 0 nor counted
+    breaker.record(False)
+    assert breaker.state == "open"
+
+
+def test_client_error_on_probe_lets_the_next_probe_through():
+    breaker = CircuitBreaker(threshold=1, reset_after=0.0)
+    breaker.record(False)
+    client = ModelClient(failing(FakeModel(latency=0), BadRequest("400 bad prompt")), breaker=breaker, retries=0,
+                         coalesce=False)
+    with pytest.raises(BadRequest):
+        client.generate_content("hi")
+    assert breaker.allow()
+
+
+# -------------------------------------------------
+# Hedging
+# -------------------------------------------------
+def test_hedge_needs_a_limiter_token():
+    limiter = TokenBucket(rate=0.001, capacity=1)
+    model = FakeModel(latency=0.2)
+    client = ModelClient(model, limiter=limiter, hedge_after=0.05, retries=0, coalesce=False)
+    assert client.generate_content("slow vision call").text
+    assert model.calls == 1
+    assert client.stats["hedges"] == 0 and client.stats["hedges_skipped"] == 1
+
+
+def test_hedge_is_sent_when_a_token_is_free():
+    limiter = TokenBucket(rate=0.001, capacity=2)
+    model = FakeModel(latency=0.2)
+    client = ModelClient(model, limiter=limiter, hedge_after=0.05, retries=0, coalesce=False)
+    start = time.monotonic()
+    client.generate_content("slow vision call")
+    assert time.monotonic() - start < 1
+    assert model.calls == 2 and client.stats["hedges"] == 1
+
+
+# -------------------------------------------------
+# Request coalescing
+# -------------------------------------------------
+def run_concurrently(fn, n: int) -> list:
+    """Call `fn` from `n` threads released together; returns results or raised exceptions, in order."""
+    barrier = threading.Barrier(n)
+    out = [None] * n
+
+    def worker(i):
+        barrier.wait()
+        try:
+            out[i] = fn()
+        except Exception as e:
+            out[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+    return out
+
+
+def test_identical_calls_share_one_upstream_call():
+    model = FakeModel(latency=0.2)
+    client = ModelClient(model, retries=0)
+    results = run_concurrently(lambda: client.generate_content("when to sow paddy").text, 8)
+    assert model.calls == 1
+    assert len(set(results)) == 1 and not isinstance(results[0], Exception)
+    assert client.stats["coalesced"] == 7
+
+
+def test_leader_failure_reaches_every_follower():
+    model = failing(FakeModel(latency=0.2), BadRequest("400 bad prompt"))
+    client = ModelClient(model, retries=0)
+    results = run_concurrently(lambda: client.generate_content("when to sow paddy"), 6)
+    assert model.calls == 1
+    assert all(isinstance(r, BadRequest) for r in results)
+    assert len(client._flights) == 0  # the next call starts afresh
+
+
+def test_follower_times_out_waiting_for_a_slow_leader():
+    flights, release = SingleFlight(), threading.Event()
+    leader = threading.Thread(target=flights.do, args=("k", lambda: release.wait(5) and "late", 5, 60))
+    leader.start()
+    time.sleep(0.05)
+    with pytest.raises(TimeoutError):
+        flights.do("k", lambda: "never called", wait_timeout=0.05, max_age=60)
+    release.set()
+    leader.join()
+
+
+def test_stale_flight_is_taken_over_after_max_age():
+    flights, release, calls = SingleFlight(), threading.Event(), []
+
+    def stuck():
+        calls.append("stuck")
+        release.wait(5)
+        return "stale"
+
+    leader = threading.Thread(target=flights.do, args=("k", stuck, 5, 0.05))
+    leader.start()
+    time.sleep(0.1)
+    result, shared = flights.do("k", lambda: calls.append("fresh") or "fresh", wait_timeout=5, max_age=0.05)
+    assert (result, shared) == ("fresh", False) and calls == ["stuck", "fresh"]
+    release.set()
+    leader.join()
+
+
+def chunks(n: int, delay: float = 0.0):
+    for i in range(n):
+        if delay:
+            time.sleep(delay)
+        yield f"c{i} "
+
+
+def test_late_stream_joiner_gets_the_whole_stream():
+    flights, calls = SingleFlight(), []
+    stream, shared = flights.do("k", lambda: calls.append(1) or chunks(5), wait_timeout=5, max_age=60, stream=True)
+    it = iter(stream)
+    assert (next(it), next(it), shared) == ("c0 ", "c1 ", False)
+    joined, shared = flights.do("k", lambda: calls.append(1) or chunks(5), wait_timeout=5, max_age=60, stream=True)
+    assert shared and "".join(joined) == "c0 c1 c2 c3 c4 "
+    assert "".join(it) == "c2 c3 c4 "
+    assert len(calls) == 1 and len(flights) == 0
+
+
+def test_stream_continues_after_the_leader_stops_reading():
+    flights = SingleFlight()
+    stream, _ = flights.do("k", lambda: chunks(4, delay=0.01), wait_timeout=5, max_age=60, stream=True)
+    assert next(iter(stream)) == "c0 "  # the leader's page was closed after the first chunk
+    joined, shared = flights.do("k", lambda: chunks(4), wait_timeout=5, max_age=60, stream=True)
+    assert shared and "".join(joined) == "c0 c1 c2 c3 "
+    assert len(flights) == 0
+
+
+def test_stream_error_reaches_readers_and_clears_the_flight():
+    def broken():
+        yield "c0 "
+        raise ConnectionError("stream reset")
+
+    flights = SingleFlight()
+    stream, _ = flights.do("k", broken, wait_timeout=5, max_age=60, stream=True)
+    joined, _ = flights.do("k", broken, wait_timeout=5, max_age=60, stream=True)
+    for reader in (stream, joined):
+        got = []
+        with pytest.raises(ConnectionError):
+            for chunk in reader:
+                got.append(chunk)
+        assert got == ["c0 "]
+    assert len(flights) == 0
+
+
+def test_concurrent_stream_readers_see_identical_chunks():
+    model = FakeModel(latency=0.1, chunk_delay=0.005)
+    client = ModelClient(model, retries=0)
+    texts = run_concurrently(lambda: "".join(c.text for c in client.generate_content("spray schedule", stream=True)), 5)
+    assert model.calls == 1
+    assert len(set(texts)) == 1 and texts[0].startswith("Fake answer")
+
+
+def test_hanging_hedged_upstream_opens_the_breaker():
+    breaker = CircuitBreaker(threshold=3)
+    hung = FakeModel(latency=0, response_fn=lambda contents, cfg=None: time.sleep(2) or "late")  # ignores its timeout
+    client = ModelClient(hung, breaker=breaker, hedge_after=0.1, timeout=0.4, retries=0, coalesce=False)
+    for _ in range(3):
+        with pytest.raises(UpstreamTimeoutError):
+            client.generate_content("hung vision call")
+    assert breaker.state == "open"
+    with pytest.raises(ModelUnavailableError):
+        client.generate_content("hung vision call")
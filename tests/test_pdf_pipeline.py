@@ -0,0 +1,137 @@
+import io, os, time, threading
+
+import pytest
+from PIL import Image
+
+import pdf_pipeline
+from pdf_pipeline import classify_page, iter_pdf_pages, join_pages, open_pdf
+
+TYPED = ("Soil test report for plot 7. Nitrogen is low, phosphorus is adequate and potassium is high. "
+         "Apply 50 kg urea per acre in two splits, irrigate after each dose and avoid spraying before rain. ") * 4
+
+
+def make_pdf(pages: list[tuple[str, bool]]) -> bytes:
+    """A letter-size PDF; each page is (text, covered by a full-page image)."""
+    objects = {1: b"<< /Type /Catalog /Pages 2 0 R >>",
+               3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+               4: b"<< /Type /XObject /Subtype /Image /Width 1 /Height 1 /ColorSpace /DeviceGray"
+                  b" /BitsPerComponent 8 /Length 1 >>\nstream\n\x80\nendstream"}
+    kids = []
+    for i, (text, image) in enumerate(pages):
+        page_id, content_id = 5 + 2 * i, 6 + 2 * i
+        lines = [text[j:j + 90] for j in range(0, len(text), 90)]
+        ops = "BT /F1 10 Tf 40 750 Td " + " ".join(f"({line}) Tj 0 -12 Td" for line in lines) + " ET"
+        if image:
+            ops = "q 612 0 0 792 0 0 cm /Im1 Do Q " + ops
+        stream = ops.encode("latin-1")
+        objects[content_id] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        objects[page_id] = (b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R"
+                            b" /Resources << /Font << /F1 3 0 R >> /XObject << /Im1 4 0 R >> >> >>" % content_id)
+        kids.append(b"%d 0 R" % page_id)
+    objects[2] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+    out, offsets = io.BytesIO(), {}
+    out.write(b"%PDF-1.4\n")
+    for n in sorted(objects):
+        offsets[n] = out.tell()
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (n, objects[n]))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for n in sorted(objects):
+        out.write(b"%010d 00000 n \n" % offsets[n])
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+@pytest.fixture
+def fake_poppler(monkeypatch):
+    """Render stand-in (poppler is a system binary): page n becomes an image 100 + n pixels wide.
+    Returns a one-item list holding the most page images that existed at once."""
+    alive, peak, lock = set(), [0], threading.Lock()
+
+    def render_page(pdf_path, page_no, out_dir, dpi=pdf_pipeline.OCR_DPI):
+        path = os.path.join(out_dir, f"page-{page_no}.png")
+        Image.new("L", (100 + page_no, 50), 255).save(path)
+        with lock:
+            alive.add(page_no)
+            peak[0] = max(peak[0], len(alive))
+        return path
+
+    real_remove = os.remove
+
+    def remove(path):
+        real_remove(path)
+        with lock:
+            alive.discard(int(os.path.basename(path)[5:-4]))
+
+    monkeypatch.setattr(pdf_pipeline, "render_page", render_page)
+    monkeypatch.setattr(pdf_pipeline.os, "remove", remove)
+    return peak
+
+
+def ocr_page_number(jpeg: bytes) -> str:
+    with Image.open(io.BytesIO(jpeg)) as img:
+        return f"OCR page {img.width - 100}"
+
+
+# -------------------------------------------------
+# Classification
+# -------------------------------------------------
+@pytest.mark.parametrize("text, image, kind", [
+    (TYPED, False, "text"),
+    (TYPED, True, "text"),                             # typed page with a logo/background image
+    ("", True, "scanned"),                             # plain scan
+    ("Page 3", False, "scanned"),                      # too little text to be the page
+    ("Scanned by FarmLab Mobile, 2024-06-01", True, "scanned"),  # scan with a text stamp
+    ("Scanned by FarmLab Mobile, 2024-06-01", False, "text"),    # short but real page
+    ("#$% &*+ <=> @^_ |~# $%& *+< =>@ ^_| ~#$ %&*", False, "scanned"),  # broken font encoding
+], ids=["typed", "typed+image", "scan", "header-only", "scan+stamp", "short", "garbled"])
+def test_classify_page(text, image, kind):
+    page = open_pdf(make_pdf([(text, image)])).pages[0]
+    got, extracted = classify_page(page)
+    assert got == kind
+    assert (extracted != "") == (kind == "text")
+
+
+# -------------------------------------------------
+# Page iteration
+# -------------------------------------------------
+def test_mixed_document_ocrs_only_scanned_pages_in_order(fake_poppler):
+    layout = [(TYPED, False), ("", True), (TYPED, False), ("", True), ("", True), (TYPED, False)]
+    ocr_calls = []
+
+    def ocr(jpeg):
+        text = ocr_page_number(jpeg)
+        ocr_calls.append(text)
+        time.sleep(0.05 if text.endswith("2") else 0.0)  # the first scan finishes last
+        return text
+
+    pages = list(iter_pdf_pages(make_pdf(layout), ocr, max_workers=3))
+    assert [p.page_no for p in pages] == [1, 2, 3, 4, 5, 6]
+    assert [p.source for p in pages] == ["text", "ocr", "text", "ocr", "ocr", "text"]
+    assert [p.text for p in pages if p.source == "ocr"] == ["OCR page 2", "OCR page 4", "OCR page 5"]
+    assert sorted(ocr_calls) == ["OCR page 2", "OCR page 4", "OCR page 5"]
+    assert all(p.total == 6 for p in pages)
+
+
+def test_checkpoints_are_reused_and_failures_reported(fake_poppler):
+    def ocr(jpeg):
+        text = ocr_page_number(jpeg)
+        if text.endswith("3"):
+            raise RuntimeError("429 quota")
+        return text
+
+    pages = list(iter_pdf_pages(make_pdf([("", True)] * 4), ocr, done_pages={1: "saved page 1"}))
+    assert [(p.page_no, p.source, p.text) for p in pages] == [
+        (1, "checkpoint", "saved page 1"), (2, "ocr", "OCR page 2"), (3, "error", ""), (4, "ocr", "OCR page 4")]
+    assert isinstance(pages[2].error, RuntimeError)
+    assert join_pages({p.page_no: p.text for p in pages}).count("--- Page Break ---") == 2
+
+
+def test_page_images_stay_within_the_window(fake_poppler):
+    def ocr(jpeg):
+        time.sleep(0.01)
+        return ocr_page_number(jpeg)
+
+    pages = list(iter_pdf_pages(make_pdf([("", True)] * 12), ocr, max_workers=2, window=3))
+    assert [p.text for p in pages] == [f"OCR page {n}" for n in range(1, 13)]
+    assert fake_poppler[0] <= 3
@@ -0,0 +1,78 @@
+import time
+
+from result_cache import ResultCache, content_hash, make_key
+
+
+def test_keys_depend_on_content_and_every_part():
+    base = make_key(b"leaf.jpg bytes", language="English", mode="summary", prompt_version="3", model="m")
+    assert base == make_key(b"leaf.jpg bytes", language="English", mode="summary", prompt_version="3", model="m")
+    assert make_key("leaf.jpg bytes", language="English", mode="summary", prompt_version="3", model="m") == base
+    variants = [
+        make_key(b"other bytes", language="English", mode="summary", prompt_version="3", model="m"),
+        make_key(b"leaf.jpg bytes", language="తెలుగు", mode="summary", prompt_version="3", model="m"),
+        make_key(b"leaf.jpg bytes", language="English", mode="ocr", prompt_version="3", model="m"),
+        make_key(b"leaf.jpg bytes", language="English", mode="summary", prompt_version="4", model="m"),
+        make_key(b"leaf.jpg bytes", language="English", mode="summary", prompt_version="3", model="n"),
+        make_key(b"leaf.jpg bytes", language="English", mode="summary", prompt_version="3", model="m", extra="q"),
+    ]
+    assert len(set(variants + [base])) == len(variants) + 1
+    assert content_hash("abc") == content_hash(b"abc")
+
+
+def test_hit_and_miss(tmp_path):
+    cache = ResultCache(str(tmp_path / "results.sqlite"))
+    key = make_key(b"doc", mode="summary")
+    assert cache.get(key) is None
+    cache.set(key, "Apply potash.")
+    assert cache.get(key) == "Apply potash."
+    assert cache.get(make_key(b"doc", mode="summary", language="हिंदी")) is None
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 2
+    cache.set(make_key(b"empty"), "")  # empty results are never cached
+    assert cache.get(make_key(b"empty")) is None
+
+
+def test_entries_expire_after_ttl(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    cache = ResultCache(path, ttl=0.2)
+    cache.set("k", "v")
+    assert cache.get("k") == "v"
+    time.sleep(0.3)
+    assert cache.get("k") is None
+    assert ResultCache(path, ttl=0.2).get("k") is None  # gone from disk too
+
+
+def test_memory_tier_is_lru():
+    cache = ResultCache("", max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")  # b is now least recently used
+    cache.set("c", "3")
+    assert cache.get("b") is None and cache.get("a") == "1" and cache.get("c") == "3"
+    assert cache.stats["evictions"] == 1
+
+
+def test_disk_tier_survives_restarts(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    ResultCache(path).set("k", "Spray neem oil at dusk.")
+    reopened = ResultCache(path)
+    assert reopened.get("k") == "Spray neem oil at dusk."
+    assert reopened.stats["disk_hits"] == 1
+    assert reopened.get("k") and reopened.stats["memory_hits"] == 1
+
+
+def test_disk_tier_evicts_least_recently_used_below_the_cap(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    cache = ResultCache(path, max_entries=1, max_disk_bytes=1000)
+    for i in range(5):
+        cache.set(f"k{i}", str(i) * 150)
+        time.sleep(0.01)
+    cache.get("k0")  # from disk: now the most recently used
+    time.sleep(0.01)
+    for i in range(5, 8):
+        cache.set(f"k{i}", str(i) * 150)
+        time.sleep(0.01)
+    reopened = ResultCache(path)
+    kept = {k for k in (f"k{i}" for i in range(8)) if reopened.get(k) is not None}
+    assert "k0" in kept and "k1" not in kept and "k7" in kept
+    assert len(kept) * 150 <= 1000
+    assert reopened._disk_bytes == len(kept) * 150
@@ -0,0 +1,36 @@
+import threading
+
+from tts_service import TTSService
+
+
+class FailingBackend:
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def synthesize(self, text: str, lang: str) -> bytes:
+        with self.lock:
+            self.calls += 1
+        raise ConnectionError("offline")
+
+
+def test_failed_job_is_returned_until_retry_after():
+    backend = FailingBackend()
+    tts = TTSService(backend=backend, cache_dir="", retry_after=60)
+    job = tts.request("Spray neem oil.", "en")
+    job.future.exception(timeout=5)
+    for _ in range(5):  # UI reruns while the error is shown
+        again = tts.request("Spray neem oil.", "en")
+        assert again is job and again.done() and isinstance(again.error, ConnectionError)
+    assert backend.calls == 1
+
+
+def test_failed_job_is_retried_after_cooldown():
+    backend = FailingBackend()
+    tts = TTSService(backend=backend, cache_dir="", retry_after=0)
+    first = tts.request("Spray neem oil.", "en")
+    first.future.exception(timeout=5)
+    second = tts.request("Spray neem oil.", "en")
+    assert second is not first
+    second.future.exception(timeout=5)
+    assert backend.calls == 2
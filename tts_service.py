@@ -0,0 +1,181 @@
+# -------------------------------------------------
+# CropCare - cached, chunked, background text-to-speech
+# -------------------------------------------------
+# Synthesis runs on a background pool so page renders never wait on gTTS.
+# Long texts are split into sentence chunks synthesized in parallel; the first
+# chunk is exposed as soon as it is ready so playback can start early, and the
+# concatenated MP3 is cached on disk by hash of (text, language).
+import os, re, time, hashlib, threading
+from concurrent.futures import ThreadPoolExecutor, Future
+
+from result_cache import DEFAULT_CACHE_DIR
+from metrics import span
+
+TTS_WORKERS = int(os.getenv("CROPCARE_TTS_WORKERS", "4"))
+TTS_CHUNK_CHARS = 400
+TTS_RETRY_AFTER = 60.0  # seconds a failed job is returned as is before a new attempt is made
+
+SENTENCE_END_RE = re.compile(r"(?<=[.!?\u0964\u0965])\s+|\n+")
+
+
+# -------------------------------------------------
+# Backends
+# -------------------------------------------------
+class GTTSBackend:
+    """Google Translate TTS (needs network)."""
+
+    def synthesize(self, text: str, lang: str) -> bytes:
+        import io
+        from gtts import gTTS
+        buf = io.BytesIO()
+        gTTS(text=text, lang=lang, slow=False).write_to_fp(buf)
+        return buf.getvalue()
+
+
+class StubBackend:
+    """Offline stand-in: returns deterministic bytes and records calls.
+
+    `latency` (seconds per call) simulates gTTS round trips for benchmarks.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: list[tuple[str, str]] = []
+
+    def synthesize(self, text: str, lang: str) -> bytes:
+        if self.latency:
+            time.sleep(self.latency)
+        self.calls.append((text, lang))
+        return f"[{lang}]{text}".encode("utf-8")
+
+
+BACKENDS = {"gtts": GTTSBackend, "stub": StubBackend}
+
+
+def backend_from_env():
+    return BACKENDS.get(os.getenv("CROPCARE_TTS_BACKEND", "gtts"), GTTSBackend)()
+
+
+# -------------------------------------------------
+# Chunking
+# -------------------------------------------------
+def split_sentences(text: str, max_chars: int = TTS_CHUNK_CHARS) -> list[str]:
+    """Group sentences into chunks of at most `max_chars` (longer sentences are split on spaces)."""
+    chunks, cur = [], ""
+    for sent in (s.strip() for s in SENTENCE_END_RE.split(text)):
+        if not sent:
+            continue
+        while len(sent) > max_chars:
+            cut = sent.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if cur:
+                chunks.append(cur)
+                cur = ""
+            chunks.append(sent[:cut].strip())
+            sent = sent[cut:].strip()
+        if cur and len(cur) + len(sent) + 1 > max_chars:
+            chunks.append(cur)
+            cur = sent
+        else:
+            cur = f"{cur} {sent}" if cur else sent
+    if cur:
+        chunks.append(cur)
+    return chunks
+
+
+# -------------------------------------------------
+# Service
+# -------------------------------------------------
+class TTSJob:
+    """Handle for one (text, language) synthesis running in the background."""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.first_chunk: bytes | None = None
+        self.future: Future = Future()
+        self.failed_at: float | None = None
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def result(self) -> bytes:
+        return self.future.result()
+
+    @property
+    def error(self) -> BaseException | None:
+        return self.future.exception() if self.future.done() else None
+
+
+class TTSService:
+    def __init__(self, backend=None, cache_dir: str | None = None, max_workers: int = TTS_WORKERS,
+                 retry_after: float = TTS_RETRY_AFTER):
+        self.retry_after = retry_after
+        self.backend = backend or backend_from_env()
+        self.cache_dir = cache_dir if cache_dir is not None else os.path.join(DEFAULT_CACHE_DIR, "tts")
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        # Jobs fan out chunk tasks onto a separate pool, so a job never waits on its own pool.
+        self._jobs_pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="cropcare-tts")
+        self._chunk_pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="cropcare-tts-chunk")
+        self._jobs: dict[str, TTSJob] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text: str, lang: str) -> str:
+        return hashlib.sha256(f"{lang}\x1f{text}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str | None:
+        return os.path.join(self.cache_dir, f"{key}.mp3") if self.cache_dir else None
+
+    def request(self, text: str, lang: str) -> TTSJob:
+        """Return the job for (text, lang), starting synthesis in the background if needed.
+
+        A failed job is returned for `retry_after` seconds, so callers can show the error
+        instead of resubmitting (and failing) on every rerun.
+        """
+        key = self.key(text, lang)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and (job.failed_at is None or time.monotonic() - job.failed_at < self.retry_after):
+                return job
+            job = TTSJob(key)
+            self._jobs[key] = job
+            path = self._path(key)
+            if path and os.path.exists(path):
+                with open(path, "rb") as fh:
+                    job.future.set_result(fh.read())
+                return job
+        self._jobs_pool.submit(self._run, job, text, lang)
+        return job
+
+    def synthesize(self, text: str, lang: str) -> bytes:
+        """Blocking convenience wrapper around request()."""
+        return self.request(text, lang).result()
+
+    def _synthesize_chunk(self, text: str, lang: str) -> bytes:
+        with span("tts.chunk") as sp:
+            audio = self.backend.synthesize(text, lang)
+            sp.add(chars=len(text), audio_bytes=len(audio))
+            return audio
+
+    def _run(self, job: TTSJob, text: str, lang: str) -> None:
+        try:
+            chunks = split_sentences(text) or [text]
+            futures = [self._chunk_pool.submit(self._synthesize_chunk, c, lang) for c in chunks]
+            job.first_chunk = futures[0].result()
+            # MP3 frames are self-delimiting, so chunk outputs can be concatenated directly.
+            audio = job.first_chunk + b"".join(f.result() for f in futures[1:])
+            path = self._path(job.key)
+            if path:
+                tmp = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp, "wb") as fh:
+                    fh.write(audio)
+                os.replace(tmp, path)
+            job.future.set_result(audio)
+            if path:
+                # The disk copy serves later requests; don't keep the audio pinned in memory too.
+                with self._lock:
+                    self._jobs.pop(job.key, None)
+        except BaseException as e:
+            job.failed_at = time.monotonic()
+            job.future.set_exception(e)
@@ -0,0 +1,334 @@
+# -------------------------------------------------
+# CropCare - static UI text and styling
+# -------------------------------------------------
+# Kept out of CropCare.py because Streamlit re-executes the app script on
+# every interaction; as module constants these are built once per process.
+
+# -------------------------------------------------
+# Sectors (Simplified)
+# -------------------------------------------------
+SECTOR_LABELS = {
+    "English":     {"Agriculture": "Agriculture"},
+    "हिंदी":       {"Agriculture": "कृषि"},
+    "తెలుగు":      {"Agriculture": "వ్యవసాయం"},
+    "മലയാളം":     {"Agriculture": "കൃഷി"},
+}
+
+# -------------------------------------------------
+# UI Translations
+# -------------------------------------------------
+UI_TRANSLATIONS = {
+    "English": {
+        "select_language": "🌍 Select Your Language",
+        "choose_language": "Choose your preferred language to continue",
+        "selected_language": "Selected Language",
+        "back_language": "← Back to Language Selection",
+        "settings": "⚙️ Settings",
+        "change_lang_sector": "🔄 Change Language",
+        "current": "Current",
+        "uploader_any": "Upload ANY file type (📄 Documents + 🖼️ Images)",
+        "sample_doc_btn": "📝 Load sample {sector} document",
+        "sample_try": "Try sample data if there is no file ready",
+        "extracting": "Extracting text…",
+        "generating": "Generating analysis…",
+        "translating": "Translating the analysis…",
+        "thinking": "Thinking...",
+        "no_text": "No readable text found in the uploaded file.",
+        "analyzing_image": "🔍 Analyzing image...",
+        "retake_blurry": "📷 This photo looks blurry. Please hold the phone steady, tap to focus on the leaf and take it again.",
+        "retake_too_dark": "📷 This photo is too dark. Please retake it in daylight or with more light on the plant.",
+        "retake_too_bright": "📷 This photo is washed out. Please avoid direct glare and take it again.",
+        "retake_too_small": "📷 This image is too small to analyze. Please upload the original photo.",
+        "retake_unreadable": "📷 This file could not be opened as an image. Please upload a JPG or PNG photo.",
+        "image_analysis_header": "🖼️ Image Analysis",
+        "uploaded_image_caption": "Uploaded {sector} Image",
+        "extracting_image_text": "Extracting text from image...",
+        "enhanced_title_suffix": " – Enhanced AI Analysis",
+        "info_agri": "🌍 Language: {lang_flag} {lang} | 🌾 Sector: Agricultural Analysis + Crop Image Recognition",
+        "tab_doc": "📄 Enhanced {sector} Analysis",
+        "tab_gen": "🧭 General {sector} Help",
+        "enhanced_analysis_header": "📊 Enhanced {sector} Analysis",
+        "chat_about_analysis": "💬 Ask Questions About This Analysis",
+        "chat_placeholder": "Ask any question about this analysis...",
+        "examples_try": "Try asking:",
+        "gen_help_header": "🧭 General {sector} Help & Consultation",
+        "gen_help_caption": "Ask any {sector_lower}-related questions — here to help!",
+        "gen_chat_placeholder": "Ask any {sector_lower} question...",
+        "examples_caption": "Example questions:",
+        "enhanced_features_title": "🚀 Features:",
+        "features_agri_1": "🌱 Crop disease detection",
+        "features_agri_2": "🐛 Pest identification",
+        "features_agri_3": "📊 Soil analysis from images",
+        "disclaimer_block_header": "⚠️ Disclaimer:",
+        "disclaimer_agri": "- Agricultural: Recommendations are general—consider local conditions",
+        "disclaimer_footer": "- Always verify critical information with qualified professionals",
+        "document": "Document",
+        "analysis_summary": "📑 Analysis Summary",
+        "preparing_audio": "🔊 Preparing audio…",
+        "image_bytes_saved": "🗜️ {mb:.1f} MB saved across {n} images",
+        "batch_header": "🗂️ Batch Analysis ({n} files)",
+        "batch_progress": "Analyzed {done}/{total} {file}",
+        "download_csv": "⬇️ Download CSV report",
+        "download_jsonl": "⬇️ Download JSONL report",
+        "job_queued": "⏳ Queued for analysis…",
+        "job_failed": "Analysis failed: {error}",
+        "job_missing_pages": "Some pages could not be read and are not part of this analysis: {pages}",
+        "job_resume_hint": "Job {job_id} — safe to close this page; reopen the same link to resume.",
+        "earlier_conversation": "🗂️ Earlier in this conversation",
+        "perf_panel": "⏱️ Performance (p50 / p95 seconds)",
+        "download_metrics": "⬇️ Prometheus metrics",
+        "cache_stats": "⚡ Cache: {hits} hits / {misses} misses ({rate:.0%} saved)"
+    },
+    "हिंदी": {
+        "select_language": "🌍 अपनी भाषा चुनें",
+        "choose_language": "जारी रखने के लिए अपनी पसंदीदा भाषा चुनें",
+        "selected_language": "चयनित भाषा",
+        "back_language": "← भाषा चयन पर वापस",
+        "settings": "⚙️ सेटिंग्स",
+        "change_lang_sector": "🔄 भाषा बदलें",
+        "current": "वर्तमान",
+        "uploader_any": "किसी भी फ़ाइल प्रकार को अपलोड करें (📄 दस्तावेज़ + 🖼️ छवियाँ)",
+        "sample_doc_btn": "📝 नमूना {sector} दस्तावेज़ लोड करें",
+        "sample_try": "यदि फ़ाइल तैयार नहीं है तो नमूना आज़माएँ",
+        "extracting": "पाठ निकाला जा रहा है…",
+        "generating": "विश्लेषण बनाया जा रहा है…",
+        "translating": "विश्लेषण का अनुवाद हो रहा है…",
+        "thinking": "सोच रहा है...",
+        "no_text": "अपलोड की गई फ़ाइल में पढ़ने योग्य पाठ नहीं मिला।",
+        "analyzing_image": "🔍 छवि का विश्लेषण हो रहा है...",
+        "retake_blurry": "📷 यह फ़ोटो धुंधली लग रही है। फ़ोन स्थिर रखें, पत्ती पर टैप करके फ़ोकस करें और दोबारा फ़ोटो लें।",
+        "retake_too_dark": "📷 यह फ़ोटो बहुत अंधेरी है। कृपया दिन की रोशनी में या पौधे पर अधिक रोशनी में दोबारा लें।",
+        "retake_too_bright": "📷 यह फ़ोटो बहुत ज़्यादा चमकीली है। सीधी चमक से बचें और दोबारा फ़ोटो लें।",
+        "retake_too_small": "📷 यह छवि विश्लेषण के लिए बहुत छोटी है। कृपया मूल फ़ोटो अपलोड करें।",
+        "retake_unreadable": "📷 यह फ़ाइल छवि के रूप में नहीं खुल सकी। कृपया JPG या PNG फ़ोटो अपलोड करें।",
+        "image_analysis_header": "🖼️ छवि विश्लेषण",
+        "uploaded_image_caption": "अपलोड की गई {sector} छवि",
+        "extracting_image_text": "छवि से पाठ निकाला जा रहा है...",
+        "enhanced_title_suffix": " – उन्नत AI विश्लेषण",
+        "info_agri": "🌍 भाषा: {lang_flag} {lang} | 🌾 क्षेत्र: कृषि विश्लेषण + फसल छवि पहचान",
+        "tab_doc": "📄 उन्नत {sector} विश्लेषण",
+        "tab_gen": "🧭 सामान्य {sector} सहायता",
+        "enhanced_analysis_header": "📊 उन्नत {sector} विश्लेषण",
+        "chat_about_analysis": "💬 इस विश्लेषण के बारे में प्रश्न पूछें",
+        "chat_placeholder": "इस विश्लेषण के बारे में कोई भी प्रश्न पूछें...",
+        "examples_try": "कोशिश करें पूछने की:",
+        "gen_help_header": "🧭 सामान्य {sector} सहायता और परामर्श",
+        "gen_help_caption": "किसी भी {sector_lower}-संबंधित प्रश्न पूछें — मदद के लिए तैयार!",
+        "gen_chat_placeholder": "कोई भी {sector_lower} प्रश्न पूछें...",
+        "examples_caption": "उदाहरण प्रश्न:",
+        "enhanced_features_title": "🚀 विशेषताएँ:",
+        "features_agri_1": "🌱 फसल रोग पहचान",
+        "features_agri_2": "🐛 कीट पहचान",
+        "features_agri_3": "📊 छवियों से मिट्टी विश्लेषण",
+        "disclaimer_block_header": "⚠️अस्वीकरण:",
+        "disclaimer_agri": "- कृषि: सिफारिशें सामान्य हैं—स्थानीय परिस्थितियों पर विचार करें",
+        "disclaimer_footer": "- महत्वपूर्ण जानकारी को हमेशा योग्य विशेषज्ञों से सत्यापित करें",
+        "document": "दस्तावेज़",
+        "analysis_summary": "📑 विश्लेषण सारांश",
+        "preparing_audio": "🔊 ऑडियो तैयार हो रहा है…",
+        "image_bytes_saved": "🗜️ {n} छवियों में {mb:.1f} MB की बचत",
+        "batch_header": "🗂️ बैच विश्लेषण ({n} फ़ाइलें)",
+        "batch_progress": "{done}/{total} विश्लेषित {file}",
+        "download_csv": "⬇️ CSV रिपोर्ट डाउनलोड करें",
+        "download_jsonl": "⬇️ JSONL रिपोर्ट डाउनलोड करें",
+        "job_queued": "⏳ विश्लेषण कतार में है…",
+        "job_failed": "विश्लेषण विफल: {error}",
+        "job_missing_pages": "कुछ पृष्ठ पढ़े नहीं जा सके और इस विश्लेषण में शामिल नहीं हैं: {pages}",
+        "job_resume_hint": "जॉब {job_id} — यह पेज बंद कर सकते हैं; वही लिंक दोबारा खोलकर जारी रखें।",
+        "earlier_conversation": "🗂️ इस बातचीत में पहले",
+        "perf_panel": "⏱️ प्रदर्शन (p50 / p95 सेकंड)",
+        "download_metrics": "⬇️ Prometheus मेट्रिक्स",
+        "cache_stats": "⚡ कैश: {hits} हिट / {misses} मिस ({rate:.0%} बचत)"
+    },
+    "తెలుగు": {
+        "select_language": "🌍 మీ భాషను ఎంచుకోండి",
+        "choose_language": "కొనసాగేందుకు మీకు నచ్చిన భాషను ఎంచుకోండి",
+        "selected_language": "ఎంచుకున్న భాష",
+        "back_language": "← భాష ఎంపికకు వెనక్కి",
+        "settings": "⚙️ అమరికలు",
+        "change_lang_sector": "🔄 భాష మార్చండి",
+        "current": "ప్రస్తుతము",
+        "uploader_any": "ఏ ఫైల్ రకమైనా అప్లోడ్ చేయండి (📄 పత్రాలు + 🖼️ చిత్రాలు)",
+        "sample_doc_btn": "📝 నమూనా {sector} పత్రాన్ని లోడ్ చేయండి",
+        "sample_try": "ఫైళ్లు సిద్ధంగా లేకపోతే నమూనా ప్రయత్నించండి",
+        "extracting": "పాఠ్యాన్ని వెలికితీస్తున్నాం…",
+        "generating": "విశ్లేషణను సృష్టిస్తున్నాం…",
+        "translating": "విశ్లేషణను అనువదిస్తున్నాం…",
+        "thinking": "ఆలోచిస్తున్నాను...",
+        "no_text": "ఈ ఫైల్‌లో చదవగలిగే పాఠ్యం కనిపించలేదు.",
+        "analyzing_image": "🔍 చిత్రాన్ని విశ్లేషిస్తున్నాం...",
+        "retake_blurry": "📷 ఈ ఫోటో మసకగా ఉంది. ఫోన్‌ను స్థిరంగా పట్టుకుని, ఆకుపై ఫోకస్ చేసి మళ్ళీ తీయండి.",
+        "retake_too_dark": "📷 ఈ ఫోటో చాలా చీకటిగా ఉంది. పగటి వెలుతురులో లేదా మొక్కపై ఎక్కువ వెలుతురుతో మళ్ళీ తీయండి.",
+        "retake_too_bright": "📷 ఈ ఫోటో చాలా వెలిసిపోయింది. నేరుగా పడే మెరుపును నివారించి మళ్ళీ తీయండి.",
+        "retake_too_small": "📷 ఈ చిత్రం విశ్లేషణకు చాలా చిన్నది. దయచేసి అసలు ఫోటోను అప్‌లోడ్ చేయండి.",
+        "retake_unreadable": "📷 ఈ ఫైల్‌ను చిత్రంగా తెరవలేకపోయాం. దయచేసి JPG లేదా PNG ఫోటోను అప్‌లోడ్ చేయండి.",
+        "image_analysis_header": "🖼️ చిత్రం విశ్లేషణ",
+        "uploaded_image_caption": "అప్లోడ్ చేసిన {sector} చిత్రం",
+        "extracting_image_text": "చిత్రం నుండి పాఠ్యాన్ని వెలికితీస్తున్నాం...",
+        "enhanced_title_suffix": " – అధునాతన AI విశ్లేషణ",
+        "info_agri": "🌍 భాష: {lang_flag} {lang} | 🌾 విభాగం: వ్యవసాయ విశ్లేషణ + పంట చిత్రం గుర్తింపు",
+        "tab_doc": "📄 అధునాతన {sector} విశ్లేషణ",
+        "tab_gen": "🧭 సాధారణ {sector} సహాయం",
+        "enhanced_analysis_header": "📊 అధునాతన {sector} విశ్లేషణ",
+        "chat_about_analysis": "💬 ఈ విశ్లేషణ గురించి ప్రశ్నలు అడగండి",
+        "chat_placeholder": "ఈ విశ్లేషణ గురించి ఏదైనా ప్రశ్న అడగండి...",
+        "examples_try": "ఇలా అడగండి:",
+        "gen_help_header": "🧭 సాధారణ {sector} సహాయం & సలహా",
+        "gen_help_caption": "ఏదైనా {sector_lower} సంబంధిత ప్రశ్నలు అడగండి — సహాయం కోసం సిద్ధంగా ఉన్నాము!",
+        "gen_chat_placeholder": "ఏదైనా {sector_lower} ప్రశ్న అడగండి...",
+        "examples_caption": "ఉదాహరణ ప్రశ్నలు:",
+        "enhanced_features_title": "🚀 లక్షణాలు:",
+        "features_agri_1": "🌱 పంట రోగాల గుర్తింపు",
+        "features_agri_2": "🐛 కీటకాలను గుర్తించడం",
+        "features_agri_3": "📊 చిత్రాల నుండి మట్టి విశ్లేషణ",
+        "disclaimer_block_header": "⚠️ గమనిక:",
+        "disclaimer_agri": "- వ్యవసాయం: సిఫారసులు సాధారణం — స్థానిక పరిస్థితులను పరిగణించండి",
+        "disclaimer_footer": "- ముఖ్య సమాచారాన్ని ఎల్లప్పుడూ అర్హులైన నిపుణులతో ధృవీకరించండి",
+        "document": "పత్రం",
+        "analysis_summary": "📑 విశ్లేషణ సారాంశం",
+        "preparing_audio": "🔊 ఆడియో సిద్ధమవుతోంది…",
+        "image_bytes_saved": "🗜️ {n} చిత్రాలలో {mb:.1f} MB ఆదా",
+        "batch_header": "🗂️ బ్యాచ్ విశ్లేషణ ({n} ఫైళ్లు)",
+        "batch_progress": "{done}/{total} విశ్లేషించబడ్డాయి {file}",
+        "download_csv": "⬇️ CSV నివేదిక డౌన్‌లోడ్",
+        "download_jsonl": "⬇️ JSONL నివేదిక డౌన్‌లోడ్",
+        "job_queued": "⏳ విశ్లేషణ వరుసలో ఉంది…",
+        "job_failed": "విశ్లేషణ విఫలమైంది: {error}",
+        "job_missing_pages": "కొన్ని పేజీలను చదవలేకపోయాము, అవి ఈ విశ్లేషణలో లేవు: {pages}",
+        "job_resume_hint": "జాబ్ {job_id} — ఈ పేజీని మూసివేయవచ్చు; అదే లింక్ తెరిచి కొనసాగించండి.",
+        "earlier_conversation": "🗂️ ఈ సంభాషణలో ఇంతకు ముందు",
+        "perf_panel": "⏱️ పనితీరు (p50 / p95 సెకన్లు)",
+        "download_metrics": "⬇️ Prometheus మెట్రిక్స్",
+        "cache_stats": "⚡ కాష్: {hits} హిట్లు / {misses} మిస్‌లు ({rate:.0%} ఆదా)"
+    },
+    "മലയാളം": {
+        "select_language": "🌍 ഭാഷ തിരഞ്ഞെടുക്കുക",
+        "choose_language": "തുടരാൻ ഇഷ്ടമുള്ള ഭാഷ തിരഞ്ഞെടുക്കുക",
+        "selected_language": "തിരഞ്ഞെടുത്ത ഭാഷ",
+        "back_language": "← ഭാഷ തിരഞ്ഞെടുപ്പിലേക്ക് മടങ്ങുക",
+        "settings": "⚙️ ക്രമീകരണങ്ങൾ",
+        "change_lang_sector": "🔄 ഭാഷ മാറ്റുക",
+        "current": "നിലവിൽ",
+        "uploader_any": "ഏത് ഫയൽ തരം വേണമെങ്കിലും അപ്‌ലോഡ് ചെയ്യുക (📄 രേഖകൾ + 🖼️ ചിത്രങ്ങൾ)",
+        "sample_doc_btn": "📝 സാമ്പിൾ {sector} രേഖ ലോഡ് ചെയ്യുക",
+        "sample_try": "ഫയൽ ഇല്ലെങ്കിൽ സാമ്പിൾ പരീക്ഷിക്കുക",
+        "extracting": "ടെക്സ്റ്റ് എടുത്തുകൊണ്ടിരിക്കുന്നു…",
+        "generating": "വിശകലനം സൃഷ്ടിക്കുന്നു…",
+        "translating": "വിശകലനം വിവർത്തനം ചെയ്യുന്നു…",
+        "thinking": "ചിന്തിക്കുന്നു...",
+        "no_text": "അപ്‌ലോഡ് ചെയ്ത ഫയലിൽ വായിക്കാൻ പറ്റുന്ന ടെക്സ്റ്റ് കണ്ടെത്താനായില്ല.",
+        "analyzing_image": "🔍 ചിത്രം വിശകലനം ചെയ്യുന്നു...",
+        "retake_blurry": "📷 ഈ ഫോട്ടോ മങ്ങിയതാണ്. ഫോൺ അനങ്ങാതെ പിടിച്ച്, ഇലയിൽ ഫോക്കസ് ചെയ്ത് വീണ്ടും എടുക്കുക.",
+        "retake_too_dark": "📷 ഈ ഫോട്ടോ വളരെ ഇരുണ്ടതാണ്. പകൽവെളിച്ചത്തിലോ ചെടിയിൽ കൂടുതൽ വെളിച്ചമുള്ളപ്പോഴോ വീണ്ടും എടുക്കുക.",
+        "retake_too_bright": "📷 ഈ ഫോട്ടോയിൽ വെളിച്ചം കൂടുതലാണ്. നേരിട്ടുള്ള തിളക്കം ഒഴിവാക്കി വീണ്ടും എടുക്കുക.",
+        "retake_too_small": "📷 ഈ ചിത്രം വിശകലനത്തിന് വളരെ ചെറുതാണ്. യഥാർത്ഥ ഫോട്ടോ അപ്‌ലോഡ് ചെയ്യുക.",
+        "retake_unreadable": "📷 ഈ ഫയൽ ചിത്രമായി തുറക്കാനായില്ല. JPG അല്ലെങ്കിൽ PNG ഫോട്ടോ അപ്‌ലോഡ് ചെയ്യുക.",
+        "image_analysis_header": "🖼️ ചിത്രം വിശകലനം",
+        "uploaded_image_caption": "അപ്‌ലോഡ് ചെയ്ത {sector} ചിത്രം",
+        "extracting_image_text": "ചിത്രത്തിൽ നിന്ന് ടെക്സ്റ്റ് എടുത്തുകൊണ്ടിരിക്കുന്നു...",
+        "enhanced_title_suffix": " – ഉയർന്ന നിലവാരമുള്ള AI വിശകലനം",
+        "info_agri": "🌍 ഭാഷ: {lang_flag} {lang} | 🌾 വിഭാഗം: കാർഷിക വിശകലനം + വിള ചിത്ര തിരിച്ചറിയൽ",
+        "tab_doc": "📄 ഉയർന്ന നിലവാരമുള്ള {sector} വിശകലനം",
+        "tab_gen": "🧭 പൊതുവായ {sector} സഹായം",
+        "enhanced_analysis_header": "📊 ഉയർന്ന നിലവാരമുള്ള {sector} വിശകലനം",
+        "chat_about_analysis": "💬 ഈ വിശകലനത്തെ കുറിച്ച് ചോദ്യങ്ങൾ ചോദിക്കുക",
+        "chat_placeholder": "ഈ വിശകലനത്തെ കുറിച്ച് ഏതെങ്കിലും ചോദ്യമുണ്ടോ...",
+        "examples_try": "ഇങ്ങനെ ചോദിക്കുക:",
+        "gen_help_header": "🧭 പൊതുവായ {sector} സഹായവും നിർദേശവും",
+        "gen_help_caption": "{sector_lower} സംബന്ധമായ ഏതെങ്കിലും ചോദ്യങ്ങൾ ചോദിക്കുക — സഹായത്തിനായി തയ്യാറാണ്!",
+        "gen_chat_placeholder": "ഏതെങ്കിലും {sector_lower} ചോദ്യം ചോദിക്കുക...",
+        "examples_caption": "ഉദാഹരണ ചോദ്യങ്ങൾ:",
+        "enhanced_features_title": "🚀 വിശേഷഗുണങ്ങൾ:",
+        "features_agri_1": "🌱 വിള രോഗം തിരിച്ചറിയൽ",
+        "features_agri_2": "🐛 കീടം തിരിച്ചറിയൽ",
+        "features_agri_3": "📊 ചിത്രങ്ങളിൽ നിന്ന് മണ്ണ് വിശകലനം",
+        "disclaimer_block_header": "⚠️ അറിയിപ്പ്:",
+        "disclaimer_agri": "- കാർഷികം: നിർദേശങ്ങൾ പൊതുവായതാണ് — പ്രാദേശിക സാഹചര്യങ്ങൾ പരിഗണിക്കുക",
+        "disclaimer_footer": "- പ്രധാന വിവരങ്ങൾ എപ്പോഴും യോഗ്യനായ വിദഗ്ധരുമായി സ്ഥിരീകരിക്കുക",
+        "document": "രേഖ",
+        "analysis_summary": "📑 വിശകലന സംഗ്രഹം",
+        "preparing_audio": "🔊 ഓഡിയോ തയ്യാറാക്കുന്നു…",
+        "image_bytes_saved": "🗜️ {n} ചിത്രങ്ങളിൽ {mb:.1f} MB ലാഭിച്ചു",
+        "batch_header": "🗂️ ബാച്ച് വിശകലനം ({n} ഫയലുകൾ)",
+        "batch_progress": "{done}/{total} വിശകലനം ചെയ്തു {file}",
+        "download_csv": "⬇️ CSV റിപ്പോർട്ട് ഡൗൺലോഡ്",
+        "download_jsonl": "⬇️ JSONL റിപ്പോർട്ട് ഡൗൺലോഡ്",
+        "job_queued": "⏳ വിശകലനം ക്യൂവിലാണ്…",
+        "job_failed": "വിശകലനം പരാജയപ്പെട്ടു: {error}",
+        "job_missing_pages": "ചില പേജുകൾ വായിക്കാൻ കഴിഞ്ഞില്ല, അവ ഈ വിശകലനത്തിൽ ഉൾപ്പെടുന്നില്ല: {pages}",
+        "job_resume_hint": "ജോബ് {job_id} — ഈ പേജ് അടയ്ക്കാം; അതേ ലിങ്ക് തുറന്ന് തുടരാം.",
+        "earlier_conversation": "🗂️ ഈ സംഭാഷണത്തിൽ മുമ്പ്",
+        "perf_panel": "⏱️ പ്രകടനം (p50 / p95 സെക്കൻഡ്)",
+        "download_metrics": "⬇️ Prometheus മെട്രിക്സ്",
+        "cache_stats": "⚡ കാഷ്: {hits} ഹിറ്റുകൾ / {misses} മിസ്സുകൾ ({rate:.0%} ലാഭം)"
+    },
+}
+
+# -------------------------------------------------
+# CSS Styling
+# -------------------------------------------------
+PALETTES = {
+    "Agriculture":{"brand": "#16A34A", "brand2": "#F59E0B", "bg1": "#DCFCE7", "bg2": "#FEF3C7"},
+}
+_pal = PALETTES["Agriculture"]
+APP_CSS = f"""
+<style>
+/* Force readable light scheme and strong foreground */
+html {{ color-scheme: light; }}
+:root {{
+  --brand: {_pal["brand"]};
+  --brand-2: {_pal["brand2"]};
+  --bg-grad-1: {_pal["bg1"]};
+  --bg-grad-2: {_pal["bg2"]};
+  --text: #0F172A;              /* Dark slate for high contrast */
+  --text-weak: #334155;
+  --surface: #ffffff;
+  --border: #E5E7EB;
+}}
+/* Background stays colorful but subtle */
+.stApp {{
+  background:
+    radial-gradient(1200px 600px at 10% 0%, var(--bg-grad-1), transparent 60%),
+    radial-gradient(1000px 500px at 100% 10%, var(--bg-grad-2), transparent 60%),
+    linear-gradient(180deg, #ffffff 0%, #f8fafc 100%);
+}}
+/* GLOBAL TYPOGRAPHY */
+html, body, [class*="css"] {{
+  font-family: "Inter","Poppins","Noto Sans","Noto Sans Telugu","Noto Sans Devanagari","Noto Sans Malayalam",
+               system-ui,-apple-system,Segoe UI,Roboto,"Helvetica Neue",Arial,"Noto Color Emoji","Apple Color Emoji","Segoe UI Emoji",sans-serif !important;
+  color: var(--text);
+}}
+h1, h2, h3, h4, h5, h6 {{
+  color: var(--text) !important;
+  font-weight: 700;
+}}
+/* BUTTONS */
+div.stButton > button {{
+  background: linear-gradient(135deg, var(--brand), var(--brand-2));
+  color: #fff !important;
+  border: none; border-radius: 14px;
+  padding: 0.9rem 1.1rem;
+  box-shadow: 0 8px 24px rgba(0,0,0,.12);
+  transition: transform .15s ease, box-shadow .15s ease, filter .2s ease;
+}}
+div.stButton > button:hover {{
+  transform: translateY(-1px);
+  box-shadow: 0 12px 30px rgba(0,0,0,.18);
+  filter: brightness(1.03);
+}}
+/* TABS */
+.stTabs [role="tab"][aria-selected="true"] {{
+  background: linear-gradient(135deg, var(--brand), var(--brand-2));
+  color: #fff !important; border-color: transparent !important;
+}}
+/* TEXT INPUTS */
+.stTextInput > div > div input:focus,
+.stTextArea > div > textarea:focus {{
+  border-color: var(--brand);
+  box-shadow: 0 0 0 3px color-mix(in srgb, var(--brand) 25%, transparent);
+}}
+/* Separate sections subtly */
+.hr-soft {{ margin: .8rem 0 1rem 0; border: none; height: 1px;
+  background: linear-gradient(90deg, transparent, #e5e7eb, transparent); }}
+</style>
+"""